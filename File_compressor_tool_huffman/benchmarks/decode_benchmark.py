@@ -0,0 +1,53 @@
+"""
+Compare the per-bit string decoder with the table-driven decoder.
+
+Usage:
+    python -m benchmarks.decode_benchmark [input_file] [--size BYTES]
+"""
+import argparse
+import time
+from collections import Counter
+from huffman.compressor_utils import CompressorUtils
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.table_decoder import TableDecoder
+from huffman.tree import HuffmanTree
+
+
+def time_call(function, *args):
+    """Run the function once and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Huffman decoders.")
+    parser.add_argument("input_path", nargs="?", default="data/test.txt", help="Text file to compress and decode.")
+    parser.add_argument("--size", type=int, default=300_000, help="Number of characters used for the string decoder (it is very slow).")
+    args = parser.parse_args()
+
+    text = CompressorUtils.get_file_content(args.input_path)
+    tree = HuffmanTree(Counter(text))
+    tree.build_tree()
+    tree.generate_codes()
+    payload = CompressorUtils.get_byte_arary(CompressorUtils.encode_text(text, tree.get_codes()))
+    megabytes = len(text.encode('utf-8')) / 1_000_000
+
+    decoder, build_time = time_call(TableDecoder, tree)
+    decoded, table_time = time_call(decoder.decode, payload)
+    assert decoded == text, "Table decoder output does not match the input."
+    print(f"Table build:    {build_time * 1000:8.2f} ms")
+    print(f"Table decoder:  {table_time:8.3f} s  {megabytes / table_time:8.2f} MB/s  ({megabytes:.2f} MB)")
+
+    sample = text[:args.size]
+    sample_megabytes = len(sample.encode('utf-8')) / 1_000_000
+    sample_payload = CompressorUtils.get_byte_arary(CompressorUtils.encode_text(sample, tree.get_codes()))
+    decoded, string_time = time_call(
+        lambda: DecompressorUtils.decode_text(DecompressorUtils.get_binary_string(sample_payload), tree.reverse_codes)
+    )
+    assert decoded == sample, "String decoder output does not match the input."
+    print(f"String decoder: {string_time:8.3f} s  {sample_megabytes / string_time:8.2f} MB/s  ({sample_megabytes:.2f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare string-slice bit packing with the integer packing layer.
+
+Usage:
+    python -m benchmarks.encode_benchmark [input_file] [--chunk-size CHARACTERS]
+"""
+import argparse
+import time
+from collections import Counter
+from huffman.bit_packing import CodePacker
+from huffman.compressor_utils import CompressorUtils, DEFAULT_CHUNK_SIZE
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.tree import HuffmanTree
+
+
+def slice_pack(encoded_text):
+    """The original packing: one int(..., 2) call per 8-character slice."""
+    padding = 8 - len(encoded_text) % 8
+    encoded_text += '0' * padding
+    return bytes([padding]) + bytes([int(encoded_text[i:i + 8], 2) for i in range(0, len(encoded_text), 8)])
+
+
+def slice_unpack(byte_array):
+    """The original unpacking: one format(byte, '08b') call per byte."""
+    binary_string = ''.join(format(byte, '08b') for byte in byte_array[1:])
+    return binary_string[:-byte_array[0]] if byte_array[0] else binary_string
+
+
+def report(name, seconds, megabytes):
+    print(f"{name:<24}{seconds:8.3f} s  {megabytes / seconds:8.2f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Huffman bit packing.")
+    parser.add_argument("input_path", nargs="?", default="data/test.txt", help="Text file to encode.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Characters encoded per chunk.")
+    args = parser.parse_args()
+
+    text = CompressorUtils.get_file_content(args.input_path)
+    megabytes = len(text.encode('utf-8')) / 1_000_000
+    tree = HuffmanTree(Counter(text))
+    tree.build_tree()
+    tree.generate_codes()
+    codes = tree.get_codes()
+    print(f"Input: {megabytes:.2f} MB")
+
+    start = time.perf_counter()
+    encoded = ''.join(codes[char] for char in text)
+    packed = slice_pack(encoded)
+    report("Slice encode + pack", time.perf_counter() - start, megabytes)
+
+    start = time.perf_counter()
+    unpacked = slice_unpack(packed)
+    report("Slice unpack", time.perf_counter() - start, megabytes)
+
+    start = time.perf_counter()
+    assert CompressorUtils.get_byte_arary(CompressorUtils.encode_text(text, codes)) == packed
+    report("Integer encode + pack", time.perf_counter() - start, megabytes)
+
+    start = time.perf_counter()
+    assert DecompressorUtils.get_binary_string(packed) == unpacked
+    report("Integer unpack", time.perf_counter() - start, megabytes)
+
+    packer = CodePacker(codes)
+    start = time.perf_counter()
+    for offset in range(0, len(text), args.chunk_size):
+        packer.encode(text[offset:offset + args.chunk_size])
+    report("CodePacker (chunked)", time.perf_counter() - start, megabytes)
+
+
+if __name__ == '__main__':
+    main()
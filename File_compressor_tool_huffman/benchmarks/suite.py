@@ -0,0 +1,274 @@
+"""
+Time each stage of the Huffman pipeline on synthetic corpora and write the results as JSON.
+
+Usage:
+    python -m benchmarks.suite [--corpus NAME ...] [--size MB] [--repeat N] [--output results.json] [--baseline old.json]
+    python main.py bench [same options]
+
+Every stage is timed separately (best of --repeat runs) and then run once more under tracemalloc
+to record its peak Python memory use. Comparing against a previous JSON file with --baseline
+prints the throughput change of each stage.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from huffman.compressor_utils import CompressorUtils, DEFAULT_CHUNK_SIZE
+from huffman.huffman_coding import HuffmanCoding
+from huffman.table_decoder import TableDecoder
+from huffman.tree import HuffmanTree
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = ('frequency_count', 'build_tree', 'generate_codes', 'encode_text', 'packing', 'writing', 'decoding', 'compress', 'decompress')
+
+
+def generate_uniform(size: int, generator: random.Random) -> bytes:
+    """Printable ASCII with every character equally likely."""
+    alphabet = string.ascii_letters + string.digits + string.punctuation + ' \n'
+    return ''.join(generator.choices(alphabet, k=size)).encode('ascii')
+
+
+def generate_skewed(size: int, generator: random.Random) -> bytes:
+    """Lowercase text whose letter frequencies follow a Zipf distribution."""
+    alphabet = ' etaoinshrdlucmfwypvbgkjqxz\n'
+    weights = [1 / rank for rank in range(1, len(alphabet) + 1)]
+    return ''.join(generator.choices(alphabet, weights, k=size)).encode('ascii')
+
+
+def generate_unicode(size: int, generator: random.Random) -> bytes:
+    """Mostly multi-byte UTF-8 text: Cyrillic, Greek, CJK and emoji mixed with ASCII."""
+    alphabet = 'абвгдежзиклмнопрстуфхцчшщыэюя' + 'αβγδεζηθικλμνξοπρστυφχψω' + '的一是不了人我在有他这中大来上国个到说们' + '😀😂✓★♥' + ' .\n'
+    data = ''.join(generator.choices(alphabet, k=size // 2)).encode('utf-8')
+    return data[:size].decode('utf-8', errors='ignore').encode('utf-8')
+
+
+def generate_binary(size: int, generator: random.Random) -> bytes:
+    """Bytes drawn from all 256 values with geometrically decreasing probabilities."""
+    weights = [0.97 ** value for value in range(256)]
+    return bytes(generator.choices(range(256), weights, k=size))
+
+
+CORPORA: Dict[str, Tuple[Callable[[int, random.Random], bytes], bool]] = {
+    'uniform': (generate_uniform, False),
+    'skewed': (generate_skewed, False),
+    'unicode': (generate_unicode, False),
+    'binary': (generate_binary, True),
+}
+
+
+def build_stages(input_path: str, work_directory: str, binary: bool, chunk_size: int) -> List[Tuple[str, Callable[[dict], None]]]:
+    """
+    Describe the pipeline as named stages that read and update a shared state dictionary.
+
+    The first seven stages run the building blocks one at a time on the whole input; the last two
+    run the streaming HuffmanCoding.compress and decompress end to end.
+    """
+    payload_path = os.path.join(work_directory, 'stages.huff')
+    compressed_path = os.path.join(work_directory, 'corpus.huff')
+    output_path = os.path.join(work_directory, 'corpus.out')
+
+    def frequency_count(state):
+        if binary:
+            state['frequency_table'] = CompressorUtils.calculate_byte_frequency(input_path, chunk_size)
+        else:
+            state['frequency_table'] = CompressorUtils.calculate_character_frequency(input_path, chunk_size)
+
+    def build_tree(state):
+        state['tree'] = HuffmanTree(state['frequency_table'])
+        state['tree'].build_tree()
+
+    def generate_codes(state):
+        state['tree'].generate_codes()
+        state['tree'].make_canonical()
+
+    def encode_text(state):
+        state['encoded'] = CompressorUtils.encode_text(state['data'], state['tree'].get_codes())
+
+    def packing(state):
+        state['payload'] = CompressorUtils.get_byte_arary(state['encoded'])
+
+    def writing(state):
+        with open(payload_path, 'wb') as file:
+            CompressorUtils.write_code_lengths_header(file, state['tree'].get_code_lengths(), binary, sync_index=False)
+            file.write(state['payload'])
+
+    def decoding(state):
+        state['decoded'] = TableDecoder(state['tree'], binary).decode(state['payload'])
+
+    def compress(state):
+        HuffmanCoding(input_path, chunk_size, binary).compress(compressed_path)
+        state['compressed_size'] = os.path.getsize(compressed_path)
+
+    def decompress(state):
+        HuffmanCoding(compressed_path, chunk_size).decompress(compressed_path, output_path)
+
+    stages = [frequency_count, build_tree, generate_codes, encode_text, packing, writing, decoding, compress, decompress]
+    return [(stage.__name__, stage) for stage in stages]
+
+
+def run_corpus(name: str, size: int, repeat: int = 3, chunk_size: int = DEFAULT_CHUNK_SIZE, measure_memory: bool = True, seed: int = 0) -> dict:
+    """
+    Generate one corpus and benchmark every stage on it.
+    Args:
+        name: One of the CORPORA names.
+        size: The corpus size in bytes.
+        repeat: The number of timed runs; the fastest one is reported.
+        chunk_size: The chunk size used for counting and streaming compression.
+        measure_memory: Whether to run the stages once more under tracemalloc.
+        seed: The random seed used to generate the corpus.
+    Returns:
+        A dictionary with the corpus details, the compression ratio and per-stage results.
+    """
+    generator, binary = CORPORA[name]
+    data = generator(size, random.Random(seed))
+    megabytes = len(data) / 1_000_000
+
+    with tempfile.TemporaryDirectory() as work_directory:
+        input_path = os.path.join(work_directory, f'{name}.corpus')
+        with open(input_path, 'wb') as file:
+            file.write(data)
+
+        stages = build_stages(input_path, work_directory, binary, chunk_size)
+        initial_state = {'data': data if binary else data.decode('utf-8')}
+        best = {}
+        peaks = {}
+
+        # The streaming stages print progress messages; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                state = dict(initial_state)
+                for stage_name, stage in stages:
+                    start = time.perf_counter()
+                    stage(state)
+                    elapsed = time.perf_counter() - start
+                    best[stage_name] = min(elapsed, best.get(stage_name, elapsed))
+
+            if measure_memory:
+                state = dict(initial_state)
+                tracemalloc.start()
+                try:
+                    for stage_name, stage in stages:
+                        tracemalloc.reset_peak()
+                        baseline, _ = tracemalloc.get_traced_memory()
+                        stage(state)
+                        peaks[stage_name] = tracemalloc.get_traced_memory()[1] - baseline
+                finally:
+                    tracemalloc.stop()
+
+        if state['decoded'] != initial_state['data']:
+            raise AssertionError(f"Decoded {name} corpus does not match the input.")
+
+    return {
+        'corpus': name,
+        'binary': binary,
+        'size_bytes': len(data),
+        'compressed_bytes': state['compressed_size'],
+        'ratio': state['compressed_size'] / len(data),
+        'stages': {
+            stage_name: {
+                'seconds': best[stage_name],
+                'mb_per_s': megabytes / best[stage_name] if best[stage_name] else None,
+                'peak_memory_bytes': peaks.get(stage_name),
+            }
+            for stage_name, _ in stages
+        },
+    }
+
+
+def run_suite(corpora: List[str], size: int, repeat: int = 3, chunk_size: int = DEFAULT_CHUNK_SIZE, measure_memory: bool = True, seed: int = 0) -> dict:
+    """Benchmark several corpora and return the results with details of the environment."""
+    results = [run_corpus(name, size, repeat, chunk_size, measure_memory, seed) for name in corpora]
+    max_rss = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        max_rss *= 1 if sys.platform == 'darwin' else 1024
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'size_bytes': size,
+            'repeat': repeat,
+            'chunk_size': chunk_size,
+            'seed': seed,
+            'max_rss_bytes': max_rss,
+        },
+        'results': results,
+    }
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    """Format the results as a table, with the throughput change against a baseline when given."""
+    previous = {}
+    if baseline is not None:
+        previous = {result['corpus']: result for result in baseline['results']}
+
+    lines = []
+    for result in report['results']:
+        lines.append(f"{result['corpus']} ({result['size_bytes'] / 1_000_000:.2f} MB, ratio {result['ratio']:.3f})")
+        for stage_name, stage in result['stages'].items():
+            line = f"  {stage_name:<16}{stage['seconds']:9.4f} s"
+            line += f"{stage['mb_per_s']:10.2f} MB/s" if stage['mb_per_s'] else f"{'-':>15}"
+            if stage['peak_memory_bytes'] is not None:
+                line += f"{stage['peak_memory_bytes'] / 1_000_000:10.2f} MB peak"
+
+            old = previous.get(result['corpus'], {}).get('stages', {}).get(stage_name)
+            if old and old['seconds'] and stage['seconds']:
+                line += f"  {(old['seconds'] / stage['seconds'] - 1) * 100:+7.1f}% speed"
+            lines.append(line)
+
+    return '\n'.join(lines)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the benchmark options to a parser (shared with the `bench` command of main.py)."""
+    parser.add_argument("--corpus", choices=sorted(CORPORA), action="append", help="Corpus to benchmark (may be repeated; default: all).")
+    parser.add_argument("--size", type=float, default=4, help="Corpus size in MB (default: %(default)s).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the fastest is reported (default: %(default)s).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Chunk size used when streaming (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpora (default: %(default)s).")
+    parser.add_argument("--no-memory", action="store_false", dest="measure_memory", help="Skip the tracemalloc pass.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="A JSON file from a previous run to compare against.")
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run the suite with parsed arguments, print the report and write the JSON output."""
+    corpora = args.corpus or list(CORPORA)
+    report = run_suite(corpora, int(args.size * 1_000_000), args.repeat, args.chunk_size, args.measure_memory, args.seed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+    print(format_report(report, baseline))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of Huffman compression.")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
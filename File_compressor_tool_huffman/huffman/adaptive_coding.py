@@ -0,0 +1,168 @@
+from typing import BinaryIO, Iterator
+from huffman.bit_packing import CodePacker
+from huffman.compressor_utils import CompressorUtils
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.file_format import MAGIC, VERSION_MARKER, FORMAT_V5, FLAG_BYTES
+from huffman.table_decoder import TableDecoder
+from huffman.tree import HuffmanTree
+
+# Maximum number of input bytes encoded per frame
+DEFAULT_FRAME_SIZE = 1 << 16
+# Bytes seen between the first two table rebuilds; the gap doubles up to the maximum
+MIN_REBUILD_INTERVAL = 1 << 12
+MAX_REBUILD_INTERVAL = 1 << 20
+# Counts are halved when their total exceeds this, so the model keeps following the stream
+MAX_TOTAL_COUNT = 1 << 24
+
+
+class AdaptiveModel:
+    """
+    Byte frequencies learned from the stream so far and the Huffman codes built from them.
+
+    Every byte value starts with a count of one, so any byte can be encoded before it has been
+    seen. The encoder and the decoder update identical models with the same frames and rebuild
+    their codes at the same points, so the codes never need to be transmitted.
+
+    Attributes:
+        counts (List[int]): The count of each byte value.
+        tree (HuffmanTree): The canonical Huffman tree built from the counts.
+    """
+    def __init__(self) -> None:
+        """Initialize the model with uniform counts."""
+        self.counts = [1] * 256
+        self._pending = 0
+        self._interval = MIN_REBUILD_INTERVAL
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Build the Huffman tree from the current counts."""
+        self.tree = HuffmanTree(dict(enumerate(self.counts)))
+        self.tree.build_tree()
+        self.tree.generate_codes()
+        self.tree.make_canonical()
+        self._packer = None
+        self._decoder = None
+
+    @property
+    def packer(self) -> CodePacker:
+        """The packer for the current codes, built on first use."""
+        if self._packer is None:
+            self._packer = CodePacker(self.tree.get_codes(), binary=True)
+        return self._packer
+
+    @property
+    def decoder(self) -> TableDecoder:
+        """The table decoder for the current codes, built on first use."""
+        if self._decoder is None:
+            self._decoder = TableDecoder(self.tree, binary=True)
+        return self._decoder
+
+    def update(self, frame: bytes) -> None:
+        """
+        Add the bytes of a frame to the counts, rebuilding the codes once enough bytes have been seen.
+        Args:
+            frame: The raw bytes just encoded or decoded.
+        """
+        self.counts = [total + count for total, count in zip(self.counts, CompressorUtils.count_bytes(frame))]
+        self._pending += len(frame)
+        if self._pending < self._interval:
+            return
+
+        if sum(self.counts) > MAX_TOTAL_COUNT:
+            self.counts = [max(count // 2, 1) for count in self.counts]
+        self._pending = 0
+        self._interval = min(self._interval * 2, MAX_REBUILD_INTERVAL)
+        self._rebuild()
+
+
+class AdaptiveHuffmanCoding:
+    """
+    One-pass Huffman compression of byte streams such as pipes and stdin.
+
+    Input is encoded in frames as it arrives, using codes rebuilt periodically from the bytes seen
+    so far, and each frame is flushed as soon as it is written. Decompression mirrors the model
+    and writes each frame's bytes as soon as they are decoded.
+    Attributes:
+        frame_size (int): The maximum number of input bytes encoded per frame.
+    """
+    def __init__(self, frame_size: int = DEFAULT_FRAME_SIZE) -> None:
+        """
+        Initialize the AdaptiveHuffmanCoding object.
+        Args:
+            frame_size (int): The maximum number of input bytes encoded per frame.
+        """
+        self.frame_size = frame_size
+
+    def iter_frames(self, input_stream: BinaryIO) -> Iterator[bytes]:
+        """Read the input as it becomes available, at most `frame_size` bytes at a time."""
+        read = getattr(input_stream, 'read1', input_stream.read)
+        while True:
+            frame = read(self.frame_size)
+            if not frame:
+                break
+            yield frame
+
+    def compress_stream(self, input_stream: BinaryIO, output_stream: BinaryIO) -> None:
+        """
+        Compress a binary stream until it ends.
+        Args:
+            input_stream: The binary stream to read, e.g. sys.stdin.buffer.
+            output_stream: The binary stream the compressed frames are written to.
+        """
+        output_stream.write(MAGIC)
+        output_stream.write(bytes([VERSION_MARKER, FORMAT_V5]))
+        output_stream.write((1).to_bytes(4, byteorder='big'))
+        output_stream.write(bytes([FLAG_BYTES]))
+        output_stream.flush()
+
+        model = AdaptiveModel()
+        for frame in self.iter_frames(input_stream):
+            data, bit_count = model.packer.encode(frame)
+            output_stream.write(bit_count.to_bytes(4, byteorder='big'))
+            output_stream.write(data)
+            output_stream.flush()
+            model.update(frame)
+
+        output_stream.write((0).to_bytes(4, byteorder='big'))
+        output_stream.flush()
+
+    def iter_decompress(self, input_stream: BinaryIO) -> Iterator[bytes]:
+        """
+        Decode an adaptive stream frame by frame.
+        Args:
+            input_stream: The binary stream to read, positioned at the start of the compressed data.
+        Returns:
+            An iterator over the decoded bytes of each frame.
+        """
+        version, serialized_header = DecompressorUtils.read_raw_header(input_stream)
+        if version != FORMAT_V5:
+            raise ValueError(f"Only adaptive streams can be read in one pass (format version {version}).")
+        if serialized_header != bytes([FLAG_BYTES]):
+            raise ValueError("Unsupported adaptive stream header.")
+
+        model = AdaptiveModel()
+        while True:
+            length_bytes = input_stream.read(4)
+            if len(length_bytes) < 4:
+                raise ValueError("Compressed stream ended before its end marker.")
+            bit_count = int.from_bytes(length_bytes, 'big')
+            if not bit_count:
+                return
+
+            data = input_stream.read((bit_count + 7) // 8)
+            if len(data) * 8 < bit_count:
+                raise ValueError("Compressed stream ended in the middle of a frame.")
+            frame = model.decoder.decode_bits(data, bit_count)
+            yield frame
+            model.update(frame)
+
+    def decompress_stream(self, input_stream: BinaryIO, output_stream: BinaryIO) -> None:
+        """
+        Decompress an adaptive stream, writing each frame as soon as it is decoded.
+        Args:
+            input_stream: The binary stream to read, e.g. sys.stdin.buffer.
+            output_stream: The binary stream the decoded bytes are written to.
+        """
+        for frame in self.iter_decompress(input_stream):
+            output_stream.write(frame)
+            output_stream.flush()
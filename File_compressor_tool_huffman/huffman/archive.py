@@ -0,0 +1,200 @@
+import os
+import sys
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from huffman.bit_packing import CodePacker
+from huffman.bit_writer import BitWriter
+from huffman.compressor_utils import CompressorUtils, DEFAULT_CHUNK_SIZE
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.dictionary import HuffmanDictionary
+from huffman.file_format import FORMAT_V4, append_varint, read_varint
+from huffman.table_decoder import TableDecoder
+from huffman.tree import HuffmanTree
+
+# (compressed offset, compressed size, bit count)
+ArchiveMember = Tuple[int, int, int]
+
+
+class HuffmanArchive:
+    """
+    Compresses many files into one archive that shares a single byte-mode code table.
+
+    The table is written once in the header and each member is encoded as its own byte-aligned
+    stream. Index entries are varints with front-coded names, so a small file costs a few bytes
+    on top of its encoded data. The table is either built from the counts of all members or taken
+    from a trained dictionary, in which case no tree is built at all.
+    Attributes:
+        archive_path (str): The path to the archive file.
+        chunk_size (int): The number of bytes read and processed at a time.
+    """
+    def __init__(self, archive_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        Initialize the HuffmanArchive.
+        Args:
+            archive_path (str): The path to the archive file.
+            chunk_size (int): The number of bytes read and processed at a time.
+        """
+        self.archive_path = archive_path
+        self.chunk_size = chunk_size
+
+    def create(self, members: List[Tuple[str, str]], dictionary: Optional[HuffmanDictionary] = None) -> None:
+        """
+        Write the archive.
+        Args:
+            members: (name, path) pairs of the files to store.
+            dictionary: A trained dictionary to encode with; by default a table is built from the members.
+        """
+        if not members:
+            print("Error: No files to archive.")
+            sys.exit(1)
+
+        if dictionary is not None:
+            tree = dictionary.build_tree()
+        else:
+            histogram = [0] * 256
+            for _, path in members:
+                counts = CompressorUtils.calculate_byte_histogram(path, self.chunk_size)
+                histogram = [total + count for total, count in zip(histogram, counts)]
+
+            frequency_table = {byte: count for byte, count in enumerate(histogram) if count}
+            if not frequency_table:
+                print("Error: All files to archive are empty.")
+                sys.exit(1)
+
+            tree = HuffmanTree(frequency_table)
+            tree.build_tree()
+            tree.generate_codes()
+            tree.make_canonical()
+
+        packer = CodePacker(tree.get_codes(), binary=True)
+        with open(self.archive_path, 'wb') as file:
+            CompressorUtils.write_code_lengths_header(file, tree.get_code_lengths(), binary=True, version=FORMAT_V4)
+
+            index = []
+            for name, path in members:
+                writer = BitWriter(file)
+                for chunk in CompressorUtils.iter_file_bytes(path, self.chunk_size):
+                    writer.write_packed(*packer.encode(chunk))
+                writer.flush()
+                index.append((name, writer.bits_written))
+
+            HuffmanArchive.write_member_index(file, index)
+
+    def read_index(self) -> Dict[str, ArchiveMember]:
+        """Return the index entry of each member, in archive order."""
+        with open(self.archive_path, 'rb') as file:
+            self._read_header(file)
+            return dict(HuffmanArchive.read_member_index(file))
+
+    def iter_member(self, name: str) -> Iterator[bytes]:
+        """
+        Decode one member without decoding the others.
+        Args:
+            name: The member name, as listed in the index.
+        Returns:
+            An iterator over the decoded bytes of the member, in chunks.
+        """
+        with open(self.archive_path, 'rb') as file:
+            decoder = self._read_header(file)
+            index = dict(HuffmanArchive.read_member_index(file))
+            if name not in index:
+                raise ValueError(f"'{name}' is not a member of the archive.")
+
+            yield from self._iter_decode(file, decoder, index[name])
+
+    def extract(self, output_directory: str, names: Optional[List[str]] = None) -> None:
+        """
+        Decode members into a directory, recreating their relative paths.
+        Args:
+            output_directory: The directory to write the members to.
+            names: The members to extract (all of them by default).
+        """
+        with open(self.archive_path, 'rb') as file:
+            decoder = self._read_header(file)
+            index = HuffmanArchive.read_member_index(file)
+            if names is not None:
+                missing = set(names) - {name for name, _ in index}
+                if missing:
+                    raise ValueError(f"Not members of the archive: {', '.join(sorted(missing))}.")
+                index = [(name, member) for name, member in index if name in names]
+
+            for name, member in index:
+                output_path = HuffmanArchive._member_output_path(output_directory, name)
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                DecompressorUtils.write_chunks_to_file(self._iter_decode(file, decoder, member), output_path, binary=True)
+
+    def _read_header(self, file: BinaryIO) -> TableDecoder:
+        """Check the archive header and build the shared decoder."""
+        version, serialized_header = DecompressorUtils.read_raw_header(file)
+        if version != FORMAT_V4:
+            raise ValueError(f"File is not an archive (format version {version}).")
+        return TableDecoder(DecompressorUtils.build_tree_from_header(version, serialized_header), binary=True)
+
+    def _iter_decode(self, file: BinaryIO, decoder: TableDecoder, member: ArchiveMember) -> Iterator[bytes]:
+        """Decode the stream of one member, one chunk at a time."""
+        offset, size, bit_count = member
+        file.seek(offset)
+        chunks = DecompressorUtils.iter_payload_chunks(file, offset + size, self.chunk_size)
+        return decoder.iter_decode(chunks, bit_count)
+
+    @staticmethod
+    def _member_output_path(output_directory: str, name: str) -> str:
+        """Join a member name to the output directory, refusing names that would escape it."""
+        root = os.path.abspath(output_directory)
+        output_path = os.path.abspath(os.path.join(root, *name.split('/')))
+        if os.path.commonpath([root, output_path]) != root or output_path == root:
+            raise ValueError(f"Unsafe member name '{name}'.")
+        return output_path
+
+    @staticmethod
+    def write_member_index(file: BinaryIO, index: List[Tuple[str, int]]) -> None:
+        """
+        Write the member index and the trailing index offset.
+        Args:
+            file: The binary output file object, positioned after the last member.
+            index: (name, bit_count) pairs, one per member, in the order the members were written.
+        """
+        index_offset = file.tell()
+        serialized = bytearray(len(index).to_bytes(4, byteorder='big'))
+        previous_name = b''
+        for name, bit_count in index:
+            encoded_name = name.encode('utf-8')
+            shared = len(os.path.commonprefix([previous_name, encoded_name]))
+            append_varint(serialized, shared)
+            append_varint(serialized, len(encoded_name) - shared)
+            serialized += encoded_name[shared:]
+            append_varint(serialized, bit_count)
+            previous_name = encoded_name
+
+        file.write(serialized)
+        file.write(index_offset.to_bytes(8, byteorder='big'))
+
+    @staticmethod
+    def read_member_index(file: BinaryIO) -> List[Tuple[str, ArchiveMember]]:
+        """
+        Read the member index using the index offset stored at the end of the file.
+        Args:
+            file: The binary input file object, positioned at the first member.
+        Returns:
+            (name, (offset, size, bit_count)) pairs, one per member.
+        """
+        offset = file.tell()
+        file.seek(-8, os.SEEK_END)
+        index_offset = int.from_bytes(file.read(8), 'big')
+        file.seek(index_offset)
+        serialized = file.read(os.fstat(file.fileno()).st_size - 8 - index_offset)
+        member_count = int.from_bytes(serialized[:4], 'big')
+
+        index = []
+        position = 4
+        previous_name = b''
+        for _ in range(member_count):
+            shared, position = read_varint(serialized, position)
+            rest, position = read_varint(serialized, position)
+            encoded_name = previous_name[:shared] + serialized[position:position + rest]
+            bit_count, position = read_varint(serialized, position + rest)
+
+            size = (bit_count + 7) // 8
+            index.append((encoded_name.decode('utf-8'), (offset, size, bit_count)))
+            offset += size
+            previous_name = encoded_name
+        return index
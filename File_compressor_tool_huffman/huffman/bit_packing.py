@@ -0,0 +1,123 @@
+from typing import Dict, Tuple, Union
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional and only speeds up CodePacker
+    numpy = None
+
+# Longest code the NumPy path can hold in one unsigned 64-bit value
+MAX_VECTOR_CODE_LENGTH = 64
+
+
+def pack_bits(bits: str) -> bytes:
+    """
+    Pack a string of '0'/'1' characters into bytes, most significant bit first.
+
+    The whole string is converted with a single `int(..., 2)` call, and the last byte is
+    padded with zeros.
+
+    Args:
+        bits: The bits to pack.
+
+    Returns:
+        The packed bytes.
+    """
+    padding = -len(bits) % 8
+    if not bits:
+        return b''
+    return (int(bits, 2) << padding).to_bytes((len(bits) + padding) // 8, byteorder='big')
+
+
+def unpack_bits(data: bytes) -> str:
+    """
+    Unpack bytes into a string of '0'/'1' characters, most significant bit first.
+
+    Args:
+        data: The bytes to unpack.
+
+    Returns:
+        A string with 8 characters per byte.
+    """
+    if not data:
+        return ''
+    return format(int.from_bytes(data, byteorder='big'), f'0{len(data) * 8}b')
+
+
+class CodePacker:
+    """
+    Encodes chunks of text (or bytes) straight into packed bytes.
+
+    With NumPy, each code is kept as an integer, left-aligned in 64 bits, with its bit length.
+    The bit offset of every code in a chunk is the cumulative sum of the lengths before it; each
+    code is shifted into the one or two 64-bit words its offset falls in, and since codes never
+    overlap, summing the pieces that land in a word (`numpy.add.reduceat`) packs it. No
+    Python-level loop runs per symbol.
+
+    Without NumPy (or with codes longer than 64 bits), the codes are joined as '0'/'1' strings
+    through a lookup table and converted with a single `int(..., 2)` call. Both of those loops run
+    in C, which is faster than shifting each code into an integer accumulator in Python.
+
+    Attributes:
+        binary (bool): Whether the chunks are raw bytes rather than text.
+    """
+    def __init__(self, codes: Dict[Union[str, int], str], binary: bool = False) -> None:
+        """
+        Initialize the CodePacker.
+        Args:
+            codes: The Huffman code of each character (or byte value).
+            binary: Whether the chunks are raw bytes rather than text.
+        """
+        self.binary = binary
+        if binary:
+            self._lookup = [codes.get(byte, '') for byte in range(256)].__getitem__
+        else:
+            self._lookup = codes.__getitem__
+
+        self._vectorized = numpy is not None and max(map(len, codes.values()), default=0) <= MAX_VECTOR_CODE_LENGTH
+        if self._vectorized:
+            symbols = list(range(256)) if binary else [ord(char) for char in codes]
+            bit_codes = [codes.get(byte, '') for byte in symbols] if binary else list(codes.values())
+            self._aligned = numpy.array([int(code or '0', 2) << (64 - len(code)) for code in bit_codes], dtype=numpy.uint64)
+            self._lengths = numpy.array([len(code) for code in bit_codes], dtype=numpy.int64)
+            if not binary:
+                # Index of each character's code by code point; absent characters map past the end
+                self._indices = numpy.full(max(symbols, default=0) + 2, len(symbols), dtype=numpy.int32)
+                self._indices[symbols] = numpy.arange(len(symbols))
+
+    def encode(self, chunk: Union[str, bytes]) -> Tuple[bytes, int]:
+        """
+        Encode a chunk.
+        Args:
+            chunk: The text (or raw bytes) to encode.
+        Returns:
+            A tuple (packed_bytes, bit_count); the last byte is padded with zeros.
+        """
+        if not self._vectorized or not chunk:
+            bits = ''.join(map(self._lookup, chunk))
+            return pack_bits(bits), len(bits)
+
+        if self.binary:
+            indices = numpy.frombuffer(chunk, dtype=numpy.uint8)
+        else:
+            code_points = numpy.frombuffer(chunk.encode('utf-32-le', 'surrogatepass'), dtype=numpy.uint32)
+            indices = self._indices.take(code_points, mode='clip')
+            unknown = numpy.flatnonzero(indices == len(self._lengths))
+            if len(unknown):
+                raise KeyError(chunk[unknown[0]])
+
+        lengths = self._lengths[indices]
+        aligned = self._aligned[indices]
+        ends = numpy.cumsum(lengths)
+        bit_count = int(ends[-1])
+        starts = ends - lengths
+        words = starts >> 6
+        offsets = (starts & 63).astype(numpy.uint64)
+        high = aligned >> offsets
+        # Shifting a uint64 by 64 is undefined, so the spill into the next word takes two shifts
+        low = (aligned << (numpy.uint64(63) - offsets)) << numpy.uint64(1)
+
+        firsts = numpy.flatnonzero(numpy.concatenate(([True], words[1:] != words[:-1])))
+        packed = numpy.zeros(bit_count // 64 + 2, dtype=numpy.uint64)
+        packed[words[firsts]] = numpy.add.reduceat(high, firsts)
+        packed[words[firsts] + 1] |= numpy.add.reduceat(low, firsts)
+        return packed.astype('>u8').tobytes()[:(bit_count + 7) // 8], bit_count
@@ -0,0 +1,72 @@
+from typing import BinaryIO
+from huffman.bit_packing import pack_bits
+
+
+class BitWriter:
+    """
+    Collects a stream of bits and writes them to a file as whole bytes fill up.
+
+    Only the bits that do not yet form a whole byte are kept between writes, so memory use
+    depends on the size of each write rather than on the size of the whole stream.
+
+    Attributes:
+        file (BinaryIO): The binary file the packed bytes are written to.
+        bits_written (int): The number of bits passed to the writer so far.
+    """
+    def __init__(self, file: BinaryIO) -> None:
+        """
+        Initialize the BitWriter.
+        Args:
+            file (BinaryIO): The binary file the packed bytes are written to.
+        """
+        self.file = file
+        self.bits_written = 0
+        self._pending = 0
+        self._pending_bits = 0
+
+    def write(self, bits: str) -> None:
+        """
+        Append bits to the stream and write every complete byte.
+        Args:
+            bits: A string of '0' and '1' characters.
+        """
+        self.write_packed(pack_bits(bits), len(bits))
+
+    def write_packed(self, data: bytes, bit_count: int) -> None:
+        """
+        Append already packed bits to the stream and write every complete byte.
+        Args:
+            data: The packed bits, most significant bit first.
+            bit_count: The number of valid bits at the start of `data`.
+        """
+        if not bit_count:
+            return
+        self.bits_written += bit_count
+
+        if not self._pending_bits and bit_count % 8 == 0:
+            self.file.write(data)
+            return
+
+        # Merge the pending bits with the new ones in one large integer
+        value = int.from_bytes(data, byteorder='big') >> (len(data) * 8 - bit_count)
+        value |= self._pending << bit_count
+        total_bits = self._pending_bits + bit_count
+        self._pending_bits = total_bits % 8
+
+        whole_bytes = total_bits // 8
+        if whole_bytes:
+            self.file.write((value >> self._pending_bits).to_bytes(whole_bytes, byteorder='big'))
+        self._pending = value & ((1 << self._pending_bits) - 1)
+
+    def flush(self) -> int:
+        """
+        Write the remaining bits, padded with zeros to a whole byte.
+        Returns:
+            The number of padding bits added.
+        """
+        padding = -self._pending_bits % 8
+        if self._pending_bits:
+            self.file.write((self._pending << padding).to_bytes(1, byteorder='big'))
+        self._pending = 0
+        self._pending_bits = 0
+        return padding
@@ -2,7 +2,20 @@ import sys
 import os
 from collections import Counter
 from huffman.tree import HuffmanTree
-from typing import Dict
+from huffman.file_format import MAGIC, VERSION_MARKER, FORMAT_V2, FLAG_BYTES, FLAG_SYNC_INDEX, SYNC_POINT
+from huffman.bit_writer import BitWriter
+from huffman.bit_packing import CodePacker, pack_bits
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional and only speeds up byte counting and bit packing
+    numpy = None
+
+# Number of characters (or bytes) read and encoded at a time
+DEFAULT_CHUNK_SIZE = 1 << 18
+# Maximum number of decoded bytes between two sync points
+DEFAULT_SYNC_INTERVAL = 1 << 16
 
 class CompressorUtils:
     @staticmethod
@@ -24,19 +37,76 @@ class CompressorUtils:
             sys.exit(1)
 
     @staticmethod
-    def calculate_character_frequency(file_path : str) -> Counter:
-        """Calculate the frequency of each character in the file."""
+    def iter_file_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        """Read the content of the file in chunks of at most `chunk_size` characters."""
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
-                data = file.read()
-                if not data.strip():
-                    print(f"Error: File '{file_path}' is empty.")
-                    sys.exit(1)
-                return Counter(data)
+                while True:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
         except Exception as e:
             print(f"Error reading file '{file_path}': {e}")
             sys.exit(1)
 
+    @staticmethod
+    def calculate_character_frequency(file_path : str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Counter:
+        """Calculate the frequency of each character in the file, one chunk at a time."""
+        frequency_table = Counter()
+        for chunk in CompressorUtils.iter_file_chunks(file_path, chunk_size):
+            frequency_table.update(chunk)
+
+        if all(char.isspace() for char in frequency_table):
+            print(f"Error: File '{file_path}' is empty.")
+            sys.exit(1)
+        return frequency_table
+
+    @staticmethod
+    def iter_file_bytes(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Read the raw bytes of the file in chunks of at most `chunk_size` bytes."""
+        try:
+            with open(file_path, 'rb') as file:
+                while True:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        except Exception as e:
+            print(f"Error reading file '{file_path}': {e}")
+            sys.exit(1)
+
+    @staticmethod
+    def calculate_byte_histogram(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+        """Count each of the 256 byte values in the file, one chunk at a time."""
+        histogram = [0] * 256
+        for chunk in CompressorUtils.iter_file_bytes(file_path, chunk_size):
+            counts = CompressorUtils.count_bytes(chunk)
+            histogram = [total + count for total, count in zip(histogram, counts)]
+
+        return histogram
+
+    @staticmethod
+    def count_bytes(chunk: bytes) -> List[int]:
+        """Count each of the 256 byte values in a chunk."""
+        if numpy is not None:
+            return numpy.bincount(numpy.frombuffer(chunk, dtype=numpy.uint8), minlength=256).tolist()
+
+        counts = [0] * 256
+        for byte, count in Counter(chunk).items():
+            counts[byte] = count
+        return counts
+
+    @staticmethod
+    def calculate_byte_frequency(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[int, int]:
+        """Calculate the frequency of each byte value in the file, one chunk at a time."""
+        histogram = CompressorUtils.calculate_byte_histogram(file_path, chunk_size)
+        frequency_table = {byte: count for byte, count in enumerate(histogram) if count}
+        if not frequency_table:
+            print(f"Error: File '{file_path}' is empty.")
+            sys.exit(1)
+        return frequency_table
+
     @staticmethod
     def log_frequency_table(frequency_table : Counter):
         """Log the frequency table in a readable format."""
@@ -48,8 +118,8 @@ class CompressorUtils:
     @staticmethod
     def encode_text(data: str, codes: dict) -> str:
         """Encode the text using the Huffman codes."""
-        return ''.join(codes[char] for char in data)
-    
+        return ''.join(map(codes.__getitem__, data))
+
     @staticmethod
     def get_byte_arary(encoded_text: str) -> bytes:
         """Convert the encoded text to a byte array."""
@@ -57,8 +127,8 @@ class CompressorUtils:
         padding = 8 - len(encoded_text) % 8
         encoded_text += '0' * padding
 
-        # Convert the encoded text to bytes
-        byte_array = bytes([int(encoded_text[i:i + 8], 2) for i in range(0, len(encoded_text), 8)])
+        # Convert the encoded text to bytes in a single integer conversion
+        byte_array = pack_bits(encoded_text)
 
         return bytes([padding]) + byte_array
 
@@ -82,3 +152,93 @@ class CompressorUtils:
             file.write(serialized_frequency_table)
             file.write(CompressorUtils.get_byte_arary(compressed_data))
 
+    @staticmethod
+    def write_code_lengths_header(file: BinaryIO, code_lengths: Dict[Union[str, int], int], binary: bool = False, version: int = FORMAT_V2, sync_index: bool = False) -> None:
+        """
+        Write a version 2 (or block container) header with the canonical code lengths.
+        Args:
+            file: The binary output file object.
+            code_lengths: The code length of each character (or byte value), used to rebuild canonical codes.
+            binary: Whether the symbols are byte values rather than characters.
+            version: The format version to record in the file.
+            sync_index: Whether the payload will be followed by a sync point index.
+        """
+        flags = (FLAG_SYNC_INDEX if sync_index else 0) | (FLAG_BYTES if binary else 0)
+        header = bytes([flags]) + HuffmanTree.serialize_code_lengths(code_lengths, binary)
+
+        file.write(MAGIC)
+        file.write(bytes([VERSION_MARKER, version]))
+        file.write(len(header).to_bytes(4, byteorder='big'))
+        file.write(header)
+
+    @staticmethod
+    def write_code_lengths_header_with_compressed_data(output_file: str, code_lengths: Dict[str, int], compressed_data: str) -> None:
+        """
+        Write a version 2 header with the canonical code lengths, followed by the compressed data.
+        Args:
+            output_file: The output file path.
+            code_lengths: The code length of each character, used to rebuild canonical codes.
+            compressed_data: The compressed data to write.
+        """
+        with open(output_file, 'wb') as file:
+            CompressorUtils.write_code_lengths_header(file, code_lengths)
+            file.write(CompressorUtils.get_byte_arary(compressed_data))
+
+    @staticmethod
+    def write_compressed_chunks(file: BinaryIO, chunks: Iterable[Union[str, bytes]], codes: Dict[Union[str, int], str], binary: bool = False, sync_interval: int = 0) -> None:
+        """
+        Encode chunks of text (or bytes) and write the packed bits as each chunk is encoded.
+
+        The payload starts with the number of padding bits, which is only known once the
+        last chunk is written, so a placeholder byte is written first and patched at the end.
+
+        Args:
+            file: The binary output file object, positioned after the header.
+            chunks: The text (or raw bytes) to encode, in chunks.
+            codes: The Huffman code of each character (or byte value).
+            binary: Whether the chunks are raw bytes.
+            sync_interval: When positive, record a sync point at least every `sync_interval`
+                symbols and write the sync point index after the payload.
+        """
+        padding_position = file.tell()
+        file.write(b'\0')
+
+        writer = BitWriter(file)
+        packer = CodePacker(codes, binary)
+        sync_points = []
+        decoded_size = 0
+        for chunk in chunks:
+            if sync_interval <= 0:
+                writer.write_packed(*packer.encode(chunk))
+                continue
+
+            for start in range(0, len(chunk), sync_interval):
+                piece = chunk[start:start + sync_interval]
+                sync_points.append((writer.bits_written, decoded_size))
+                writer.write_packed(*packer.encode(piece))
+                # str.isascii() only checks a flag, so ASCII text is never encoded a second time
+                decoded_size += len(piece) if binary or piece.isascii() else len(piece.encode('utf-8'))
+        padding = writer.flush()
+
+        file.seek(padding_position)
+        file.write(bytes([padding]))
+        file.seek(0, os.SEEK_END)
+
+        if sync_interval > 0:
+            CompressorUtils.write_sync_index(file, sync_points, decoded_size)
+
+    @staticmethod
+    def write_sync_index(file: BinaryIO, sync_points: List[Tuple[int, int]], decoded_size: int) -> None:
+        """
+        Write the sync point index and the trailing index offset.
+        Args:
+            file: The binary output file object, positioned after the payload.
+            sync_points: (bit offset in the payload, byte offset in the decoded output) pairs.
+            decoded_size: The total number of decoded bytes.
+        """
+        index_offset = file.tell()
+        file.write(len(sync_points).to_bytes(4, byteorder='big'))
+        for sync_point in sync_points:
+            file.write(SYNC_POINT.pack(*sync_point))
+        file.write(decoded_size.to_bytes(8, byteorder='big'))
+        file.write(index_offset.to_bytes(8, byteorder='big'))
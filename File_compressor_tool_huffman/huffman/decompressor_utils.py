@@ -1,42 +1,190 @@
+import os
 from huffman.tree import HuffmanTree
-from typing import Dict
+from huffman.bit_packing import unpack_bits
+from huffman.file_format import MAGIC, VERSION_MARKER, FORMAT_V1, FORMAT_V2, FORMAT_V3, FORMAT_V4, FLAG_BYTES, FLAG_SYNC_INDEX, SYNC_POINT
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
 
 class DecompressorUtils:
     @staticmethod
-    def read_header_and_data(input_file: str) -> str:
+    def read_header_and_data(input_file: str) -> Tuple[HuffmanTree, bytes]:
         """
         Read and parse the header and compressed data from the input file.
 
+        The header is parsed according to the format version of the file, and the
+        Huffman tree needed to decode the data is rebuilt from it.
+
         Args:
             input_file: Path to the input compressed file.
 
         Returns:
-            A tuple (frequency_table, compressed_data).
+            A tuple (tree, compressed_data).
         """
         with open(input_file, 'rb') as file:
-            # Validate magic number
-            magic = file.read(6)
-            if magic != b'HUFCMP':
-                raise ValueError("Invalid file format.")
-            
-            # Read header length
-            header_length = int.from_bytes(file.read(4), 'big')
-            
-            # Read serialized header
-            serialized_header = file.read(header_length)
-            frequency_table = HuffmanTree.deserialize_frequency_table(serialized_header)
-            
+            version, serialized_header = DecompressorUtils.read_raw_header(file)
+            tree = DecompressorUtils.build_tree_from_header(version, serialized_header)
+            payload_end = DecompressorUtils.get_payload_end(file, version, serialized_header)
+
             # Read compressed data
-            compressed_data = file.read()
-        
-        return frequency_table, compressed_data
+            compressed_data = file.read(payload_end - file.tell())
+
+        return tree, compressed_data
+
+    @staticmethod
+    def read_header(file: BinaryIO) -> HuffmanTree:
+        """
+        Read and parse the header, leaving the file positioned at the compressed data.
+
+        Args:
+            file: The binary input file object, positioned at the start of the file.
+
+        Returns:
+            The Huffman tree needed to decode the data.
+        """
+        return DecompressorUtils.build_tree_from_header(*DecompressorUtils.read_raw_header(file))
+
+    @staticmethod
+    def read_format_version(input_file: str) -> int:
+        """
+        Read the format version of a compressed file.
+
+        Args:
+            input_file: Path to the input compressed file.
+
+        Returns:
+            The format version.
+        """
+        with open(input_file, 'rb') as file:
+            version, _ = DecompressorUtils.read_raw_header(file)
+        return version
+
+    @staticmethod
+    def read_raw_header(file: BinaryIO) -> Tuple[int, bytes]:
+        """
+        Read the format version and serialized header, leaving the file positioned at the compressed data.
+
+        Args:
+            file: The binary input file object, positioned at the start of the file.
+
+        Returns:
+            A tuple (version, serialized_header).
+        """
+        # Validate magic number
+        magic = file.read(6)
+        if magic != MAGIC:
+            raise ValueError("Invalid file format.")
+
+        # Version 1 files have no version marker
+        version = FORMAT_V1
+        length_bytes = file.read(4)
+        if length_bytes[:1] == bytes([VERSION_MARKER]):
+            version = length_bytes[1]
+            length_bytes = length_bytes[2:] + file.read(2)
+
+        # Read header length
+        header_length = int.from_bytes(length_bytes, 'big')
+
+        # Read serialized header
+        serialized_header = file.read(header_length)
+        return version, serialized_header
+
+    @staticmethod
+    def is_binary_header(version: int, serialized_header: bytes) -> bool:
+        """
+        Check whether a header describes byte values rather than characters.
+
+        Args:
+            version: The format version of the file.
+            serialized_header: The header bytes following the header length.
+
+        Returns:
+            True if the flags byte has FLAG_BYTES set; version 1 files always hold text.
+        """
+        return version != FORMAT_V1 and bool(serialized_header[0] & FLAG_BYTES)
+
+    @staticmethod
+    def build_tree_from_header(version: int, serialized_header: bytes) -> HuffmanTree:
+        """
+        Rebuild the Huffman tree described by a serialized header.
+
+        Args:
+            version: The format version of the file.
+            serialized_header: The header bytes following the header length.
+
+        Returns:
+            A HuffmanTree with its codes generated.
+        """
+        if version == FORMAT_V1:
+            frequency_table = HuffmanTree.deserialize_frequency_table(serialized_header)
+            tree = HuffmanTree(frequency_table)
+            tree.build_tree()
+            tree.generate_codes()
+            return tree
+
+        if version in (FORMAT_V2, FORMAT_V3, FORMAT_V4):
+            flags = serialized_header[0]
+            if flags & ~(FLAG_BYTES | FLAG_SYNC_INDEX):
+                raise ValueError(f"Unsupported header flags: {flags:#x}.")
+            return HuffmanTree.from_code_lengths(HuffmanTree.deserialize_code_lengths(serialized_header[1:], DecompressorUtils.is_binary_header(version, serialized_header)))
+
+        raise ValueError(f"Unsupported format version: {version}.")
+
+    @staticmethod
+    def get_payload_end(file: BinaryIO, version: int, serialized_header: bytes) -> int:
+        """
+        Find where the compressed data of a single-stream file ends.
+
+        Args:
+            file: The binary input file object; its position is left unchanged.
+            version: The format version of the file.
+            serialized_header: The header bytes following the header length.
+
+        Returns:
+            The offset of the sync point index if the file has one, otherwise the file size.
+        """
+        if version == FORMAT_V2 and serialized_header[0] & FLAG_SYNC_INDEX:
+            position = file.tell()
+            file.seek(-8, os.SEEK_END)
+            payload_end = int.from_bytes(file.read(8), 'big')
+            file.seek(position)
+            return payload_end
+
+        return os.fstat(file.fileno()).st_size
+
+    @staticmethod
+    def read_sync_index(file: BinaryIO) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Read the sync point index using the index offset stored at the end of the file.
+
+        Args:
+            file: The binary input file object.
+
+        Returns:
+            A tuple (sync_points, decoded_size), where each sync point is a
+            (bit offset in the payload, byte offset in the decoded output) pair.
+        """
+        file.seek(-8, os.SEEK_END)
+        file.seek(int.from_bytes(file.read(8), 'big'))
+        count = int.from_bytes(file.read(4), 'big')
+        sync_points = list(SYNC_POINT.iter_unpack(file.read(count * SYNC_POINT.size)))
+        decoded_size = int.from_bytes(file.read(8), 'big')
+
+        return sync_points, decoded_size
+
+    @staticmethod
+    def iter_payload_chunks(file: BinaryIO, payload_end: int, chunk_size: int) -> Iterator[bytes]:
+        """Read the compressed data up to `payload_end` in chunks of at most `chunk_size` bytes."""
+        while file.tell() < payload_end:
+            chunk = file.read(min(chunk_size, payload_end - file.tell()))
+            if not chunk:
+                break
+            yield chunk
 
     @staticmethod
     def get_binary_string(byte_array: bytes) -> str:
         """Convert a byte array back into a binary string."""
         padding = byte_array[0]
-        # Convert each byte in the byte array to its binary representation
-        binary_string = ''.join(format(byte, '08b') for byte in byte_array[1:])
+        # Convert the byte array to its binary representation in a single integer conversion
+        binary_string = unpack_bits(byte_array[1:])
 
         if padding > 0:
             binary_string = binary_string[:-padding]
@@ -64,4 +212,25 @@ class DecompressorUtils:
         with open(output_file, 'w', encoding='utf-8') as file:
             file.write(decoded_text)
 
+    @staticmethod
+    def write_chunks_to_file(decoded_chunks: Iterable[Union[str, bytes]], output_file: Union[str, BinaryIO], binary: bool = False) -> None:
+        """
+        Write decoded text (or raw bytes) to a file as each chunk is decoded.
+
+        `output_file` may also be an open binary stream such as sys.stdout.buffer; text is written
+        to it as UTF-8, it is flushed after each chunk and it is left open.
+        """
+        if not isinstance(output_file, str):
+            for chunk in decoded_chunks:
+                output_file.write(chunk if binary else chunk.encode('utf-8'))
+                output_file.flush()
+            return
+
+        if binary:
+            file = open(output_file, 'wb')
+        else:
+            file = open(output_file, 'w', encoding='utf-8')
 
+        with file:
+            for chunk in decoded_chunks:
+                file.write(chunk)
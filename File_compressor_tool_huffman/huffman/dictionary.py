@@ -0,0 +1,84 @@
+import glob
+import os
+from typing import Dict, Iterable, List, Tuple
+from huffman.compressor_utils import CompressorUtils, DEFAULT_CHUNK_SIZE
+from huffman.file_format import DICTIONARY_MAGIC
+from huffman.tree import HuffmanTree
+
+
+def collect_files(pattern: str) -> List[Tuple[str, str]]:
+    """
+    Expand a directory or glob pattern into the files it names.
+
+    Args:
+        pattern: A directory (searched recursively), a glob pattern or a single file.
+
+    Returns:
+        A sorted list of (name, path) pairs, where the name is the path relative to the
+        directory (or to the common parent of the matches) with '/' separators.
+    """
+    if os.path.isdir(pattern):
+        root = pattern
+        paths = [os.path.join(directory, name) for directory, _, names in os.walk(pattern) for name in names]
+    else:
+        paths = [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else ''
+
+    members = [(os.path.relpath(os.path.abspath(path), os.path.abspath(root)).replace(os.sep, '/'), path) for path in paths]
+    return sorted(members)
+
+
+class HuffmanDictionary:
+    """
+    A byte-mode code table trained on sample files and reused across many compressed files.
+
+    Every byte value gets a code (counts are smoothed by one), so files containing bytes that
+    never occurred in the samples can still be encoded.
+    Attributes:
+        code_lengths (Dict[int, int]): The code length of each byte value.
+    """
+    def __init__(self, code_lengths: Dict[int, int]) -> None:
+        """
+        Initialize the HuffmanDictionary.
+        Args:
+            code_lengths (Dict[int, int]): The code length of each byte value.
+        """
+        self.code_lengths = code_lengths
+
+    @classmethod
+    def train(cls, sample_paths: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> 'HuffmanDictionary':
+        """
+        Build a dictionary from the byte counts of sample files.
+        Args:
+            sample_paths: The files to learn byte frequencies from.
+            chunk_size: The number of bytes read at a time.
+        Returns:
+            The trained HuffmanDictionary.
+        """
+        histogram = [1] * 256
+        for path in sample_paths:
+            counts = CompressorUtils.calculate_byte_histogram(path, chunk_size)
+            histogram = [total + count for total, count in zip(histogram, counts)]
+
+        tree = HuffmanTree(dict(enumerate(histogram)))
+        tree.build_tree()
+        tree.generate_codes()
+        return cls(tree.get_code_lengths())
+
+    def build_tree(self) -> HuffmanTree:
+        """Rebuild the canonical Huffman tree described by the code lengths."""
+        return HuffmanTree.from_code_lengths(self.code_lengths)
+
+    def save(self, output_path: str) -> None:
+        """Write the dictionary to a file."""
+        with open(output_path, 'wb') as file:
+            file.write(DICTIONARY_MAGIC)
+            file.write(HuffmanTree.serialize_byte_code_lengths(self.code_lengths))
+
+    @classmethod
+    def load(cls, input_path: str) -> 'HuffmanDictionary':
+        """Read a dictionary written by `save`."""
+        with open(input_path, 'rb') as file:
+            if file.read(len(DICTIONARY_MAGIC)) != DICTIONARY_MAGIC:
+                raise ValueError(f"'{input_path}' is not a Huffman dictionary.")
+            return cls(HuffmanTree.deserialize_byte_code_lengths(file.read()))
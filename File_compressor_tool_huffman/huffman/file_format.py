@@ -0,0 +1,92 @@
+"""
+Constants describing the layout of compressed files.
+
+Version 1 files are laid out as:
+    MAGIC | header length (4 bytes) | frequency table | payload
+
+Later versions insert a marker byte and the format version after the magic number:
+    MAGIC | VERSION_MARKER | version (1 byte) | header length (4 bytes) | header | payload
+
+A version 1 header length would need to be at least 4 GB for its first byte to equal
+VERSION_MARKER, so the two layouts cannot be confused.
+
+Version 2 headers hold a flags byte and the canonical code length table, with the symbols grouped
+by code length:
+    flags (1 byte) | maximum length (1 byte) | symbol count of each length (varints) | symbols
+The symbols are listed in canonical order, as one UTF-8 string or one byte per byte value.
+
+Version 2 files with FLAG_SYNC_INDEX set end with a sync point index after the payload:
+    ... payload | sync point count (4 bytes) | sync points | decoded size (8 bytes) | index offset (8 bytes)
+
+Version 3 files (block containers) share the version 2 header, followed by independently
+decodable blocks and a block index:
+    ... header | block 0 | block 1 | ... | block count (4 bytes) | index entries | index offset (8 bytes)
+
+Version 4 files (archives) share the version 2 byte-mode header, followed by one encoded stream per
+member and a member index:
+    ... header | member 0 | member 1 | ... | member count (4 bytes) | index entries | index offset (8 bytes)
+Index entries are varints: the length of the prefix shared with the previous member name, the length
+of the rest of the UTF-8 name, the rest of the name itself, and the bit count of the member. Members
+are byte aligned and stored in index order, so their offsets follow from the bit counts.
+
+Version 5 files (adaptive streams) have a header holding only the flags byte, followed by frames:
+    ... header | bit count (4 bytes) | packed bits | bit count (4 bytes) | packed bits | ... | 0 (4 bytes)
+Both sides start from the same byte model and update it after every frame, so no code table is stored.
+
+Dictionary files hold a byte-mode code length table that archives can be built from:
+    DICTIONARY_MAGIC | code lengths (256 bytes)
+"""
+
+import struct
+from typing import Tuple
+
+MAGIC = b'HUFCMP'
+VERSION_MARKER = 0xFF
+
+# Frequency table header, codes rebuilt with build_tree/generate_codes
+FORMAT_V1 = 1
+# Flags byte and canonical code length table
+FORMAT_V2 = 2
+# Version 2 header, independently encoded blocks and a block index
+FORMAT_V3 = 3
+# Version 2 header, one encoded stream per member file and a member index
+FORMAT_V4 = 4
+# Adaptive one-pass stream of frames, codes rebuilt from the bytes seen so far
+FORMAT_V5 = 5
+
+CURRENT_FORMAT = FORMAT_V2
+
+# Version 2 header flags
+# Symbols are byte values rather than characters
+FLAG_BYTES = 0x01
+# The payload is followed by a sync point index
+FLAG_SYNC_INDEX = 0x02
+
+# Sync point: bit offset in the payload, byte offset in the decoded output
+SYNC_POINT = struct.Struct('>QQ')
+
+# Block index entry: compressed offset, compressed size, bit count, decoded length
+BLOCK_INDEX_ENTRY = struct.Struct('>QQQQ')
+
+DICTIONARY_MAGIC = b'HUFDCT'
+
+
+def append_varint(serialized: bytearray, value: int) -> None:
+    """Append an unsigned integer, 7 bits per byte, least significant group first."""
+    while value >= 0x80:
+        serialized.append(value & 0x7F | 0x80)
+        value >>= 7
+    serialized.append(value)
+
+
+def read_varint(serialized: bytes, position: int) -> Tuple[int, int]:
+    """Read an unsigned integer written by `append_varint` and return it with the next position."""
+    value = 0
+    shift = 0
+    while True:
+        byte = serialized[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
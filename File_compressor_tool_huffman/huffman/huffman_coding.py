@@ -1,46 +1,130 @@
-from huffman.compressor_utils import CompressorUtils
+from huffman.compressor_utils import CompressorUtils, DEFAULT_CHUNK_SIZE, DEFAULT_SYNC_INTERVAL
 from huffman.decompressor_utils import DecompressorUtils
 from huffman.tree import HuffmanTree
+from huffman.table_decoder import TableDecoder
+from huffman.parallel_coding import ParallelHuffmanCoding, DEFAULT_BLOCK_SIZE
+from huffman.adaptive_coding import AdaptiveHuffmanCoding
+from huffman.archive import HuffmanArchive
+from huffman.file_format import FORMAT_V3, FORMAT_V4, FORMAT_V5
+import sys
+from typing import BinaryIO, Union
 
 class HuffmanCoding:
     """
     Performs compression and decompression using Huffman Coding.
+
+    Files are processed in fixed-size chunks, so memory use does not grow with the file size.
     Attributes:
         file_path (str): The path to the input file.
         tree (HuffmanTree): The Huffman tree used for encoding and decoding.
+        chunk_size (int): The number of characters (or bytes) processed at a time.
+        binary (bool): Whether to compress raw bytes instead of UTF-8 text.
+        jobs (int): The number of worker processes; more than 1 writes a block container.
+        block_size (int): The number of input bytes per block when using several jobs.
+        sync_interval (int): The maximum number of symbols between sync points (0 disables the sync point index).
+        adaptive (bool): Whether to compress in one pass with adaptive codes.
     """
-    def __init__(self, file_path: str) -> None:
+    def __init__(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, binary: bool = False, jobs: int = 1, block_size: int = DEFAULT_BLOCK_SIZE, sync_interval: int = DEFAULT_SYNC_INTERVAL, adaptive: bool = False) -> None:
         """
         Initialize the HuffmanCoding object.
         Args:
             file_path (str): The path to the input file.
+            chunk_size (int): The number of characters (or bytes) processed at a time.
+            binary (bool): Whether to compress raw bytes instead of UTF-8 text.
+            jobs (int): The number of worker processes; more than 1 writes a block container.
+            block_size (int): The number of input bytes per block when using several jobs.
+            sync_interval (int): The maximum number of symbols between sync points (0 disables the sync point index).
+            adaptive (bool): Whether to compress in one pass with adaptive codes.
         """
         self.file_path = file_path
         self.tree = None
-    
+        self.chunk_size = chunk_size
+        self.binary = binary
+        self.jobs = jobs
+        self.block_size = block_size
+        self.sync_interval = sync_interval
+        self.adaptive = adaptive
+
     def compress(self, output_path: str) -> None:
         """
         Compress the input file using Huffman Coding.
+
+        The file is read once to count characters and once more to encode it, one chunk at a time.
+        In binary mode the symbols are the 256 byte values and the file is never decoded as text.
+        With several jobs, blocks are encoded in parallel into a block container.
+        In adaptive mode the file is read once and encoded with codes learned along the way.
         """
-        frequency_table = CompressorUtils.calculate_character_frequency(self.file_path)
+        if self.adaptive:
+            with open(self.file_path, 'rb') as input_file, open(output_path, 'wb') as output_file:
+                AdaptiveHuffmanCoding().compress_stream(input_file, output_file)
+            print("Compression complete.")
+            return
+
+        if self.jobs > 1:
+            parallel_coding = ParallelHuffmanCoding(self.file_path, self.jobs, self.block_size, self.binary)
+            parallel_coding.compress(output_path)
+            self.tree = parallel_coding.tree
+            print("Compression complete.")
+            return
+
+        if self.binary:
+            frequency_table = CompressorUtils.calculate_byte_frequency(self.file_path, self.chunk_size)
+            chunks = CompressorUtils.iter_file_bytes(self.file_path, self.chunk_size)
+        else:
+            frequency_table = CompressorUtils.calculate_character_frequency(self.file_path, self.chunk_size)
+            chunks = CompressorUtils.iter_file_chunks(self.file_path, self.chunk_size)
+
         self.tree = HuffmanTree(frequency_table)
         self.tree.build_tree()
         self.tree.generate_codes()
-        text = CompressorUtils.get_file_content(self.file_path)
-        compressed_text = CompressorUtils.encode_text(text, self.tree.get_codes())
-        CompressorUtils.write_header_with_compressed_data(output_path, frequency_table, compressed_text)
+        self.tree.make_canonical()
+
+        # A file shorter than one interval would get an index without sync points
+        sync_interval = self.sync_interval if sum(frequency_table.values()) > self.sync_interval else 0
+
+        with open(output_path, 'wb') as file:
+            CompressorUtils.write_code_lengths_header(file, self.tree.get_code_lengths(), self.binary, sync_index=sync_interval > 0)
+            CompressorUtils.write_compressed_chunks(file, chunks, self.tree.get_codes(), self.binary, sync_interval)
 
         print("Compression complete.")
-    
-    def decompress(self, input_path: str, output_path: str) -> None:
+
+    def decompress(self, input_path: str, output_path: Union[str, BinaryIO]) -> None:
         """
         Decompress the input file using Huffman Coding.
+
+        The compressed data is decoded and written to the output file one chunk at a time.
+        Files compressed in binary mode are detected from their header and written back as raw bytes.
+        Block containers are decoded block by block, using the configured number of jobs.
+        Archives are extracted into the directory `output_path`.
+        Adaptive streams are decoded frame by frame.
+        The output may also be an open binary stream, such as sys.stdout.buffer, except for archives.
         """
-        frequency_table, compressed_data = DecompressorUtils.read_header_and_data(input_path)
-        tree = HuffmanTree(frequency_table)
-        tree.build_tree()
-        tree.generate_codes()
-        decoded_text = DecompressorUtils.decode_text(DecompressorUtils.get_binary_string(compressed_data), tree.reverse_codes)
-        DecompressorUtils.write_to_file(decoded_text, output_path)
-        
-        print("Decompression complete")
\ No newline at end of file
+        # Data written to a stream such as stdout must not be mixed with status messages
+        messages = sys.stdout if isinstance(output_path, str) else sys.stderr
+        version = DecompressorUtils.read_format_version(input_path)
+        if version == FORMAT_V3:
+            ParallelHuffmanCoding(input_path, self.jobs).decompress(input_path, output_path)
+            print("Decompression complete", file=messages)
+            return
+        if version == FORMAT_V4:
+            HuffmanArchive(input_path, self.chunk_size).extract(output_path)
+            print("Decompression complete", file=messages)
+            return
+        if version == FORMAT_V5:
+            with open(input_path, 'rb') as file:
+                DecompressorUtils.write_chunks_to_file(AdaptiveHuffmanCoding().iter_decompress(file), output_path, binary=True)
+            print("Decompression complete", file=messages)
+            return
+
+        with open(input_path, 'rb') as file:
+            version, serialized_header = DecompressorUtils.read_raw_header(file)
+            tree = DecompressorUtils.build_tree_from_header(version, serialized_header)
+            payload_end = DecompressorUtils.get_payload_end(file, version, serialized_header)
+            padding = file.read(1)
+            total_bits = (payload_end - file.tell()) * 8 - padding[0] if padding else 0
+
+            chunks = DecompressorUtils.iter_payload_chunks(file, payload_end, self.chunk_size)
+            decoder = TableDecoder(tree, DecompressorUtils.is_binary_header(version, serialized_header))
+            DecompressorUtils.write_chunks_to_file(decoder.iter_decode(chunks, total_bits), output_path, decoder.binary)
+
+        print("Decompression complete", file=messages)
@@ -0,0 +1,271 @@
+import io
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from huffman.bit_packing import CodePacker
+from huffman.compressor_utils import CompressorUtils
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.file_format import FORMAT_V3, BLOCK_INDEX_ENTRY
+from huffman.table_decoder import TableDecoder
+from huffman.tree import HuffmanTree
+
+# Number of input bytes per block
+DEFAULT_BLOCK_SIZE = 1 << 22
+
+# (compressed offset, compressed size, bit count, decoded length)
+BlockIndexEntry = Tuple[int, int, int, int]
+
+
+def split_blocks(file_path: str, block_size: int, binary: bool) -> List[Tuple[int, int]]:
+    """
+    Split a file into byte ranges of roughly `block_size` bytes.
+
+    In text mode a boundary is never placed inside a UTF-8 sequence or between '\\r' and '\\n',
+    so every block decodes (and translates newlines) exactly like the whole file would.
+
+    Args:
+        file_path: The path to the input file.
+        block_size: The target number of bytes per block.
+        binary: Whether the file is compressed as raw bytes.
+
+    Returns:
+        A list of (start, end) byte offsets.
+    """
+    size = os.path.getsize(file_path)
+    boundaries = [0]
+
+    with open(file_path, 'rb') as file:
+        position = block_size
+        while position < size:
+            if not binary:
+                # window[0] is the byte before the boundary, window[1] the byte after it
+                file.seek(position - 1)
+                window = file.read(8)
+                shift = 0
+                while shift + 1 < len(window) and (window[shift + 1] & 0xC0 == 0x80 or window[shift:shift + 2] == b'\r\n'):
+                    shift += 1
+                position += shift
+
+            if position >= size:
+                break
+            boundaries.append(position)
+            position += block_size
+
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _read_block(file_path: str, start: int, end: int, binary: bool) -> Union[str, bytes]:
+    """Read a block of the input file as raw bytes or as text with universal newlines."""
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        raw = file.read(end - start)
+
+    if binary:
+        return raw
+    return io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8').read()
+
+
+def _count_block(file_path: str, start: int, end: int, binary: bool) -> Counter:
+    """Count the symbols of one block."""
+    return Counter(_read_block(file_path, start, end, binary))
+
+
+def _encode_block(file_path: str, start: int, end: int, binary: bool, codes: Dict[Union[str, int], str]) -> Tuple[bytes, int, int]:
+    """
+    Encode one block.
+    Returns:
+        A tuple (packed_bytes, bit_count, decoded_length).
+    """
+    block = _read_block(file_path, start, end, binary)
+    data, bit_count = CodePacker(codes, binary).encode(block)
+    return data, bit_count, len(block)
+
+
+@lru_cache(maxsize=4)
+def _get_decoder(version: int, serialized_header: bytes) -> TableDecoder:
+    """Build (once per worker) the table decoder for a header."""
+    return TableDecoder(DecompressorUtils.build_tree_from_header(version, serialized_header), DecompressorUtils.is_binary_header(version, serialized_header))
+
+
+def _decode_block(input_path: str, version: int, serialized_header: bytes, offset: int, size: int, bit_count: int) -> Union[str, bytes]:
+    """Decode one block of a block container."""
+    with open(input_path, 'rb') as file:
+        file.seek(offset)
+        data = file.read(size)
+    return _get_decoder(version, serialized_header).decode_bits(data, bit_count)
+
+
+class ParallelHuffmanCoding:
+    """
+    Compresses files as independently decodable blocks spread across worker processes.
+
+    All blocks share one code table built from the counts of every block. The output is a
+    block container (format version 3) whose index records where each block starts, so blocks
+    can be decoded in parallel or read individually.
+    Attributes:
+        file_path (str): The path to the input file.
+        jobs (int): The number of worker processes (1 runs everything in this process).
+        block_size (int): The target number of input bytes per block.
+        binary (bool): Whether to compress raw bytes instead of UTF-8 text.
+        tree (HuffmanTree): The Huffman tree shared by all blocks.
+    """
+    def __init__(self, file_path: str, jobs: int = 1, block_size: int = DEFAULT_BLOCK_SIZE, binary: bool = False) -> None:
+        """
+        Initialize the ParallelHuffmanCoding object.
+        Args:
+            file_path (str): The path to the input file.
+            jobs (int): The number of worker processes (1 runs everything in this process).
+            block_size (int): The target number of input bytes per block.
+            binary (bool): Whether to compress raw bytes instead of UTF-8 text.
+        """
+        self.file_path = file_path
+        self.jobs = jobs
+        self.block_size = block_size
+        self.binary = binary
+        self.tree = None
+
+    def _create_executor(self) -> Optional[Executor]:
+        """Create the worker pool, or None when running in this process."""
+        if self.jobs <= 1:
+            return None
+        return ProcessPoolExecutor(max_workers=self.jobs)
+
+    def _map_ordered(self, executor: Optional[Executor], function: Callable, tasks: Iterable[tuple]) -> Iterator:
+        """
+        Run a function over tasks and yield the results in task order.
+
+        At most two tasks per worker are in flight, so finished blocks waiting to be written
+        never pile up in memory.
+        """
+        if executor is None:
+            for task in tasks:
+                yield function(*task)
+            return
+
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, *task))
+            if len(pending) >= 2 * self.jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def compress(self, output_path: str) -> None:
+        """
+        Compress the input file into a block container.
+
+        Blocks are counted in parallel to build the shared code table, then encoded in parallel
+        and written in order, followed by the block index.
+        """
+        blocks = split_blocks(self.file_path, self.block_size, self.binary)
+        executor = self._create_executor()
+
+        try:
+            frequency_table = Counter()
+            for counts in self._map_ordered(executor, _count_block, [(self.file_path, start, end, self.binary) for start, end in blocks]):
+                frequency_table.update(counts)
+
+            if not frequency_table or (not self.binary and all(char.isspace() for char in frequency_table)):
+                print(f"Error: File '{self.file_path}' is empty.")
+                sys.exit(1)
+
+            self.tree = HuffmanTree(frequency_table)
+            self.tree.build_tree()
+            self.tree.generate_codes()
+            self.tree.make_canonical()
+            codes = self.tree.get_codes()
+
+            with open(output_path, 'wb') as file:
+                CompressorUtils.write_code_lengths_header(file, self.tree.get_code_lengths(), self.binary, FORMAT_V3)
+
+                index = []
+                tasks = [(self.file_path, start, end, self.binary, codes) for start, end in blocks]
+                for data, bit_count, length in self._map_ordered(executor, _encode_block, tasks):
+                    index.append((file.tell(), len(data), bit_count, length))
+                    file.write(data)
+
+                ParallelHuffmanCoding.write_block_index(file, index)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def decompress(self, input_path: str, output_path: str) -> None:
+        """
+        Decompress a block container, decoding blocks in parallel and writing them in order.
+        """
+        version, serialized_header, index = ParallelHuffmanCoding.read_container(input_path)
+        binary = DecompressorUtils.is_binary_header(version, serialized_header)
+        executor = self._create_executor()
+
+        try:
+            tasks = [(input_path, version, serialized_header, offset, size, bit_count) for offset, size, bit_count, _ in index]
+            DecompressorUtils.write_chunks_to_file(self._map_ordered(executor, _decode_block, tasks), output_path, binary)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    @staticmethod
+    def read_block(input_path: str, block_number: int) -> Union[str, bytes]:
+        """
+        Decode a single block without decoding the rest of the file.
+        Args:
+            input_path: The path to the block container.
+            block_number: The position of the block in the index.
+        Returns:
+            The decoded text (or bytes) of the block.
+        """
+        version, serialized_header, index = ParallelHuffmanCoding.read_container(input_path)
+        if not 0 <= block_number < len(index):
+            raise ValueError(f"Block {block_number} does not exist; the file has {len(index)} blocks.")
+
+        offset, size, bit_count, _ = index[block_number]
+        return _decode_block(input_path, version, serialized_header, offset, size, bit_count)
+
+    @staticmethod
+    def read_container(input_path: str) -> Tuple[int, bytes, List[BlockIndexEntry]]:
+        """
+        Read the header and block index of a block container.
+        Returns:
+            A tuple (version, serialized_header, index).
+        """
+        with open(input_path, 'rb') as file:
+            version, serialized_header = DecompressorUtils.read_raw_header(file)
+            if version != FORMAT_V3:
+                raise ValueError(f"File is not a block container (format version {version}).")
+            index = ParallelHuffmanCoding.read_block_index(file)
+
+        return version, serialized_header, index
+
+    @staticmethod
+    def write_block_index(file: BinaryIO, index: List[BlockIndexEntry]) -> None:
+        """
+        Write the block index and the trailing index offset.
+        Args:
+            file: The binary output file object, positioned after the last block.
+            index: One (offset, size, bit_count, length) entry per block.
+        """
+        index_offset = file.tell()
+        file.write(len(index).to_bytes(4, byteorder='big'))
+        for entry in index:
+            file.write(BLOCK_INDEX_ENTRY.pack(*entry))
+        file.write(index_offset.to_bytes(8, byteorder='big'))
+
+    @staticmethod
+    def read_block_index(file: BinaryIO) -> List[BlockIndexEntry]:
+        """
+        Read the block index using the index offset stored at the end of the file.
+        Args:
+            file: The binary input file object.
+        Returns:
+            One (offset, size, bit_count, length) entry per block.
+        """
+        file.seek(-8, os.SEEK_END)
+        file.seek(int.from_bytes(file.read(8), 'big'))
+        block_count = int.from_bytes(file.read(4), 'big')
+        serialized_index = file.read(block_count * BLOCK_INDEX_ENTRY.size)
+
+        return [entry for entry in BLOCK_INDEX_ENTRY.iter_unpack(serialized_index)]
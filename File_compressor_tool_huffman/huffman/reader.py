@@ -0,0 +1,160 @@
+import io
+import os
+from bisect import bisect_right
+from typing import Optional, Tuple
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.file_format import FORMAT_V2, FLAG_SYNC_INDEX
+from huffman.table_decoder import TableDecoder
+
+
+class HuffmanReader(io.RawIOBase):
+    """
+    A read-only, seekable file object over the decompressed contents of a .huff file.
+
+    Positions are byte offsets into the decompressed output (UTF-8 bytes for text files). When the
+    file has a sync point index, only the blocks between the sync points around the requested range
+    are decoded; otherwise the whole payload is decoded as one block on the first read.
+
+    Attributes:
+        input_path (str): The path to the compressed file.
+        binary (bool): Whether the file was compressed as raw bytes.
+    """
+    def __init__(self, input_path: str) -> None:
+        """
+        Open a compressed file for reading.
+        Args:
+            input_path (str): The path to a format version 2 .huff file.
+        """
+        super().__init__()
+        self.input_path = input_path
+        self._file = open(input_path, 'rb')
+        try:
+            version, serialized_header = DecompressorUtils.read_raw_header(self._file)
+            if version != FORMAT_V2:
+                raise ValueError(f"Random access is not supported for format version {version}.")
+
+            self._decoder = TableDecoder(DecompressorUtils.build_tree_from_header(version, serialized_header), DecompressorUtils.is_binary_header(version, serialized_header))
+            self.binary = self._decoder.binary
+
+            payload_end = DecompressorUtils.get_payload_end(self._file, version, serialized_header)
+            padding = self._file.read(1)
+            self._data_start = self._file.tell()
+            self._total_bits = (payload_end - self._data_start) * 8 - padding[0] if padding else 0
+
+            if serialized_header[0] & FLAG_SYNC_INDEX:
+                self._sync_points, self._size = DecompressorUtils.read_sync_index(self._file)
+            else:
+                self._sync_points, self._size = [(0, 0)], None
+        except Exception:
+            self._file.close()
+            raise
+
+        self._byte_offsets = [byte_offset for _, byte_offset in self._sync_points]
+        self._position = 0
+        self._cached_block = None
+        self._cached_data = b''
+
+    @property
+    def size(self) -> int:
+        """The number of decompressed bytes."""
+        if self._size is None:
+            self._size = len(self._decode_block(0))
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """
+        Move to a position in the decompressed output.
+        Args:
+            offset: The offset relative to `whence`.
+            whence: os.SEEK_SET, os.SEEK_CUR or os.SEEK_END.
+        Returns:
+            The new absolute position.
+        """
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence value: {whence}")
+
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        """Decode the block containing the current position and copy as much of it as fits into `buffer`."""
+        if self._position >= self.size:
+            return 0
+
+        block = bisect_right(self._byte_offsets, self._position) - 1
+        data = self._decode_block(block)
+        start = self._position - self._byte_offsets[block]
+        count = min(len(buffer), len(data) - start)
+
+        memoryview(buffer).cast('B')[:count] = data[start:start + count]
+        self._position += count
+        return count
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        """
+        Read up to `size` decompressed bytes from the current position (everything that is left by default).
+        """
+        if size is None or size < 0:
+            size = max(self.size - self._position, 0)
+
+        result = bytearray(size)
+        view = memoryview(result)
+        filled = 0
+        while filled < size:
+            count = self.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+
+        view.release()
+        del result[filled:]
+        return bytes(result)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+    def _block_bits(self, block: int) -> Tuple[int, int]:
+        """Return the (start, end) bit offsets of a block in the payload."""
+        start = self._sync_points[block][0]
+        end = self._sync_points[block + 1][0] if block + 1 < len(self._sync_points) else self._total_bits
+        return start, end
+
+    def _decode_block(self, block: int) -> bytes:
+        """Decode a block (caching the most recent one) and return its decompressed bytes."""
+        if block == self._cached_block:
+            return self._cached_data
+
+        start_bit, end_bit = self._block_bits(block)
+        skip = start_bit % 8
+        self._file.seek(self._data_start + start_bit // 8)
+        raw = self._file.read((skip + end_bit - start_bit + 7) // 8)
+
+        # Drop the bits that belong to the previous block so the block starts on a byte boundary
+        value = int.from_bytes(raw, byteorder='big') & ((1 << (len(raw) * 8 - skip)) - 1)
+        data = self._decoder.decode_bits((value << skip).to_bytes(len(raw), byteorder='big'), end_bit - start_bit)
+        if not self.binary:
+            data = data.encode('utf-8')
+
+        self._cached_block = block
+        self._cached_data = data
+        return data
+
@@ -0,0 +1,204 @@
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from huffman.tree import HuffmanTree, HuffmanNode
+
+DEFAULT_TABLE_BITS = 12
+
+
+class TableDecoder:
+    """
+    Decodes Huffman-encoded payloads several bits at a time using a precomputed lookup table.
+
+    Every entry of the table is indexed by the next `table_bits` bits of the stream and holds
+    all the symbols that those bits decode to, together with the number of bits they consume.
+    Codes longer than `table_bits` fall back to a tree walk that starts where the table left off.
+
+    Trees whose symbols are byte values (see `CompressorUtils.calculate_byte_frequency`) decode to
+    bytes, all other trees decode to text; the file header records which one a tree is.
+
+    Attributes:
+        tree (HuffmanTree): The Huffman tree the table is built from.
+        table_bits (int): The number of bits consumed per table lookup.
+        binary (bool): Whether the symbols are byte values.
+    """
+    def __init__(self, tree: HuffmanTree, binary: bool = False, table_bits: int = DEFAULT_TABLE_BITS) -> None:
+        """
+        Initialize the TableDecoder.
+        Args:
+            tree (HuffmanTree): A built Huffman tree with generated codes.
+            binary (bool): Whether the symbols are byte values, as recorded in the file header.
+            table_bits (int): The number of bits consumed per table lookup.
+        """
+        if tree.root is None:
+            raise ValueError("Huffman tree has not been built yet.")
+
+        self.tree = tree
+        self.table_bits = table_bits
+        self.binary = binary
+        self.empty: Union[str, bytes] = b'' if self.binary else ''
+        self._join_symbols = bytes if self.binary else ''.join
+        self._pieces = {symbol: self._join_symbols((symbol,)) for symbol in tree.get_codes()}
+        self.max_code_length = max(len(code) for code in tree.get_codes().values())
+        self.table: List[Tuple[Union[str, bytes], int, Optional[HuffmanNode]]] = self._build_table()
+
+    def _build_table(self) -> List[Tuple[Union[str, bytes], int, Optional[HuffmanNode]]]:
+        """
+        Build the lookup table.
+
+        Returns:
+            A list of (decoded_text, bits_consumed, node) entries, one per `table_bits` bit pattern.
+            `node` is only set when no symbol could be decoded, and points to the tree node
+            reached after consuming all `table_bits` bits.
+        """
+        table = []
+        root = self.tree.root
+
+        for index in range(1 << self.table_bits):
+            symbols = []
+            consumed = 0
+            node = root
+            for position in range(self.table_bits):
+                bit = (index >> (self.table_bits - 1 - position)) & 1
+                node = node.right if bit else node.left
+                if node is None:
+                    # Bit pattern that cannot occur in a valid stream
+                    break
+                if node.is_leaf:
+                    symbols.append(node.value)
+                    consumed = position + 1
+                    node = root
+
+            if symbols:
+                table.append((self._join_symbols(symbols), consumed, None))
+            else:
+                table.append((self.empty, 0, node))
+
+        return table
+
+    def decode(self, payload: bytes) -> Union[str, bytes]:
+        """
+        Decode a payload written by `CompressorUtils.get_byte_arary`.
+        Args:
+            payload: The padding byte followed by the packed code bits.
+        Returns:
+            The decoded text.
+        """
+        if not payload:
+            return self.empty
+
+        padding = payload[0]
+        data = payload[1:]
+        total_bits = len(data) * 8 - padding
+
+        return self.decode_bits(data, total_bits)
+
+    def decode_bits(self, data: bytes, total_bits: int) -> Union[str, bytes]:
+        """
+        Decode the first `total_bits` bits of `data`.
+        Args:
+            data: The packed code bits, most significant bit first.
+            total_bits: The number of valid bits in `data`.
+        Returns:
+            The decoded text.
+        """
+        return self.empty.join(self.iter_decode([data], total_bits))
+
+    def iter_decode(self, chunks: Iterable[bytes], total_bits: int) -> Iterator[Union[str, bytes]]:
+        """
+        Decode a stream of packed code bits delivered in chunks of any size.
+
+        Only the bits of the current chunk and less than one refill from the previous
+        chunk are held at a time, so the stream can be larger than memory.
+
+        Args:
+            chunks: The packed code bits, most significant bit first.
+            total_bits: The number of valid bits in the whole stream.
+        Yields:
+            The text decoded from each chunk.
+        """
+        table = self.table
+        table_bits = self.table_bits
+        mask = (1 << table_bits) - 1
+        # Enough buffered bits to resolve any code with a single lookup and tree walk
+        needed = max(table_bits, self.max_code_length)
+        refill_bytes = max(8, (needed + 7) // 8)
+        refill_bits = refill_bytes * 8
+        from_bytes = int.from_bytes
+        # Bytes are collected in a bytearray: bytes.join keeps a buffer view per item
+        new_output = bytearray if self.binary else list
+        finish_output = bytes if self.binary else ''.join
+        pieces = self._pieces
+
+        accumulator = 0
+        buffered = 0
+        remaining = total_bits
+        leftover = b''
+
+        # A final round of zero bytes lets the last refill read a full word
+        for chunk in chain(chunks, [bytes(refill_bytes)]):
+            data = leftover + chunk
+            last_refill = len(data) - refill_bytes
+            position = 0
+            output = new_output()
+            append = output.extend if self.binary else output.append
+
+            while remaining >= needed:
+                if buffered < needed:
+                    if position > last_refill:
+                        break
+                    accumulator = ((accumulator & ((1 << buffered) - 1)) << refill_bits) | from_bytes(data[position:position + refill_bytes], 'big')
+                    position += refill_bytes
+                    buffered += refill_bits
+                    continue
+
+                text, consumed, node = table[(accumulator >> (buffered - table_bits)) & mask]
+                if consumed:
+                    append(text)
+                    buffered -= consumed
+                    remaining -= consumed
+                    continue
+
+                # Code longer than the table: continue walking the tree bit by bit
+                buffered -= table_bits
+                remaining -= table_bits
+                while node is not None and not node.is_leaf:
+                    buffered -= 1
+                    remaining -= 1
+                    node = node.right if (accumulator >> buffered) & 1 else node.left
+                if node is None:
+                    raise ValueError("Invalid Huffman code in compressed data.")
+                append(pieces[node.value])
+
+            leftover = data[position:]
+            if output:
+                yield finish_output(output)
+
+        # Fewer bits left than a lookup needs: finish the tail with the tree
+        if remaining > 0:
+            accumulator = ((accumulator & ((1 << buffered) - 1)) << (8 * len(leftover))) | from_bytes(leftover, 'big')
+            yield self._decode_tail(accumulator, buffered + 8 * len(leftover), remaining)
+
+    def _decode_tail(self, accumulator: int, buffered: int, remaining: int) -> Union[str, bytes]:
+        """
+        Decode the last `remaining` bits of the stream by walking the tree.
+        Args:
+            accumulator: Integer holding the buffered bits, most significant first.
+            buffered: The number of bits held in the accumulator.
+            remaining: The number of valid bits left, all of them in the accumulator.
+        Returns:
+            The decoded text.
+        """
+        root = self.tree.root
+        node = root
+        symbols = []
+        for shift in range(buffered - 1, buffered - 1 - remaining, -1):
+            node = node.right if (accumulator >> shift) & 1 else node.left
+            if node is None:
+                raise ValueError("Invalid Huffman code in compressed data.")
+            if node.is_leaf:
+                symbols.append(node.value)
+                node = root
+
+        if node is not root:
+            raise ValueError("Compressed data ends in the middle of a code.")
+        return self._join_symbols(symbols)
@@ -1,7 +1,8 @@
 import heapq
 import struct
 from collections import Counter
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
+from huffman.file_format import append_varint, read_varint
 
 
 class HuffmanNode:
@@ -99,6 +100,233 @@ class HuffmanTree:
         """
         return self.codes
 
+    def get_code_lengths(self) -> Dict[str, int]:
+        """
+        Get the length of the Huffman code of each character.
+        Returns:
+            A dictionary with characters as keys and code lengths as values.
+        """
+        return {char: len(code) for char, code in self.codes.items()}
+
+    def make_canonical(self) -> None:
+        """
+        Replace the generated codes with canonical codes of the same lengths.
+
+        Canonical codes can be rebuilt from the code lengths alone, so only the lengths
+        need to be stored in the compressed file.
+        """
+        if not self.codes:
+            raise ValueError("Huffman codes have not been generated yet.")
+
+        canonical = HuffmanTree.from_code_lengths(self.get_code_lengths())
+        self.root = canonical.root
+        self.codes = canonical.codes
+        self.reverse_codes = canonical.reverse_codes
+
+    @classmethod
+    def from_code_lengths(cls, code_lengths: Dict[str, int]) -> 'HuffmanTree':
+        """
+        Rebuild a tree with canonical codes from the code length of each character.
+
+        Characters are ordered by (code length, character) and receive consecutive codes,
+        so no frequency table or priority queue is needed.
+
+        Args:
+            code_lengths: Dictionary with characters as keys and code lengths as values.
+
+        Returns:
+            A HuffmanTree whose root, codes and reverse codes are set.
+        """
+        if not code_lengths:
+            raise ValueError("Code length table is empty. Cannot build Huffman tree.")
+
+        tree = cls(Counter())
+        tree.root = HuffmanNode(None, 0)
+
+        code = 0
+        previous_length = 0
+        for char, length in sorted(code_lengths.items(), key=lambda item: (item[1], item[0])):
+            code <<= length - previous_length
+            previous_length = length
+            if code >= 1 << length:
+                raise ValueError("Invalid code lengths: codes do not fit in a prefix code.")
+
+            bits = format(code, f'0{length}b')
+            tree.codes[char] = bits
+            tree.reverse_codes[bits] = char
+            tree._insert_code(char, bits)
+            code += 1
+
+        return tree
+
+    def _insert_code(self, char: str, code: str) -> None:
+        """
+        Add the path for a code to the tree, creating internal nodes as needed.
+        Args:
+            char: The character at the end of the path.
+            code: The code describing the path ('0' is left, '1' is right).
+        """
+        node = self.root
+        for bit in code[:-1]:
+            child = node.right if bit == '1' else node.left
+            if child is None:
+                child = HuffmanNode(None, 0)
+                if bit == '1':
+                    node.right = child
+                else:
+                    node.left = child
+            node = child
+
+        leaf = HuffmanNode(char, 0)
+        if code[-1] == '1':
+            node.right = leaf
+        else:
+            node.left = leaf
+
+    @staticmethod
+    def _serialize_char(serialized: bytearray, char: str) -> None:
+        """
+        Append a character to a serialized table.
+        Args:
+            serialized: The byte array to append to.
+            char: The character to serialize.
+        """
+        char_bytes = char.encode('utf-8')  # UTF-8 encoding
+        char_length = len(char_bytes)
+
+        # Encode character length and content
+        if char_length == 1 and char_bytes[0] < 128:  # ASCII optimization
+            # For ASCII, store directly without length
+            serialized.append(0)  # ASCII marker
+            serialized.extend(char_bytes)
+        else:
+            # For non-ASCII, store length and bytes
+            serialized.append(1)  # Unicode marker
+            serialized.extend(struct.pack('>H', char_length))  # 2-byte length
+            serialized.extend(char_bytes)
+
+    @staticmethod
+    def _deserialize_char(serialized_data: bytes, index: int) -> Tuple[str, int]:
+        """
+        Read a character from a serialized table.
+        Args:
+            serialized_data: Serialized byte array.
+            index: Position of the character marker.
+        Returns:
+            A tuple (character, index of the next byte).
+        """
+        marker = serialized_data[index]
+        index += 1
+
+        if marker == 0:  # ASCII
+            char = chr(serialized_data[index])
+            index += 1
+        elif marker == 1:  # Unicode
+            char_length = struct.unpack_from('>H', serialized_data, index)[0]
+            index += 2
+            char = serialized_data[index:index + char_length].decode('utf-8')
+            index += char_length
+        else:
+            raise ValueError("Invalid marker in serialized data.")
+
+        return char, index
+
+    @staticmethod
+    def serialize_code_lengths(code_lengths: Dict[Union[str, int], int], binary: bool = False) -> bytes:
+        """
+        Serialize a code length table into a compact byte format.
+
+        Symbols are grouped by code length, so no length or marker is stored per symbol:
+            maximum length (1 byte) | symbol count of each length 1..maximum (varints) | symbols
+        The symbols follow in canonical order, as one UTF-8 string or one byte per byte value.
+
+        Args:
+            code_lengths: Dictionary with characters (or byte values) as keys and code lengths as values.
+            binary: Whether the symbols are byte values.
+
+        Returns:
+            A serialized byte array.
+        """
+        max_length = max(code_lengths.values(), default=0)
+        counts = Counter(code_lengths.values())
+        if max_length > 255 or any(length <= 0 for length in counts):
+            raise ValueError("Code lengths must be between 1 and 255 to be serialized.")
+
+        serialized = bytearray([max_length])
+        for length in range(1, max_length + 1):
+            append_varint(serialized, counts[length])
+
+        symbols = sorted(code_lengths, key=lambda symbol: (code_lengths[symbol], symbol))
+        serialized.extend(bytes(symbols) if binary else ''.join(symbols).encode('utf-8'))
+
+        return bytes(serialized)
+
+    @staticmethod
+    def deserialize_code_lengths(serialized_data: bytes, binary: bool = False) -> Dict[Union[str, int], int]:
+        """
+        Deserialize a code length table from a compact byte format.
+
+        Args:
+            serialized_data: Serialized byte array.
+            binary: Whether the symbols are byte values.
+
+        Returns:
+            A dictionary with characters (or byte values) as keys and code lengths as values.
+        """
+        max_length = serialized_data[0]
+        index = 1
+        counts = []
+        for _ in range(max_length):
+            count, index = read_varint(serialized_data, index)
+            counts.append(count)
+
+        symbols = serialized_data[index:] if binary else serialized_data[index:].decode('utf-8')
+        if len(symbols) != sum(counts):
+            raise ValueError("Code length table does not match its symbol counts.")
+
+        code_lengths = {}
+        symbol_iter = iter(symbols)
+        for length, count in enumerate(counts, 1):
+            for _ in range(count):
+                code_lengths[next(symbol_iter)] = length
+
+        return code_lengths
+
+    @staticmethod
+    def serialize_byte_code_lengths(code_lengths: Dict[int, int]) -> bytes:
+        """
+        Serialize the code lengths of a byte alphabet.
+
+        Args:
+            code_lengths: Dictionary with byte values as keys and code lengths as values.
+
+        Returns:
+            256 bytes holding the code length of each byte value (0 for unused values).
+        """
+        serialized = bytearray(256)
+        for byte, length in code_lengths.items():
+            if not 0 < length < 256:
+                raise ValueError(f"Code length {length} cannot be serialized.")
+            serialized[byte] = length
+
+        return bytes(serialized)
+
+    @staticmethod
+    def deserialize_byte_code_lengths(serialized_data: bytes) -> Dict[int, int]:
+        """
+        Deserialize the code lengths of a byte alphabet.
+
+        Args:
+            serialized_data: 256 bytes holding the code length of each byte value.
+
+        Returns:
+            A dictionary with the byte values in use as keys and code lengths as values.
+        """
+        if len(serialized_data) != 256:
+            raise ValueError("Byte code length table must have 256 entries.")
+
+        return {byte: length for byte, length in enumerate(serialized_data) if length}
+
     @staticmethod
     def serialize_frequency_table(frequency_table: Dict[str, int]) -> bytes:
         """
@@ -116,19 +344,7 @@ class HuffmanTree:
         serialized.extend(struct.pack('>I', len(frequency_table)))
 
         for char, freq in frequency_table.items():
-            char_bytes = char.encode('utf-8')  # UTF-8 encoding
-            char_length = len(char_bytes)
-
-            # Encode character length and content
-            if char_length == 1 and char_bytes[0] < 128:  # ASCII optimization
-                # For ASCII, store directly without length
-                serialized.append(0)  # ASCII marker
-                serialized.extend(char_bytes)
-            else:
-                # For non-ASCII, store length and bytes
-                serialized.append(1)  # Unicode marker
-                serialized.extend(struct.pack('>H', char_length))  # 2-byte length
-                serialized.extend(char_bytes)
+            HuffmanTree._serialize_char(serialized, char)
 
             # Encode frequency using variable-length encoding
             while freq >= 0x80:  # More significant bytes follow
@@ -157,19 +373,7 @@ class HuffmanTree:
         index += 4
 
         for _ in range(num_entries):
-            marker = serialized_data[index]
-            index += 1
-
-            if marker == 0:  # ASCII
-                char = chr(serialized_data[index])
-                index += 1
-            elif marker == 1:  # Unicode
-                char_length = struct.unpack_from('>H', serialized_data, index)[0]
-                index += 2
-                char = serialized_data[index:index + char_length].decode('utf-8')
-                index += char_length
-            else:
-                raise ValueError("Invalid marker in serialized data.")
+            char, index = HuffmanTree._deserialize_char(serialized_data, index)
 
             freq = 0
             shift = 0
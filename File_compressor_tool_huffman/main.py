@@ -1,9 +1,26 @@
-from huffman.compressor_utils import CompressorUtils
+from huffman.compressor_utils import CompressorUtils, DEFAULT_CHUNK_SIZE, DEFAULT_SYNC_INTERVAL
+from huffman.decompressor_utils import DecompressorUtils
 from huffman.huffman_coding import HuffmanCoding
+from huffman.adaptive_coding import AdaptiveHuffmanCoding
+from huffman.parallel_coding import ParallelHuffmanCoding, DEFAULT_BLOCK_SIZE
+from huffman.reader import HuffmanReader
+from huffman.archive import HuffmanArchive
+from huffman.dictionary import HuffmanDictionary, collect_files
+from huffman.file_format import FORMAT_V4
 import argparse
+import contextlib
+import glob
+import os
 import sys
 
 
+def open_stream(path, mode, standard_stream):
+    """Open a file, or use the given standard stream when the path is '-'."""
+    if path == '-':
+        return contextlib.nullcontext(standard_stream)
+    return open(path, mode)
+
+
 def main():
     parser = argparse.ArgumentParser(description="A command-line tool for file compression and decompression.")
 
@@ -20,13 +37,54 @@ def main():
     )
     compress_parser.add_argument(
         "input_path", 
-        type=CompressorUtils.validate_file, 
-        help="The path to the file to compress."
+        type=str, 
+        help="The path to the file to compress, a directory or glob pattern to compress into one archive, or '-' for stdin."
     )
     compress_parser.add_argument(
         "output_path", 
         type=str, 
-        help="The path where the compressed file will be saved."
+        help="The path where the compressed file will be saved, or '-' for stdout."
+    )
+    compress_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of characters (or bytes) read and processed at a time (default: %(default)s)."
+    )
+    compress_parser.add_argument(
+        "--bytes",
+        action="store_true",
+        dest="binary",
+        help="Compress raw bytes instead of UTF-8 text (works for any file, including binary ones)."
+    )
+    compress_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes; more than 1 writes independently decodable blocks (default: %(default)s)."
+    )
+    compress_parser.add_argument(
+        "--block-size",
+        type=int,
+        default=DEFAULT_BLOCK_SIZE,
+        help="Number of input bytes per block when using several jobs (default: %(default)s)."
+    )
+    compress_parser.add_argument(
+        "--sync-interval",
+        type=int,
+        default=DEFAULT_SYNC_INTERVAL,
+        help="Number of characters (or bytes) between sync points used for random access; 0 disables them (default: %(default)s)."
+    )
+    compress_parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Compress in one pass with adaptive codes (implied when reading stdin or writing stdout)."
+    )
+    compress_parser.add_argument(
+        "--dictionary",
+        type=CompressorUtils.validate_file,
+        default=None,
+        help="A dictionary written by the train command, used to encode archives without building a tree."
     )
     compress_parser.set_defaults(command="compress")
     
@@ -37,41 +95,184 @@ def main():
     )
     decompress_parser.add_argument(
         "input_path", 
-        type=CompressorUtils.validate_file,  
-        help="The path to the compressed file to decompress."
+        type=str,  
+        help="The path to the compressed file to decompress, or '-' to read an adaptive stream from stdin."
     )
     decompress_parser.add_argument(
         "output_path", 
         type=str, 
-        help="The path where the decompressed file will be saved."
+        help="The path where the decompressed file will be saved, or '-' for stdout."
+    )
+    decompress_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of compressed bytes read and processed at a time (default: %(default)s)."
+    )
+    decompress_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to decode block containers (default: %(default)s)."
+    )
+    decompress_parser.add_argument(
+        "--block",
+        type=int,
+        default=None,
+        help="Only decompress this block of a block container."
+    )
+    decompress_parser.add_argument(
+        "--offset",
+        type=int,
+        default=None,
+        help="Only decompress the bytes starting at this offset of the decompressed file (default: 0 when --length is given)."
+    )
+    decompress_parser.add_argument(
+        "--length",
+        type=int,
+        default=None,
+        help="Number of bytes to decompress from --offset (default: up to the end)."
+    )
+    decompress_parser.add_argument(
+        "--member",
+        action="append",
+        default=None,
+        help="Only extract this member of an archive (may be repeated)."
     )
     decompress_parser.set_defaults(command="decompress")
+
+    # Train command
+    train_parser = subparsers.add_parser(
+        "train",
+        help="Build a shared dictionary from sample files."
+    )
+    train_parser.add_argument(
+        "samples",
+        nargs="+",
+        help="Sample files, directories or glob patterns."
+    )
+    train_parser.add_argument(
+        "-o", "--output",
+        required=True,
+        help="The path where the dictionary will be saved."
+    )
+    train_parser.set_defaults(command="train")
+
+    # Bench command; its options are parsed by the benchmark suite, which is only imported when it runs
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Benchmark each compression stage on synthetic corpora.",
+        add_help=False
+    )
+    bench_parser.set_defaults(command="bench")
     
-    args = parser.parse_args()
+    args, bench_arguments = parser.parse_known_args()
+    if bench_arguments and getattr(args, "command", None) != "bench":
+        parser.error(f"unrecognized arguments: {' '.join(bench_arguments)}")
     
     if not hasattr(args, "command"):
         parser.print_help()
     else:
+        # Data written to stdout must not be mixed with status messages, so those go to stderr
+        stdout = sys.stdout.buffer
+        output = getattr(args, "output_path", None)
+        messages = sys.stdout
+        if output == '-':
+            output = stdout
+            messages = sys.stderr
 
         if args.command == "compress":
+            if args.sync_interval < 0:
+                compress_parser.error("--sync-interval cannot be negative")
+            if args.block_size < 1:
+                compress_parser.error("--block-size must be at least 1")
+            archive = os.path.isdir(args.input_path) or glob.has_magic(args.input_path)
+            if archive:
+                # Archives are always in byte mode, with one stream per member, and are written to a file
+                ignored = [option for option, used in (
+                    ("--bytes", args.binary),
+                    ("--jobs", args.jobs != 1),
+                    ("--block-size", args.block_size != DEFAULT_BLOCK_SIZE),
+                    ("--sync-interval", args.sync_interval != DEFAULT_SYNC_INTERVAL),
+                    ("--adaptive", args.adaptive),
+                ) if used]
+                if ignored:
+                    compress_parser.error(f"{', '.join(ignored)} cannot be used when archiving a directory or glob pattern")
+                if args.output_path == '-':
+                    compress_parser.error("archives cannot be written to stdout")
+            elif args.dictionary:
+                compress_parser.error("--dictionary only applies when archiving a directory or glob pattern")
+
+            if args.adaptive or '-' in (args.input_path, args.output_path):
+                input_path = args.input_path if args.input_path == '-' else CompressorUtils.validate_file(args.input_path)
+                with open_stream(input_path, 'rb', sys.stdin.buffer) as input_stream, open_stream(args.output_path, 'wb', stdout) as output_stream:
+                    AdaptiveHuffmanCoding().compress_stream(input_stream, output_stream)
+                print(f"Compressed {args.input_path} to {args.output_path} in one pass.", file=messages)
+                return
+            if archive:
+                dictionary = HuffmanDictionary.load(args.dictionary) if args.dictionary else None
+                members = collect_files(args.input_path)
+                print(f"Archiving {len(members)} files from {args.input_path} to {args.output_path}...", file=messages)
+                HuffmanArchive(args.output_path, args.chunk_size).create(members, dictionary)
+                return
             file_path = CompressorUtils.validate_file(args.input_path)
-            huffman_coding = HuffmanCoding(file_path)
+            huffman_coding = HuffmanCoding(file_path, args.chunk_size, args.binary, args.jobs, args.block_size, args.sync_interval)
             huffman_coding.compress(args.output_path)
 
-            print(f"Compressing file {args.input_path} to {args.output_path}...")
+            print(f"Compressing file {args.input_path} to {args.output_path}...", file=messages)
         elif args.command == "decompress":
+            for option, value in (("--offset", args.offset), ("--length", args.length)):
+                if value is not None and value < 0:
+                    decompress_parser.error(f"{option} cannot be negative")
+            if args.input_path == '-':
+                with open_stream(args.output_path, 'wb', stdout) as output_stream:
+                    AdaptiveHuffmanCoding().decompress_stream(sys.stdin.buffer, output_stream)
+                print(f"Decompressed stdin to {args.output_path}.", file=messages)
+                return
             file_path = CompressorUtils.validate_file(args.input_path)
             if not file_path.endswith('.huff'):
-                print(f"Error: Input file '{file_path}' does not appear to be a valid compressed file.")
+                print(f"Error: Input file '{file_path}' does not appear to be a valid compressed file.", file=messages)
+                sys.exit(1)
+            if args.output_path == '-' and (args.member or DecompressorUtils.read_format_version(file_path) == FORMAT_V4):
+                # Archives are extracted into a directory, one file per member
+                decompress_parser.error("archives cannot be extracted to stdout")
+            if args.block is not None:
+                block = ParallelHuffmanCoding.read_block(file_path, args.block)
+                DecompressorUtils.write_chunks_to_file([block], output, isinstance(block, bytes))
+                print(f"Decompressing block {args.block} of {args.input_path} to {args.output_path}...", file=messages)
+                return
+            if args.member:
+                HuffmanArchive(file_path, args.chunk_size).extract(args.output_path, args.member)
+                print(f"Extracting {len(args.member)} members of {args.input_path} to {args.output_path}...", file=messages)
+                return
+            if args.offset is not None or args.length is not None:
+                offset = args.offset or 0
+                with HuffmanReader(file_path) as reader:
+                    reader.seek(offset)
+                    data = reader.read(-1 if args.length is None else args.length)
+                DecompressorUtils.write_chunks_to_file([data], output, binary=True)
+                print(f"Decompressing {len(data)} bytes at offset {offset} of {args.input_path} to {args.output_path}...", file=messages)
+                return
+            huffman_coding = HuffmanCoding(file_path, args.chunk_size, jobs=args.jobs)
+            huffman_coding.decompress(args.input_path, output)
+            print(f"Decompressing file {args.input_path} to {args.output_path}...", file=messages)
+        elif args.command == "train":
+            sample_paths = [path for pattern in args.samples for _, path in collect_files(pattern)]
+            if not sample_paths:
+                print("Error: No sample files found.", file=messages)
                 sys.exit(1)
-            huffman_coding = HuffmanCoding(file_path)
-            huffman_coding.decompress(args.input_path, args.output_path)
-            print(f"Decompressing file {args.input_path} to {args.output_path}...")
+            HuffmanDictionary.train(sample_paths).save(args.output)
+            print(f"Trained dictionary on {len(sample_paths)} files and saved it to {args.output}", file=messages)
+        elif args.command == "bench":
+            from benchmarks import suite
+            suite_parser = argparse.ArgumentParser(prog=f"{parser.prog} bench", description="Benchmark each compression stage on synthetic corpora.")
+            suite.add_arguments(suite_parser)
+            suite.run(suite_parser.parse_args(bench_arguments))
 
 
 if __name__ == '__main__':
     try:
         main()
     except Exception as e:
-        print(f"An error occurred: {e}")
+        print(f"An error occurred: {e}", file=sys.stderr)
         sys.exit(1)
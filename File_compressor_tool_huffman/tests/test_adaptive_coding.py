@@ -0,0 +1,83 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from huffman.adaptive_coding import AdaptiveHuffmanCoding, AdaptiveModel
+from huffman.huffman_coding import HuffmanCoding
+
+
+class TrickleStream(io.RawIOBase):
+    """A stream that hands out at most a few bytes per read, like a slow pipe."""
+    def __init__(self, data, piece_size):
+        self.data = data
+        self.piece_size = piece_size
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def read1(self, size=-1):
+        piece = self.data[self.position:self.position + min(size, self.piece_size)]
+        self.position += len(piece)
+        return piece
+
+
+class TestAdaptiveHuffmanCoding(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(0)
+        self.data = ''.join(generator.choices('aaaabbbcc d\n', k=50_000)).encode('ascii') + bytes(range(256))
+
+    def compress(self, stream, frame_size=4096):
+        output = io.BytesIO()
+        AdaptiveHuffmanCoding(frame_size).compress_stream(stream, output)
+        return output.getvalue()
+
+    def test_round_trip(self):
+        compressed = self.compress(io.BytesIO(self.data))
+        output = io.BytesIO()
+        AdaptiveHuffmanCoding().decompress_stream(io.BytesIO(compressed), output)
+
+        self.assertEqual(output.getvalue(), self.data)
+        self.assertLess(len(compressed), len(self.data) * 0.6)
+
+    def test_round_trip_with_small_reads(self):
+        compressed = self.compress(TrickleStream(self.data, 777))
+        frames = list(AdaptiveHuffmanCoding().iter_decompress(io.BytesIO(compressed)))
+
+        self.assertEqual(b''.join(frames), self.data)
+        self.assertTrue(all(len(frame) <= 777 for frame in frames))
+
+    def test_empty_stream(self):
+        compressed = self.compress(io.BytesIO(b''))
+        self.assertEqual(list(AdaptiveHuffmanCoding().iter_decompress(io.BytesIO(compressed))), [])
+
+    def test_truncated_stream(self):
+        compressed = self.compress(io.BytesIO(self.data))
+        with self.assertRaises(ValueError):
+            list(AdaptiveHuffmanCoding().iter_decompress(io.BytesIO(compressed[:-10])))
+
+    def test_model_rebuilds_codes(self):
+        model = AdaptiveModel()
+        self.assertEqual(len(model.tree.get_codes()[ord('a')]), 8)
+
+        model.update(b'a' * 10_000)
+        self.assertLess(len(model.tree.get_codes()[ord('a')]), 8)
+
+    def test_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'input.bin')
+            compressed_path = os.path.join(directory, 'input.huff')
+            output_path = os.path.join(directory, 'output.bin')
+            with open(input_path, 'wb') as file:
+                file.write(self.data)
+
+            HuffmanCoding(input_path, adaptive=True).compress(compressed_path)
+            HuffmanCoding(compressed_path).decompress(compressed_path, output_path)
+
+            with open(output_path, 'rb') as file:
+                self.assertEqual(file.read(), self.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from huffman.archive import HuffmanArchive
+from huffman.dictionary import HuffmanDictionary, collect_files
+from huffman.huffman_coding import HuffmanCoding
+
+
+class TestHuffmanArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_directory = os.path.join(self.directory.name, 'events')
+        self.archive_path = os.path.join(self.directory.name, 'events.huff')
+        self.output_directory = os.path.join(self.directory.name, 'output')
+        self.files = {
+            'a.json': b'{"id": 1, "type": "click"}',
+            'b.json': b'{"id": 2, "type": "view", "name": "\xc3\xa9t\xc3\xa9"}',
+            'empty.json': b'',
+            'nested/c.json': b'{"id": 3, "type": "click"}\n',
+        }
+        for name, data in self.files.items():
+            path = os.path.join(self.input_directory, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_extracted(self, names):
+        for name in names:
+            with open(os.path.join(self.output_directory, *name.split('/')), 'rb') as file:
+                self.assertEqual(file.read(), self.files[name])
+
+    def test_collect_files_uses_relative_names(self):
+        self.assertEqual([name for name, _ in collect_files(self.input_directory)], sorted(self.files))
+        self.assertEqual([name for name, _ in collect_files(os.path.join(self.input_directory, '*.json'))], ['a.json', 'b.json', 'empty.json'])
+
+    def test_round_trip(self):
+        HuffmanArchive(self.archive_path).create(collect_files(self.input_directory))
+        HuffmanCoding(self.archive_path).decompress(self.archive_path, self.output_directory)
+
+        self.assertEqual(list(HuffmanArchive(self.archive_path).read_index()), sorted(self.files))
+        self.assert_extracted(self.files)
+
+    def test_round_trip_with_trained_dictionary(self):
+        dictionary_path = os.path.join(self.directory.name, 'events.huffdict')
+        HuffmanDictionary.train([os.path.join(self.input_directory, 'a.json')]).save(dictionary_path)
+        dictionary = HuffmanDictionary.load(dictionary_path)
+
+        self.assertEqual(len(dictionary.code_lengths), 256)
+
+        HuffmanArchive(self.archive_path).create(collect_files(self.input_directory), dictionary)
+        HuffmanArchive(self.archive_path).extract(self.output_directory, ['b.json'])
+
+        self.assert_extracted(['b.json'])
+        self.assertFalse(os.path.exists(os.path.join(self.output_directory, 'a.json')))
+        self.assertEqual(b''.join(HuffmanArchive(self.archive_path).iter_member('nested/c.json')), self.files['nested/c.json'])
+
+    def test_rejects_unsafe_member_names(self):
+        with self.assertRaises(ValueError):
+            HuffmanArchive._member_output_path(self.output_directory, '../escape.json')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from benchmarks import suite
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_corpora_have_requested_size(self):
+        for name, (generator, binary) in suite.CORPORA.items():
+            data = generator(1000, random.Random(0))
+            self.assertLessEqual(abs(len(data) - 1000), 4, name)
+            if not binary:
+                data.decode('utf-8')
+
+    def test_report_covers_every_stage(self):
+        report = suite.run_suite(['skewed', 'binary'], 5000, repeat=1)
+
+        self.assertEqual([result['corpus'] for result in report['results']], ['skewed', 'binary'])
+        for result in report['results']:
+            self.assertEqual(tuple(result['stages']), suite.STAGES)
+            self.assertLess(result['ratio'], 1)
+            self.assertIsNotNone(result['stages']['encode_text']['peak_memory_bytes'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(report, file)
+            with open(path, 'r', encoding='utf-8') as file:
+                self.assertIn('% speed', suite.format_report(report, json.load(file)))
+
+
+if __name__ == "__main__":
+    unittest.main()
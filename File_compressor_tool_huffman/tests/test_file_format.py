@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+from huffman.compressor_utils import CompressorUtils
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.file_format import FLAG_SYNC_INDEX
+from huffman.huffman_coding import HuffmanCoding
+from huffman.table_decoder import TableDecoder
+from huffman.tree import HuffmanTree
+
+
+class TestFileFormat(unittest.TestCase):
+    def setUp(self):
+        self.text = "abracadabra, héllo wörld"
+        self.frequency_table = Counter(self.text)
+        handle, self.path = tempfile.mkstemp(suffix='.huff')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_reads_version_1_files(self):
+        tree = HuffmanTree(self.frequency_table)
+        tree.build_tree()
+        tree.generate_codes()
+        encoded = CompressorUtils.encode_text(self.text, tree.get_codes())
+        CompressorUtils.write_header_with_compressed_data(self.path, self.frequency_table, encoded)
+
+        tree, compressed_data = DecompressorUtils.read_header_and_data(self.path)
+
+        self.assertEqual(TableDecoder(tree).decode(compressed_data), self.text)
+
+    def test_reads_version_2_files(self):
+        tree = HuffmanTree(self.frequency_table)
+        tree.build_tree()
+        tree.generate_codes()
+        tree.make_canonical()
+        encoded = CompressorUtils.encode_text(self.text, tree.get_codes())
+        CompressorUtils.write_code_lengths_header_with_compressed_data(self.path, tree.get_code_lengths(), encoded)
+
+        tree, compressed_data = DecompressorUtils.read_header_and_data(self.path)
+
+        self.assertEqual(TableDecoder(tree).decode(compressed_data), self.text)
+
+    def test_version_2_header_is_smaller(self):
+        text = "hello world"
+        frequency_table = Counter(text)
+        tree = HuffmanTree(frequency_table)
+        tree.build_tree()
+        tree.generate_codes()
+        encoded = CompressorUtils.encode_text(text, tree.get_codes())
+        CompressorUtils.write_header_with_compressed_data(self.path, frequency_table, encoded)
+        v1_size = os.path.getsize(self.path)
+
+        # Canonical codes have the same lengths, so the payloads are the same size
+        tree.make_canonical()
+        encoded = CompressorUtils.encode_text(text, tree.get_codes())
+        CompressorUtils.write_code_lengths_header_with_compressed_data(self.path, tree.get_code_lengths(), encoded)
+
+        self.assertLess(os.path.getsize(self.path), v1_size)
+
+    def test_small_file_has_no_sync_index(self):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(self.text)
+        compressed_path = self.path + '.huff'
+        self.addCleanup(os.remove, compressed_path)
+
+        HuffmanCoding(self.path).compress(compressed_path)
+
+        with open(compressed_path, 'rb') as file:
+            _, serialized_header = DecompressorUtils.read_raw_header(file)
+        self.assertFalse(serialized_header[0] & FLAG_SYNC_INDEX)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from huffman import bit_packing
+from huffman.bit_packing import CodePacker, pack_bits, unpack_bits
+from huffman.bit_writer import BitWriter
+from huffman.huffman_coding import HuffmanCoding
+
+
+class TestBitWriter(unittest.TestCase):
+    def test_packs_bits_across_writes(self):
+        output = io.BytesIO()
+        writer = BitWriter(output)
+        writer.write('101')
+        writer.write('10000')
+        writer.write('1111')
+        padding = writer.flush()
+
+        self.assertEqual(output.getvalue(), bytes([0b10110000, 0b11110000]))
+        self.assertEqual(padding, 4)
+        self.assertEqual(writer.bits_written, 12)
+
+    def test_packed_writes_match_string_writes(self):
+        packer = CodePacker({'a': '0', 'b': '10', 'c': '11'})
+        output = io.BytesIO()
+        writer = BitWriter(output)
+        for chunk in ("abc", "cab", "b"):
+            writer.write_packed(*packer.encode(chunk))
+        writer.flush()
+
+        self.assertEqual(output.getvalue(), pack_bits('01011' + '11010' + '10'))
+
+
+class TestBitPacking(unittest.TestCase):
+    def test_pack_and_unpack(self):
+        bits = '1' + '0' * 15 + '101'
+        packed = pack_bits(bits)
+
+        self.assertEqual(packed, bytes([0b10000000, 0b00000000, 0b10100000]))
+        self.assertEqual(unpack_bits(packed)[:len(bits)], bits)
+        self.assertEqual(unpack_bits(b'\x00\x01'), '0000000000000001')
+
+    def test_code_packer_matches_joined_codes(self):
+        # Codes of up to 70 bits, so some straddle 64-bit words and the longest skip NumPy
+        text_codes = {chr(0x41 + i): '1' * i + '0' for i in range(70)}
+        byte_codes = {byte: '1' * (byte % 40) + '0' for byte in range(0, 256, 3)}
+        text = ''.join(chr(0x41 + i * 7 % 64) for i in range(1000))
+        data = bytes(range(0, 256, 3)) * 5
+        for numpy in (None, bit_packing.numpy):
+            with self.subTest(numpy=numpy), mock.patch.object(bit_packing, 'numpy', numpy):
+                for codes, binary, chunk in ((text_codes, False, text), ({k: text_codes[k] for k in text}, False, text), (byte_codes, True, data)):
+                    bits = ''.join(codes[symbol] for symbol in chunk)
+                    self.assertEqual(CodePacker(codes, binary).encode(chunk), (pack_bits(bits), len(bits)))
+                self.assertEqual(CodePacker({'a': '0'}).encode(''), (b'', 0))
+                with self.assertRaises(KeyError):
+                    CodePacker({'a': '0', 'b': '1'}).encode('abc')
+
+
+class TestHuffmanCoding(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, 'input.txt')
+        self.compressed_path = os.path.join(self.directory.name, 'input.huff')
+        self.output_path = os.path.join(self.directory.name, 'output.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def round_trip(self, text, chunk_size):
+        with open(self.input_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+        HuffmanCoding(self.input_path, chunk_size).compress(self.compressed_path)
+        HuffmanCoding(self.compressed_path, chunk_size).decompress(self.compressed_path, self.output_path)
+
+        with open(self.output_path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def test_round_trip_with_small_chunks(self):
+        text = "Streaming Huffman coding, ünïcödé included.\n" * 200
+        self.assertEqual(self.round_trip(text, chunk_size=7), text)
+
+    def test_round_trip_single_character(self):
+        text = "x" * 1000
+        self.assertEqual(self.round_trip(text, chunk_size=64), text)
+
+    def test_round_trip_binary_data(self):
+        data = bytes(range(256)) * 20 + b'\x00\xff\r\n' * 100
+        with open(self.input_path, 'wb') as file:
+            file.write(data)
+
+        HuffmanCoding(self.input_path, chunk_size=100, binary=True).compress(self.compressed_path)
+        HuffmanCoding(self.compressed_path, chunk_size=100).decompress(self.compressed_path, self.output_path)
+
+        with open(self.output_path, 'rb') as file:
+            self.assertEqual(file.read(), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
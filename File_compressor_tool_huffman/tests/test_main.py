@@ -1,8 +1,14 @@
+import os
 import unittest
 from collections import Counter
-from main import calculate_character_frequency
+from huffman.compressor_utils import CompressorUtils
 
 class TestCharacterFrequency(unittest.TestCase):
+    def tearDown(self):
+        for path in ("test_input.txt", "empty.txt"):
+            if os.path.exists(path):
+                os.remove(path)
+
     def test_frequency_with_sample_data(self):
         # Simulate input data
         data = "aaabbcXttttt"
@@ -13,7 +19,7 @@ class TestCharacterFrequency(unittest.TestCase):
             file.write(data)
 
         # Calculate frequency
-        actual_frequency = calculate_character_frequency("test_input.txt")
+        actual_frequency = CompressorUtils.calculate_character_frequency("test_input.txt")
 
         # Assert the expected result
         self.assertEqual(actual_frequency, expected_frequency)
@@ -25,7 +31,7 @@ class TestCharacterFrequency(unittest.TestCase):
 
         # Assert it raises an error
         with self.assertRaises(SystemExit):
-            calculate_character_frequency("empty.txt")
+            CompressorUtils.calculate_character_frequency("empty.txt")
 
 
 if __name__ == "__main__":
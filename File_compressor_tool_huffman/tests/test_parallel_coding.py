@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from huffman.huffman_coding import HuffmanCoding
+from huffman.parallel_coding import ParallelHuffmanCoding, split_blocks
+
+
+class TestParallelCoding(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, 'input.txt')
+        self.compressed_path = os.path.join(self.directory.name, 'input.huff')
+        self.output_path = os.path.join(self.directory.name, 'output.txt')
+        self.text = "Blöcks of tëxt\r\nwith ✓ multi-byte characters\n" * 40
+        with open(self.input_path, 'w', encoding='utf-8', newline='') as file:
+            file.write(self.text)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_split_blocks_keeps_characters_whole(self):
+        with open(self.input_path, 'rb') as file:
+            raw = file.read()
+
+        blocks = split_blocks(self.input_path, 7, binary=False)
+
+        self.assertEqual(blocks[0][0], 0)
+        self.assertEqual(blocks[-1][1], len(raw))
+        for start, end in blocks:
+            raw[start:end].decode('utf-8')
+            self.assertNotEqual(raw[start - 1:start + 1], b'\r\n')
+
+    def test_round_trip_with_workers(self):
+        HuffmanCoding(self.input_path, jobs=2, block_size=100).compress(self.compressed_path)
+        HuffmanCoding(self.compressed_path, jobs=2).decompress(self.compressed_path, self.output_path)
+
+        with open(self.output_path, 'r', encoding='utf-8') as file:
+            self.assertEqual(file.read(), self.text.replace('\r\n', '\n'))
+
+    def test_read_single_block(self):
+        ParallelHuffmanCoding(self.input_path, block_size=64, binary=True).compress(self.compressed_path)
+        _, _, index = ParallelHuffmanCoding.read_container(self.compressed_path)
+        with open(self.input_path, 'rb') as file:
+            raw = file.read()
+
+        blocks = [ParallelHuffmanCoding.read_block(self.compressed_path, number) for number in range(len(index))]
+
+        self.assertGreater(len(index), 1)
+        self.assertEqual(b''.join(blocks), raw)
+        self.assertEqual([length for _, _, _, length in index], [len(block) for block in blocks])
+
+
+if __name__ == "__main__":
+    unittest.main()
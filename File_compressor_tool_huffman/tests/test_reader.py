@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from huffman.huffman_coding import HuffmanCoding
+from huffman.reader import HuffmanReader
+
+
+class TestHuffmanReader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, 'input.txt')
+        self.compressed_path = os.path.join(self.directory.name, 'input.huff')
+        self.output_path = os.path.join(self.directory.name, 'output.txt')
+        self.text = ''.join(f"line {number}: sëek ✓ here\n" for number in range(300))
+        with open(self.input_path, 'w', encoding='utf-8') as file:
+            file.write(self.text)
+        self.raw = self.text.encode('utf-8')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_ranges_across_sync_points(self):
+        HuffmanCoding(self.input_path, chunk_size=1000, sync_interval=37).compress(self.compressed_path)
+
+        with HuffmanReader(self.compressed_path) as reader:
+            self.assertEqual(reader.size, len(self.raw))
+            for offset, length in [(0, 10), (35, 5), (1234, 300), (len(self.raw) - 7, 50)]:
+                reader.seek(offset)
+                self.assertEqual(reader.read(length), self.raw[offset:offset + length])
+                self.assertEqual(reader.tell(), min(offset + length, len(self.raw)))
+
+            reader.seek(-20, os.SEEK_END)
+            self.assertEqual(reader.read(), self.raw[-20:])
+            self.assertEqual(reader.read(5), b'')
+
+    def test_read_binary_file(self):
+        data = bytes(range(256)) * 20
+        with open(self.input_path, 'wb') as file:
+            file.write(data)
+        HuffmanCoding(self.input_path, binary=True, sync_interval=100).compress(self.compressed_path)
+
+        with HuffmanReader(self.compressed_path) as reader:
+            reader.seek(2000)
+            self.assertEqual(reader.read(1000), data[2000:3000])
+
+    def test_read_without_sync_index(self):
+        HuffmanCoding(self.input_path, sync_interval=0).compress(self.compressed_path)
+
+        with HuffmanReader(self.compressed_path) as reader:
+            reader.seek(500)
+            self.assertEqual(reader.read(100), self.raw[500:600])
+            self.assertEqual(reader.size, len(self.raw))
+
+    def test_negative_sync_interval_writes_payload(self):
+        HuffmanCoding(self.input_path, sync_interval=-1).compress(self.compressed_path)
+        HuffmanCoding(self.compressed_path).decompress(self.compressed_path, self.output_path)
+
+        with open(self.output_path, 'r', encoding='utf-8') as file:
+            self.assertEqual(file.read(), self.text)
+
+    def test_decompress_ignores_sync_index(self):
+        HuffmanCoding(self.input_path, chunk_size=1000, sync_interval=37).compress(self.compressed_path)
+        HuffmanCoding(self.compressed_path).decompress(self.compressed_path, self.output_path)
+
+        with open(self.output_path, 'r', encoding='utf-8') as file:
+            self.assertEqual(file.read(), self.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from collections import Counter
+from huffman.compressor_utils import CompressorUtils
+from huffman.decompressor_utils import DecompressorUtils
+from huffman.table_decoder import TableDecoder
+from huffman.tree import HuffmanTree
+
+
+def build_tree(text):
+    tree = HuffmanTree(Counter(text))
+    tree.build_tree()
+    tree.generate_codes()
+    return tree
+
+
+def encode(text, tree):
+    return CompressorUtils.get_byte_arary(CompressorUtils.encode_text(text, tree.get_codes()))
+
+
+class TestTableDecoder(unittest.TestCase):
+    def test_matches_string_decoder(self):
+        text = "the quick brown fox jumps over the lazy dog " * 50
+        tree = build_tree(text)
+        payload = encode(text, tree)
+
+        expected = DecompressorUtils.decode_text(DecompressorUtils.get_binary_string(payload), tree.reverse_codes)
+        self.assertEqual(TableDecoder(tree).decode(payload), expected)
+
+    def test_codes_longer_than_table(self):
+        # Fibonacci frequencies give a maximally skewed tree with long codes
+        frequencies = [1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144]
+        text = ''.join(chr(ord('a') + i) * freq for i, freq in enumerate(frequencies))
+        tree = build_tree(text)
+
+        self.assertEqual(TableDecoder(tree, table_bits=4).decode(encode(text, tree)), text)
+
+    def test_single_character(self):
+        text = "aaaaaaaaaaaaaaaaaaaaaaaaa"
+        tree = build_tree(text)
+
+        self.assertEqual(TableDecoder(tree).decode(encode(text, tree)), text)
+
+    def test_unicode(self):
+        text = "héllo wörld ✓ 你好 " * 20
+        tree = build_tree(text)
+
+        self.assertEqual(TableDecoder(tree).decode(encode(text, tree)), text)
+
+    def test_byte_symbols(self):
+        data = bytes(range(256)) + b"\x00\xff" * 40
+        tree = HuffmanTree(Counter(data))
+        tree.build_tree()
+        tree.generate_codes()
+        payload = CompressorUtils.get_byte_arary(''.join(tree.get_codes()[byte] for byte in data))
+
+        self.assertEqual(TableDecoder(tree, binary=True).decode(payload), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
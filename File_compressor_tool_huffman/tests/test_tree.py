@@ -21,7 +21,7 @@ class TestHuffmanTree(unittest.TestCase):
         # Verify total number of codes
         self.assertEqual(len(codes), len(frequency_table))
     
-    def test_basic_huffman_codes():
+    def test_basic_huffman_codes(self):
         frequency_table = Counter({'A': 5, 'B': 9, 'C': 12, 'D': 13, 'E': 16, 'F': 45})
         huffman_tree = HuffmanTree(frequency_table)
         
@@ -36,7 +36,7 @@ class TestHuffmanTree(unittest.TestCase):
         assert all(len(code) > 0 for code in codes.values())
         assert len(set(codes.values())) == len(frequency_table)
     
-    def test_single_character():
+    def test_single_character(self):
         frequency_table = Counter({'A': 10})
         huffman_tree = HuffmanTree(frequency_table)
         
@@ -47,7 +47,7 @@ class TestHuffmanTree(unittest.TestCase):
         # Single character should have a code of "0"
         assert codes == {'A': '0'}  
     
-    def test_empty_frequency_table():
+    def test_empty_frequency_table(self):
         frequency_table = Counter()
         huffman_tree = HuffmanTree(frequency_table)
         
@@ -55,9 +55,42 @@ class TestHuffmanTree(unittest.TestCase):
             huffman_tree.build_tree()
             huffman_tree.generate_codes()
         except ValueError as e:
-            assert str(e) == "Huffman tree has not been built yet."
+            assert str(e) == "Frequency table is empty. Cannot build Huffman tree."
         else:
             assert False, "Expected ValueError for empty frequency table."
 
+class TestCanonicalCodes(unittest.TestCase):
+    def test_canonical_codes_keep_lengths(self):
+        frequency_table = Counter({'A': 5, 'B': 9, 'C': 12, 'D': 13, 'E': 16, 'F': 45})
+        huffman_tree = HuffmanTree(frequency_table)
+        huffman_tree.build_tree()
+        huffman_tree.generate_codes()
+        code_lengths = huffman_tree.get_code_lengths()
+
+        huffman_tree.make_canonical()
+
+        self.assertEqual(huffman_tree.get_code_lengths(), code_lengths)
+        self.assertEqual(huffman_tree.get_codes(), {
+            'F': '0', 'C': '100', 'D': '101', 'E': '110', 'A': '1110', 'B': '1111'
+        })
+
+    def test_code_lengths_round_trip(self):
+        code_lengths = {'a': 1, 'é': 2, '你': 3, 'z': 3}
+        serialized = HuffmanTree.serialize_code_lengths(code_lengths)
+
+        self.assertEqual(HuffmanTree.deserialize_code_lengths(serialized), code_lengths)
+
+    def test_byte_code_lengths_round_trip(self):
+        code_lengths = {0: 2, 255: 2, 10: 2, 200: 2}
+        serialized = HuffmanTree.serialize_code_lengths(code_lengths, binary=True)
+
+        self.assertEqual(len(serialized), 1 + 2 + len(code_lengths))
+        self.assertEqual(HuffmanTree.deserialize_code_lengths(serialized, binary=True), code_lengths)
+
+    def test_from_code_lengths_rejects_invalid_lengths(self):
+        with self.assertRaises(ValueError):
+            HuffmanTree.from_code_lengths({'a': 1, 'b': 1, 'c': 1})
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,16 @@
+from .consistent_hash import ConsistentHashAlgorithm
+from .least_connections import LeastConnectionsAlgorithm
+from .peak_ewma import PeakEwmaAlgorithm
+from .power_of_two import PowerOfTwoChoicesAlgorithm
+from .round_robbin import RoundRobinAlgorithm
+from .weighted_round_robin import WeightedRoundRobinAlgorithm
+
+# Algorithms selectable by name, e.g. with lb.py --algorithm
+ALGORITHMS = {
+    "round_robin": RoundRobinAlgorithm,
+    "weighted_round_robin": WeightedRoundRobinAlgorithm,
+    "least_connections": LeastConnectionsAlgorithm,
+    "power_of_two": PowerOfTwoChoicesAlgorithm,
+    "peak_ewma": PeakEwmaAlgorithm,
+    "consistent_hash": ConsistentHashAlgorithm,
+}
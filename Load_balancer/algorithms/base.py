@@ -1,16 +1,33 @@
 from abc import ABC, abstractmethod
+from typing import Collection, Optional, Sequence
 
 class LoadBalancingAlgorithm(ABC):
     """Abstract class for load balancing algorithms."""
 
+    # Whether the algorithm routes on a key derived from each client or request
+    uses_key = False
+
     @abstractmethod
-    def get_next_server(self, active_servers: list):
+    def get_next_server(self, active_servers: Sequence, key: Optional[str] = None, exclude: Collection = ()):
         """Get the next server to serve a request.
 
         Args:
-            active_servers (list): List of active servers.
+            active_servers (ServerSnapshot): Snapshot of the active servers.
+            key (str): The routing key of the request, for algorithms that use one.
+            exclude (Collection): Servers to pass over, e.g. those that already failed the request.
+                Algorithms whose next pick moves on by itself may ignore it; the caller checks every pick.
 
         Returns:
             Server: The next server to serve a request.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def forget_servers(self, servers: Collection) -> None:
+        """Drop the state kept for servers that left the configuration, or the route pool the algorithm serves.
+
+        Called once the health checker has published a snapshot without them. Algorithms that
+        keep no state per server need not override it.
+
+        Args:
+            servers (Collection): The servers that were removed.
+        """
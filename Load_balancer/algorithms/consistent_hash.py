@@ -0,0 +1,148 @@
+from .base import LoadBalancingAlgorithm
+import bisect
+import hashlib
+import math
+import os
+import threading
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+from backend.backend_server import BackendServer
+from core.config import HASH_LOAD_FACTOR, HASH_VIRTUAL_NODES
+
+def hash_key(key: str) -> int:
+    """Map a string to a 64-bit position on the ring."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+class ConsistentHashAlgorithm(LoadBalancingAlgorithm):
+    """Consistent hashing with bounded loads for load balancing.
+
+    Each server owns `HASH_VIRTUAL_NODES` points per unit of weight on a hash ring, and a request
+    goes to the first server clockwise from the hash of its key (client address, header or cookie),
+    so a client keeps reaching the same server and its cache. A server that already has more than
+    `HASH_LOAD_FACTOR` times its fair share of connections is skipped for the next one on the
+    ring, which keeps hot keys from overloading a server; so is a server at its in-flight limit.
+    When servers become healthy or unhealthy, only their points are added to or removed from the ring.
+    """
+
+    uses_key = True
+
+    def __init__(self, virtual_nodes: int = HASH_VIRTUAL_NODES, load_factor: float = HASH_LOAD_FACTOR) -> None:
+        if load_factor < 1:
+            raise ValueError("The load factor must be at least 1")
+
+        self.virtual_nodes = virtual_nodes
+        self.load_factor = load_factor
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        # Sorted point hashes and the server owning each point, swapped together
+        self._ring: Tuple[List[int], List[BackendServer]] = ([], [])
+        # Points of every server seen so far, so a server coming back is not hashed again
+        self._points: Dict[BackendServer, List[Tuple[int, BackendServer]]] = {}
+        self._total_weight = 0
+        # Connections of each server on the ring and their total, kept up to date by connection listeners
+        self._counted: Dict[BackendServer, int] = {}
+        self._total_connections = 0
+
+    def get_next_server(self, active_servers: Sequence[BackendServer], key: Optional[str] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
+        """Get the next server to serve a request.
+
+        Args:
+            active_servers (ServerSnapshot): Snapshot of the active servers.
+            key (str): The routing key; requests without one are spread at random.
+            exclude (Collection): Servers to pass over, as if they were overloaded.
+
+        Returns:
+            Server: The first server clockwise from the key that is neither overloaded, saturated
+                nor excluded, else the first one that is not saturated or excluded.
+        """
+        if not active_servers:
+            return None
+        if self._version is None or active_servers.version > self._version:
+            self._update_ring(active_servers)
+
+        hashes, owners = self._ring
+        if not hashes:
+            # Every server on the ring was removed, and the snapshot without them is still on its way
+            return None
+        position = hash_key(key) if key is not None else int.from_bytes(os.urandom(8), "big")
+        index = bisect.bisect(hashes, position) % len(hashes)
+
+        # Capacity per unit of weight, counting the connection about to be opened
+        capacity = self.load_factor * (self._total_connections + 1) / self._total_weight
+        fallback = None
+        tried = set()
+        for step in range(len(hashes)):
+            server = owners[(index + step) % len(hashes)]
+            if server in tried:
+                continue
+            tried.add(server)
+            if server not in exclude and not server.is_saturated:
+                if server.num_connections < math.ceil(capacity * server.weight):
+                    return server
+                if fallback is None:
+                    fallback = server
+            if len(tried) == len(active_servers):
+                break
+        return fallback if fallback is not None else owners[index]
+
+    def _update_ring(self, active_servers: Sequence[BackendServer]) -> None:
+        """Add the points of newly active servers to the ring and remove those of inactive ones."""
+        with self._lock:
+            # A request may still hold an older snapshot, which could bring back forgotten servers
+            if self._version is not None and active_servers.version <= self._version:
+                return
+
+            hashes, owners = self._ring
+            points = list(zip(hashes, owners))
+            active = set(active_servers)
+            removed = {server for server in self._counted if server not in active}
+            if removed:
+                points = [point for point in points if point[1] not in removed]
+                for server in removed:
+                    self._total_connections -= self._counted.pop(server)
+
+            added = []
+            for server in active_servers:
+                if server not in self._counted:
+                    if server not in self._points:
+                        self._points[server] = self._server_points(server)
+                        server.add_connection_listener(self._on_connections_changed)
+                    added.extend(self._points[server])
+                    self._counted[server] = server.num_connections
+                    self._total_connections += server.num_connections
+            if added:
+                # Both runs are sorted, so this is a linear merge
+                added.sort(key=lambda point: point[0])
+                points = sorted(points + added, key=lambda point: point[0])
+
+            self._ring = ([point[0] for point in points], [point[1] for point in points])
+            self._total_weight = sum(server.weight for server in active_servers)
+            self._version = active_servers.version
+
+    def forget_servers(self, servers: Collection[BackendServer]) -> None:
+        """Remove the points, connection counts and listeners of servers that left the configuration.
+
+        Args:
+            servers (Collection): The servers that were removed.
+        """
+        with self._lock:
+            forgotten = {server for server in servers if server in self._points}
+            if not forgotten:
+                return
+            for server in forgotten:
+                del self._points[server]
+                server.remove_connection_listener(self._on_connections_changed)
+                if server in self._counted:
+                    self._total_connections -= self._counted.pop(server)
+                    self._total_weight -= server.weight
+            hashes, owners = self._ring
+            points = [point for point in zip(hashes, owners) if point[1] not in forgotten]
+            self._ring = ([point[0] for point in points], [point[1] for point in points])
+
+    def _server_points(self, server: BackendServer) -> List[Tuple[int, BackendServer]]:
+        return [(hash_key(f"{server.id}-{server.host}:{server.port}-{replica}"), server) for replica in range(self.virtual_nodes * server.weight)]
+
+    def _on_connections_changed(self, server: BackendServer) -> None:
+        with self._lock:
+            if server in self._counted:
+                self._total_connections += server.num_connections - self._counted[server]
+                self._counted[server] = server.num_connections
@@ -0,0 +1,136 @@
+from .base import LoadBalancingAlgorithm
+import itertools
+import threading
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+from backend.backend_server import BackendServer
+
+class LeastConnectionsAlgorithm(LoadBalancingAlgorithm):
+    """Weighted least-connections algorithm for load balancing.
+
+    Picks the server with the fewest open connections per unit of weight. The active servers are
+    kept in an indexed min-heap that servers update through their connection listeners, so
+    selecting a server and counting a connection both take O(log n). Ties go to the server
+    picked least recently.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._heap: List[BackendServer] = []
+        self._positions: Dict[BackendServer, int] = {}
+        self._keys: Dict[BackendServer, Tuple[float, int]] = {}
+        self._listening = set()
+        self._selections = itertools.count(1)
+
+    def get_next_server(self, active_servers: Sequence[BackendServer], key: Optional[str] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
+        """Get the next server to serve a request.
+
+        Args:
+            active_servers (ServerSnapshot): Snapshot of the active servers.
+            key (str): Ignored.
+            exclude (Collection): Servers to pass over.
+
+        Returns:
+            Server: The active server with the lowest load that is neither excluded nor at its
+                in-flight limit, or the least loaded one if there is none.
+        """
+        if not active_servers:
+            return None
+
+        with self._lock:
+            # A request may still hold an older snapshot, which could bring back forgotten servers
+            if self._version is None or active_servers.version > self._version:
+                self._rebuild(active_servers)
+            if not self._heap:
+                # Every server in the heap was removed, and the snapshot without them is still on its way
+                return None
+
+            server = self._heap[0]
+            if server in exclude or server.is_saturated:
+                # A failed server's load drops back when its connection closes, and a heavy server can
+                # reach its in-flight limit while still the least loaded, so the top can stay unusable
+                server = min((candidate for candidate in self._heap if candidate not in exclude and not candidate.is_saturated), key=self._keys.__getitem__, default=server)
+            # Move the chosen server behind servers with the same load until its new connection is counted
+            self._keys[server] = (self._keys[server][0], next(self._selections))
+            self._sift_down(self._positions[server])
+            return server
+
+    def _on_connections_changed(self, server: BackendServer) -> None:
+        """Reposition a server in the heap after its number of connections changed."""
+        with self._lock:
+            index = self._positions.get(server)
+            if index is None:
+                return
+            self._keys[server] = (self._load(server), self._keys[server][1])
+            self._sift_up(index)
+            self._sift_down(self._positions[server])
+
+    def forget_servers(self, servers: Collection[BackendServer]) -> None:
+        """Stop listening to the connections of servers that left the configuration.
+
+        Args:
+            servers (Collection): The servers that were removed.
+        """
+        with self._lock:
+            for server in servers:
+                if server in self._listening:
+                    self._listening.discard(server)
+                    server.remove_connection_listener(self._on_connections_changed)
+                index = self._positions.get(server)
+                if index is not None:
+                    self._remove_at(index)
+
+    def _remove_at(self, index: int) -> None:
+        """Remove the server at a position of the heap."""
+        last = len(self._heap) - 1
+        self._swap(index, last)
+        server = self._heap.pop()
+        del self._positions[server]
+        del self._keys[server]
+        if index < last:
+            moved = self._heap[index]
+            self._sift_up(index)
+            self._sift_down(self._positions[moved])
+
+    def _rebuild(self, active_servers: Sequence[BackendServer]) -> None:
+        """Build the heap for a new snapshot of active servers."""
+        self._version = active_servers.version
+        self._keys = {server: (self._load(server), self._keys.get(server, (0, 0))[1]) for server in active_servers}
+        self._heap = sorted(active_servers, key=self._keys.__getitem__)
+        self._positions = {server: index for index, server in enumerate(self._heap)}
+        for server in active_servers:
+            if server not in self._listening:
+                self._listening.add(server)
+                server.add_connection_listener(self._on_connections_changed)
+
+    @staticmethod
+    def _load(server: BackendServer) -> float:
+        return server.num_connections / server.weight
+
+    def _swap(self, i: int, j: int) -> None:
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._positions[heap[i]] = i
+        self._positions[heap[j]] = j
+
+    def _sift_up(self, index: int) -> None:
+        keys = self._keys
+        while index > 0:
+            parent = (index - 1) // 2
+            if keys[self._heap[index]] >= keys[self._heap[parent]]:
+                break
+            self._swap(index, parent)
+            index = parent
+
+    def _sift_down(self, index: int) -> None:
+        keys = self._keys
+        size = len(self._heap)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and keys[self._heap[child]] < keys[self._heap[smallest]]:
+                    smallest = child
+            if smallest == index:
+                return
+            self._swap(index, smallest)
+            index = smallest
@@ -0,0 +1,42 @@
+from .base import LoadBalancingAlgorithm
+from .power_of_two import sample_two
+import time
+from typing import Collection, Optional, Sequence, Tuple
+from backend.backend_server import BackendServer
+
+class PeakEwmaAlgorithm(LoadBalancingAlgorithm):
+    """Latency-aware algorithm for load balancing (power of two choices over peak-EWMA cost).
+
+    The cost of a server is its peak-EWMA time to first byte multiplied by its open connections
+    plus one, divided by its weight. Two servers are sampled at random and the cheaper one is
+    picked, so a backend that slows down loses traffic as soon as its first slow reply arrives,
+    while an idle backend's latency decays and it is probed again.
+    """
+
+    def get_next_server(self, active_servers: Sequence[BackendServer], key: Optional[str] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
+        """Get the next server to serve a request.
+
+        Args:
+            active_servers (ServerSnapshot): Snapshot of the active servers.
+            key (str): Ignored.
+            exclude (Collection): Ignored; the next pick samples again.
+
+        Returns:
+            Server: The cheaper of two randomly sampled servers.
+        """
+        if not active_servers:
+            return None
+        if len(active_servers) == 1:
+            return active_servers[0]
+
+        now = time.monotonic()
+        first, second = sample_two(active_servers)
+        if self._cost(second, now) < self._cost(first, now):
+            return second
+        return first
+
+    @staticmethod
+    def _cost(server: BackendServer, now: float) -> Tuple[float, float]:
+        # Servers without latency samples yet compare by their connections alone
+        load = (server.num_connections + 1) / server.weight
+        return server.first_byte_latency.get(now) * load, load
@@ -0,0 +1,41 @@
+from .base import LoadBalancingAlgorithm
+import random
+from typing import Collection, Optional, Sequence, Tuple
+from backend.backend_server import BackendServer
+
+def sample_two(servers: Sequence[BackendServer]) -> Tuple[BackendServer, BackendServer]:
+    """Pick two different servers at random, without building a list as random.sample does."""
+    first = random.randrange(len(servers))
+    second = random.randrange(len(servers) - 1)
+    if second >= first:
+        second += 1
+    return servers[first], servers[second]
+
+class PowerOfTwoChoicesAlgorithm(LoadBalancingAlgorithm):
+    """Power-of-two-choices algorithm for load balancing.
+
+    Samples two active servers at random and picks the one with fewer connections per unit of
+    weight. This is O(1) and needs no shared state, yet keeps the load almost as even as
+    least-connections.
+    """
+
+    def get_next_server(self, active_servers: Sequence[BackendServer], key: Optional[str] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
+        """Get the next server to serve a request.
+
+        Args:
+            active_servers (ServerSnapshot): Snapshot of the active servers.
+            key (str): Ignored.
+            exclude (Collection): Ignored; the next pick samples again.
+
+        Returns:
+            Server: The less loaded of two randomly sampled servers.
+        """
+        if not active_servers:
+            return None
+        if len(active_servers) == 1:
+            return active_servers[0]
+
+        first, second = sample_two(active_servers)
+        if second.num_connections * first.weight < first.num_connections * second.weight:
+            return second
+        return first
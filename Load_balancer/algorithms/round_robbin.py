@@ -1,18 +1,25 @@
 from .base import LoadBalancingAlgorithm
-from typing import List
+import itertools
+from typing import Collection, Optional, Sequence
 from backend.backend_server import BackendServer
 
 class RoundRobinAlgorithm(LoadBalancingAlgorithm):
-    """Round-robbin algorithm for load balancing."""
+    """Round-robbin algorithm for load balancing.
+
+    A shared counter is advanced atomically for each request (itertools.count is not interrupted
+    by other threads), so concurrent requests never get the same turn.
+    """
     
     def __init__(self) -> None:
-        self._last_server_index = 0
+        self._counter = itertools.count()
 
-    def get_next_server(self, active_servers: List[BackendServer]) -> BackendServer:
+    def get_next_server(self, active_servers: Sequence[BackendServer], key: Optional[str] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
         """Get the next server to serve a request.
 
         Args:
-            active_servers (list): List of active servers.
+            active_servers (ServerSnapshot): Snapshot of the active servers.
+            key (str): Ignored.
+            exclude (Collection): Ignored; the next turn goes to another server.
 
         Returns:
             Server: The next server to serve a request.
@@ -20,6 +27,4 @@ class RoundRobinAlgorithm(LoadBalancingAlgorithm):
         if not active_servers:
             return None
 
-        server = active_servers[self._last_server_index]
-        self._last_server_index = (self._last_server_index + 1) % len(active_servers)
-        return server
\ No newline at end of file
+        return active_servers[next(self._counter) % len(active_servers)]
\ No newline at end of file
@@ -0,0 +1,62 @@
+from .base import LoadBalancingAlgorithm
+import itertools
+from functools import reduce
+from math import gcd
+from typing import Collection, List, Optional, Sequence, Tuple
+from backend.backend_server import BackendServer
+
+class WeightedRoundRobinAlgorithm(LoadBalancingAlgorithm):
+    """Smooth weighted round-robin algorithm for load balancing (as in NGINX).
+
+    Each server is picked in proportion to its weight, and the picks of a heavy server are spread
+    out through the cycle instead of coming in a burst. One cycle of picks is computed once per
+    snapshot version, so each selection is O(1).
+    """
+
+    def __init__(self) -> None:
+        # The snapshot version the schedule was computed for, and the schedule, swapped together
+        self._schedule: Tuple[Optional[int], List[BackendServer]] = (None, [])
+        self._counter = itertools.count()
+
+    def get_next_server(self, active_servers: Sequence[BackendServer], key: Optional[str] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
+        """Get the next server to serve a request.
+
+        Args:
+            active_servers (ServerSnapshot): Snapshot of the active servers.
+            key (str): Ignored.
+            exclude (Collection): Ignored; the next turn goes to another server.
+
+        Returns:
+            Server: The next server in the weighted cycle.
+        """
+        if not active_servers:
+            return None
+
+        version, schedule = self._schedule
+        if version != active_servers.version:
+            schedule = self.build_schedule(active_servers)
+            self._schedule = (active_servers.version, schedule)
+        return schedule[next(self._counter) % len(schedule)]
+
+    @staticmethod
+    def build_schedule(servers: Sequence[BackendServer]) -> List[BackendServer]:
+        """Compute one full cycle of smooth weighted round robin.
+
+        Args:
+            servers (list): The servers to schedule.
+
+        Returns:
+            list: The servers in the order they are picked; each appears weight / gcd(weights) times.
+        """
+        divisor = reduce(gcd, (server.weight for server in servers))
+        weights = [server.weight // divisor for server in servers]
+        total = sum(weights)
+        current = [0] * len(servers)
+        schedule = []
+        for _ in range(total):
+            for index, weight in enumerate(weights):
+                current[index] += weight
+            best = max(range(len(servers)), key=current.__getitem__)
+            current[best] -= total
+            schedule.append(servers[best])
+        return schedule
@@ -1,57 +1,327 @@
+import logging
+import re
 import socket
 import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from core.config import POOL_ACQUIRE_TIMEOUT, UPSTREAM_RESPONSE_TIMEOUT
+from core.metrics import BackendMetrics, Counter
+from .circuit_breaker import OPEN, CircuitBreaker
+from .connection_pool import ConnectionPool
+from .forwarding import forward
+from .latency import PeakEwma
+from .http import NO_BODY, UNTIL_CLOSE, HttpRequest, HttpResponse, read_head, relay_body
+
+CONTINUE_RESPONSE = b"HTTP/1.1 100 Continue\r\n\r\n"
+EXPECT_HEADER = re.compile(rb"\r\nexpect:[^\r]*", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(Exception):
+    """Raised when a backend fails a request before any of its response was sent to the client."""
+
+
+class UpstreamConnectError(UpstreamError):
+    """Raised when no connection to a backend could be opened; nothing was sent, so another backend can take the request."""
+
+
+class UpstreamTimeoutError(UpstreamError):
+    """Raised when a backend did not respond in time."""
 
 
 class BackendServer:
-    def __init__(self, id: int, host: str, port: int) -> None:
+    def __init__(self, id: int, host: str, port: int, weight: int = 1, max_in_flight: Optional[int] = None) -> None:
+        if not isinstance(weight, int) or weight < 1:
+            raise ValueError(f"Weight of server {id} must be a positive integer, got {weight!r}")
+        if max_in_flight is not None and (not isinstance(max_in_flight, int) or max_in_flight < 1):
+            raise ValueError(f"max_in_flight of server {id} must be a positive integer, got {max_in_flight!r}")
+
         self.id = id
         self.host = host
         self.port = port
+        self.weight = weight
+        # Most connections (requests in HTTP mode) sent to this server at once; unlimited if None
+        self.max_in_flight = max_in_flight
         self.is_alive = True
         self.lock = threading.Lock()
         self.num_connections = 0
-    
-    def connect(self) -> None:
-        self.backend_conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.backend_conn.connect((self.host, self.port))
-    
+        self.pool = ConnectionPool(host, port)
+        self._connection_listeners: List[Callable[["BackendServer"], None]] = []
+        # Seconds from sending a request to the first byte of the response, and to its end
+        self.first_byte_latency = PeakEwma()
+        self.response_latency = PeakEwma()
+        self.metrics = BackendMetrics(f"{host}:{port}")
+        # Seconds to wait for the head of a response (HTTP mode)
+        self.response_timeout = UPSTREAM_RESPONSE_TIMEOUT
+        # Opened by failures of live requests, so a failing server is ejected before health checks notice
+        self.breaker = CircuitBreaker()
+        self.breaker.add_listener(self._breaker_changed)
+
+    def add_connection_listener(self, listener: Callable[["BackendServer"], None]) -> None:
+        """
+        Register a callback run with this server whenever its number of connections changes.
+
+        :param listener: The callback. It runs on the thread that opened or closed the connection.
+        """
+        self._connection_listeners.append(listener)
+
+    def remove_connection_listener(self, listener: Callable[["BackendServer"], None]) -> None:
+        """
+        Unregister a callback registered with `add_connection_listener`.
+
+        :param listener: The callback.
+        """
+        # Replaced rather than changed in place, so a connection counted meanwhile iterates over a stable list
+        self._connection_listeners = [registered for registered in self._connection_listeners if registered != listener]
+
+    @property
+    def is_saturated(self) -> bool:
+        """Whether the server already has as many connections as it accepts."""
+        return self.max_in_flight is not None and self.num_connections >= self.max_in_flight
+
+    def connection_opened(self) -> None:
+        """Count a client connection that is now being served by this server."""
+        self._change_connections(1)
+
+    def connection_closed(self) -> None:
+        """Stop counting a client connection counted with `connection_opened`."""
+        self._change_connections(-1)
+
+    def record_latency(self, first_byte: float, total: Optional[float] = None) -> None:
+        """
+        Record how long the backend took to answer a request.
+
+        :param first_byte: Seconds until the first byte of the response arrived.
+        :param total: Seconds until the whole response arrived, if known.
+        """
+        self.first_byte_latency.observe(first_byte)
+        if total is not None:
+            self.response_latency.observe(total)
+
+    def _change_connections(self, delta: int) -> None:
+        with self.lock:
+            self.num_connections += delta
+        for listener in self._connection_listeners:
+            listener(self)
+
+    def _breaker_changed(self, state: str) -> None:
+        if state == OPEN:
+            self.metrics.breaker_opened.inc()
+            # Pooled connections to a failing server are most likely broken too
+            self.pool.clear()
+            logger.warning("Circuit breaker of %s:%d opened; no requests are sent to it for %gs.", self.host, self.port, self.breaker.current_open_time)
+        else:
+            self.metrics.breaker_closed.inc()
+            logger.info("Circuit breaker of %s:%d closed.", self.host, self.port)
+
+    def connect(self) -> socket.socket:
+        """
+        Open a new, unpooled connection to the backend.
+
+        :raises UpstreamConnectError: If the connection could not be opened.
+        """
+        try:
+            conn = self.pool.connect()
+        except OSError as e:
+            raise self._connect_failed(e) from e
+        self.breaker.record_success()
+        return conn
+
+    def _acquire(self) -> Tuple[socket.socket, bool]:
+        """
+        Take a pooled connection to the backend, or open a new one.
+
+        :raises UpstreamConnectError: If a new connection could not be opened.
+        :raises PoolExhaustedError: If the pool stayed at its limit for `POOL_ACQUIRE_TIMEOUT` seconds.
+        """
+        try:
+            return self.pool.acquire(POOL_ACQUIRE_TIMEOUT)
+        except OSError as e:
+            raise self._connect_failed(e) from e
+
+    def _connect_failed(self, error: OSError) -> UpstreamConnectError:
+        """Record a failed connection attempt and return the error to raise for it."""
+        self.metrics.connect_failures.inc()
+        self.breaker.record_failure()
+        return UpstreamConnectError(f"Cannot connect to {self.host}:{self.port} - {error}")
+
     def update_health_status(self, is_alive: bool) -> None:
         with self.lock:
             self.is_alive = is_alive
-    
-    def handle_connections(self, client_conn: socket.socket) -> None:
-        def forward_request(source: socket.socket, destination: socket.socket, log: bool = False) -> None:
-            with self.lock:
-                self.num_connections += 1
-            
-            try:
-                while True:
-                    data = source.recv(1024)
-                    if len(data) == 0:
-                        break
-                        
-                    if log:
-                        print(f"Received request from {source.getpeername()[0]}")
-                        print(data.decode("utf-8", errors="ignore"))
-
-                    destination.send(data)
-            except Exception as e:
-                 print(f"Connection error: {e}")
-            finally:
-                with self.lock:
-                    self.num_connections -= 1
-        
+
+        if is_alive:
+            # Passing health checks again outweighs the failures that opened the breaker
+            self.breaker.reset()
+            self.pool.evict_expired()
+        else:
+            self.pool.clear()
+
+    def handle_connections(self, client_conn: socket.socket, log: bool = False) -> None:
+        """
+        Relay a client connection to the backend as a raw byte stream, one thread per direction.
+
+        :param client_conn: The client connection.
+        :param log: Whether to log what the client sends.
+        :raises UpstreamConnectError: If no connection to the backend could be opened; the client connection is left open.
+        """
         if not self.is_alive:
             return
-        
-        self.connect()
-        client2backend_thread = threading.Thread(target=forward_request, args=(client_conn, self.backend_conn, True))
-        backend2client_thread = threading.Thread(target=forward_request, args=(self.backend_conn, client_conn))
-        client2backend_thread.start()
+
+        # Each client gets its own backend socket; it is never stored on the shared instance
+        backend_conn = self.connect()
+        self.connection_opened()
+        self.metrics.requests.inc()
+
+        # Only the first request of a raw stream can be timed, from its first byte to the reply's first byte
+        request_sent_at = None
+
+        def request_started() -> None:
+            nonlocal request_sent_at
+            request_sent_at = time.monotonic()
+
+        def response_started() -> None:
+            if request_sent_at is not None:
+                self.record_latency(time.monotonic() - request_sent_at)
+
+        def relay_response() -> None:
+            self.metrics.received_bytes.inc(forward(backend_conn, client_conn, False, response_started))
+
+        try:
+            backend2client_thread = threading.Thread(target=relay_response)
+            backend2client_thread.start()
+            self.metrics.sent_bytes.inc(forward(client_conn, backend_conn, log, request_started))
+            backend2client_thread.join()
+        finally:
+            self.connection_closed()
+            client_conn.close()
+            backend_conn.close()
+
+    def handle_request(self, client_conn: socket.socket, request: HttpRequest, buffer: bytearray) -> bool:
+        """
+        Proxy one HTTP/1.x request over a pooled backend connection.
+
+        The request is counted as a connection of this server while it is in flight, and the
+        backend connection goes back to the pool when the response ends at a message boundary.
+
+        :param client_conn: The client connection.
+        :param request: The request, whose head was already read from the client.
+        :param buffer: Bytes already read from the client after that head; on return it holds those after the request.
+        :return: True if the client connection can carry another request.
+        :raises UpstreamConnectError: If no connection to the backend could be opened; nothing was read from or sent to the client.
+        :raises UpstreamError: If the backend failed before any of its response was sent to the client.
+        """
+        self.connection_opened()
+        try:
+            return self._proxy_request(client_conn, request, buffer)
+        finally:
+            self.connection_closed()
+
+    def _proxy_request(self, client_conn: socket.socket, request: HttpRequest, buffer: bytearray) -> bool:
+        """
+        Forward one request and its response.
+
+        :return: True if the client connection can carry another request.
+        """
+        # Connected before the client is told to go on, so a failed connection can be retried elsewhere
+        backend_conn, reused = self._acquire()
+        head = request.head
+        if "100-continue" in request.headers.get("expect", "").lower():
+            # Answer the expectation here so the body is sent straight away
+            try:
+                client_conn.sendall(CONTINUE_RESPONSE)
+            except BaseException:
+                # Nothing was sent on the backend connection yet, so it can serve another request
+                self.pool.release(backend_conn)
+                raise
+            head = EXPECT_HEADER.sub(b"", head)
+
+        self.metrics.requests.inc()
+        # Requests without a body can be resent if a pooled connection turns out to be closed
+        attempts = 2 if request.body_framing() == NO_BODY else 1
+        for attempt in range(attempts):
+            if attempt > 0:
+                backend_conn, reused = self._acquire()
+            response_buffer = bytearray()
+            sent_at = time.monotonic()
+            # Errors while the body is relayed may be the client's, so they do not count against the backend
+            relaying_body = False
+            succeeded = False
+            try:
+                backend_conn.settimeout(self.response_timeout)
+                backend_conn.sendall(head)
+                relaying_body = True
+                sent = len(head) + relay_body(client_conn, backend_conn, buffer, request)
+                relaying_body = False
+                response = self._read_response(backend_conn, response_buffer, request)
+                first_byte_at = time.monotonic()
+                # Responses may take as long as they need once they have started
+                backend_conn.settimeout(None)
+                succeeded = True
+                break
+            except socket.timeout as e:
+                # The client connection has no timeout while a request is relayed, so the backend timed out
+                self.metrics.timeout_failures.inc()
+                self.breaker.record_failure()
+                raise UpstreamTimeoutError(f"{self.host}:{self.port} did not respond within {self.response_timeout}s") from e
+            except ConnectionError as e:
+                if not reused or attempt + 1 == attempts:
+                    if relaying_body:
+                        raise
+                    self.metrics.reset_failures.inc()
+                    self.breaker.record_failure()
+                    raise UpstreamError(f"{self.host}:{self.port} closed the connection - {e}") from e
+            finally:
+                # Whatever went wrong, e.g. a client aborting its upload, the connection is mid-message
+                if not succeeded:
+                    self.pool.release(backend_conn, reusable=False)
+
+        self.breaker.record_success()
+        self.metrics.sent_bytes.inc(sent)
+        reusable = False
+        received = 0
+        try:
+            while 100 <= response.status < 200 and response.status != 101:
+                # Interim responses precede the final one
+                client_conn.sendall(response.head)
+                received += len(response.head)
+                response = self._read_response(backend_conn, response_buffer, request)
+
+            client_conn.sendall(response.head)
+            received += len(response.head)
+            if response.status == 101:
+                self._tunnel(client_conn, backend_conn, buffer, response_buffer)
+                return False
+
+            received += relay_body(backend_conn, client_conn, response_buffer, response)
+            self.record_latency(first_byte_at - sent_at, time.monotonic() - sent_at)
+            framed = response.body_framing() != UNTIL_CLOSE
+            # The request head was forwarded as is, so a "Connection: close" in it also ends the backend connection
+            reusable = framed and response.keep_alive and request.keep_alive and not response_buffer
+            return framed and response.keep_alive and request.keep_alive
+        finally:
+            self.metrics.received_bytes.inc(received)
+            self.pool.release(backend_conn, reusable)
+
+    @staticmethod
+    def _read_response(backend_conn: socket.socket, response_buffer: bytearray, request: HttpRequest) -> HttpResponse:
+        head = read_head(backend_conn, response_buffer)
+        if head is None:
+            raise ConnectionResetError("Backend closed the connection without responding.")
+        return HttpResponse(head, request.method)
+
+    def _tunnel(self, client_conn: socket.socket, backend_conn: socket.socket, client_buffer: bytearray, backend_buffer: bytearray) -> None:
+        """Pipe raw bytes both ways after a protocol upgrade until either side closes."""
+        def pipe(source: socket.socket, destination: socket.socket, pending: bytearray, counter: Counter) -> None:
+            if pending:
+                try:
+                    destination.sendall(pending)
+                except OSError:
+                    return
+                counter.inc(len(pending))
+            counter.inc(forward(source, destination))
+
+        backend2client_thread = threading.Thread(target=pipe, args=(backend_conn, client_conn, backend_buffer, self.metrics.received_bytes))
         backend2client_thread.start()
-        client2backend_thread.join()
+        pipe(client_conn, backend_conn, client_buffer, self.metrics.sent_bytes)
         backend2client_thread.join()
-        client_conn.close()
-        self.backend_conn.close()
-
-    
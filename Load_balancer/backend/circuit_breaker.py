@@ -0,0 +1,143 @@
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+from core.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_MAX_OPEN_TIME, CIRCUIT_OPEN_TIME
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops traffic to a backend after consecutive failures of live requests.
+
+    While closed, every request is let through and failures are counted; a success resets the
+    count. After `failure_threshold` failures in a row the breaker opens, and the backend is left
+    out of selection for `open_time` seconds. It then turns half-open and lets one trial request
+    through: a success closes the breaker, and a failure opens it again for twice as long, up to
+    `max_open_time`.
+    """
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, open_time: float = CIRCUIT_OPEN_TIME, max_open_time: float = CIRCUIT_MAX_OPEN_TIME, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the CircuitBreaker.
+
+        :param failure_threshold: Consecutive failures that open the breaker.
+        :param open_time: Seconds the breaker first stays open.
+        :param max_open_time: Most seconds the breaker stays open after failed trials.
+        :param clock: Returns the current time in seconds, e.g. a fake clock in tests.
+        """
+        self.failure_threshold = failure_threshold
+        self.open_time = open_time
+        self.max_open_time = max_open_time
+        self._clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        # When an open breaker lets a trial request through
+        self.reopen_at = 0.0
+        self._current_open_time = open_time
+        # When the pending trial request of a half-open breaker was let through
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Register a callback run with the new state whenever the breaker opens or closes.
+
+        :param listener: The callback. It runs on the thread that recorded the request's outcome.
+        """
+        self._listeners.append(listener)
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the backend must be left out of selection for now."""
+        return self.state == OPEN and self._clock() < self.reopen_at
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent to the backend.
+
+        A half-open breaker lets one trial request through at a time. A trial that never reports
+        its outcome, e.g. because the client went away, stops blocking others after the open time.
+
+        :return: True if the request may be sent.
+        """
+        if self.state == CLOSED:
+            return True
+
+        with self._lock:
+            now = self._clock()
+            if self.state == OPEN:
+                if now < self.reopen_at:
+                    return False
+                self.state = HALF_OPEN
+                self._trial_started = None
+            if self.state == HALF_OPEN:
+                if self._trial_started is not None and now - self._trial_started < self._current_open_time:
+                    return False
+                self._trial_started = now
+            return True
+
+    def record_success(self) -> None:
+        """Record a request the backend answered."""
+        if self.state == CLOSED and self.failures == 0:
+            return
+
+        with self._lock:
+            self.failures = 0
+            # Requests sent before the breaker opened do not close it; only the trial does
+            if self.state != HALF_OPEN:
+                return
+            self.state = CLOSED
+            self._current_open_time = self.open_time
+        self._notify(CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a request that failed because of the backend: a refused connection, a reset or a timeout."""
+        with self._lock:
+            if self.state == CLOSED:
+                self.failures += 1
+                if self.failures < self.failure_threshold:
+                    return
+                open_time = self.open_time
+            elif self.state == HALF_OPEN:
+                open_time = min(self._current_open_time * 2, self.max_open_time)
+            else:
+                return
+            self.state = OPEN
+            self.failures = 0
+            self._current_open_time = open_time
+            self.reopen_at = self._clock() + open_time
+        self._notify(OPEN)
+
+    def reset(self) -> None:
+        """
+        Close the breaker, e.g. when health checks find the backend healthy again.
+
+        Listeners are not notified; whoever resets the breaker also publishes the new health.
+        """
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._current_open_time = self.open_time
+
+    @property
+    def current_open_time(self) -> float:
+        """Seconds the breaker stays open the next time, or stayed open the last time."""
+        return self._current_open_time
+
+    def _notify(self, state: str) -> None:
+        for listener in self._listeners:
+            listener(state)
+
+
+def next_reopening(breakers: Iterable[CircuitBreaker]) -> Optional[float]:
+    """
+    Find when the first of some open breakers lets a trial request through.
+
+    :param breakers: The breakers.
+    :return: The earliest reopening time, or None if none of them is open.
+    """
+    return min((breaker.reopen_at for breaker in breakers if breaker.is_open), default=None)
@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+from core.config import CONNECT_TIMEOUT, POOL_IDLE_TIMEOUT, POOL_MAX_CONNECTIONS, POOL_MAX_IDLE
+from core.metrics import UPSTREAM_CONNECT_SECONDS
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no connection to a backend becomes available in time."""
+
+
+class ConnectionPool:
+    """
+    A pool of reusable TCP connections to one backend.
+
+    Idle connections are kept most-recently-used first, so the connections that are still warm
+    get reused and the rest expire. Each connection is owned by exactly one request at a time.
+    """
+    def __init__(self, host: str, port: int, max_idle: int = POOL_MAX_IDLE, max_connections: int = POOL_MAX_CONNECTIONS, idle_timeout: float = POOL_IDLE_TIMEOUT, connect_timeout: float = CONNECT_TIMEOUT) -> None:
+        """
+        Initialize the ConnectionPool.
+
+        :param host: Backend host.
+        :param port: Backend port.
+        :param max_idle: Most idle connections kept open.
+        :param max_connections: Most connections open at once, idle or in use.
+        :param idle_timeout: Seconds an idle connection is kept before it is closed.
+        :param connect_timeout: Seconds to wait for a new connection to be established.
+        """
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self._idle: Deque[Tuple[socket.socket, float]] = deque()
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._connect_seconds = UPSTREAM_CONNECT_SECONDS.labels(f"{host}:{port}")
+
+    def acquire(self, timeout: Optional[float] = None) -> Tuple[socket.socket, bool]:
+        """
+        Take an idle connection, or open a new one if the pool is below its limit.
+
+        :param timeout: Seconds to wait for a connection when the pool is at its limit (None waits forever).
+        :return: A tuple (connection, reused), where reused is False for a newly opened connection.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                self._evict_expired()
+                while self._idle:
+                    conn, _ = self._idle.pop()
+                    if self._is_usable(conn):
+                        return conn, True
+                    self._discard(conn)
+
+                if self._open < self.max_connections:
+                    self._open += 1
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolExhaustedError(f"No connection to {self.host}:{self.port} available.")
+                self._condition.wait(remaining)
+
+        try:
+            return self.connect(), False
+        except OSError:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+    def connect(self) -> socket.socket:
+        """Open a new connection to the backend (not counted by the pool)."""
+        started = time.monotonic()
+        conn = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        self._connect_seconds.observe(time.monotonic() - started)
+        conn.settimeout(None)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def release(self, conn: socket.socket, reusable: bool = True) -> None:
+        """
+        Return a connection taken with `acquire`.
+
+        :param conn: The connection.
+        :param reusable: Whether the connection is idle at a message boundary and can serve another request.
+        """
+        with self._condition:
+            if reusable and not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+            self._condition.notify()
+
+    def evict_expired(self) -> None:
+        """Close idle connections that have not been used within the idle timeout."""
+        with self._condition:
+            self._evict_expired()
+
+    def clear(self) -> None:
+        """Close every idle connection."""
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Close every idle connection, and every connection in use once it is released."""
+        with self._condition:
+            self._closed = True
+        self.clear()
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def _evict_expired(self) -> None:
+        # The oldest idle connections are at the left end
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < cutoff:
+            self._discard(self._idle.popleft()[0])
+
+    def _discard(self, conn: socket.socket) -> None:
+        self._open -= 1
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _is_usable(conn: socket.socket) -> bool:
+        """Check that an idle connection has not been closed by the backend in the meantime."""
+        try:
+            conn.setblocking(False)
+            try:
+                # An idle connection has nothing to read; EOF or stray bytes make it unusable
+                conn.recv(1, socket.MSG_PEEK)
+                return False
+            except BlockingIOError:
+                return True
+            finally:
+                conn.setblocking(True)
+        except OSError:
+            return False
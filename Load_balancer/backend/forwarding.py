@@ -0,0 +1,128 @@
+import errno
+import logging
+import os
+import random
+import socket
+from typing import Callable, List, Optional
+from core.config import FORWARD_BUFFER_SIZE
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# os.splice needs Linux and Python 3.10 or newer
+HAS_SPLICE = hasattr(os, "splice")
+# Not exported by the fcntl module before Python 3.10
+F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+logger = logging.getLogger(__name__)
+
+
+def should_log(sample_rate: float) -> bool:
+    """
+    Decide whether a connection is logged.
+
+    Sampled connections are logged at INFO level, so raising the log level silences them without
+    the cost of formatting messages that would be thrown away.
+
+    :param sample_rate: Fraction of connections to log, from 0 (none) to 1 (all).
+    """
+    return sample_rate > 0 and random.random() < sample_rate and logger.isEnabledFor(logging.INFO)
+
+
+def forward(source: socket.socket, destination: socket.socket, log: bool = False, on_first_data: Optional[Callable[[], None]] = None) -> int:
+    """
+    Forward bytes from one socket to another until the source reaches end of stream.
+
+    The bytes are moved inside the kernel with splice() when it is available, or copied through one
+    preallocated buffer otherwise. Logged connections always use the buffer, so their bytes can be logged.
+    When the source ends, the destination's write side is shut down so the peer sees the end of the stream too.
+
+    :param source: The socket to read from.
+    :param destination: The socket to write to.
+    :param log: Whether to log the forwarded bytes (at DEBUG level).
+    :param on_first_data: Called once, as soon as the first bytes have been read from the source.
+    :return: The number of bytes forwarded.
+    """
+    forwarded = [0]
+    try:
+        spliced = False
+        if not log and HAS_SPLICE and source.gettimeout() is None and destination.gettimeout() is None:
+            spliced = _forward_splice(source, destination, on_first_data, forwarded)
+        if not spliced:
+            _forward_copy(source, destination, log, on_first_data, forwarded)
+    except OSError as e:
+        logger.warning("Connection error: %s", e)
+        # Wake up the thread forwarding the other direction
+        for sock in (source, destination):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return forwarded[0]
+
+    try:
+        destination.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+    return forwarded[0]
+
+
+def _forward_copy(source: socket.socket, destination: socket.socket, log: bool, on_first_data: Optional[Callable[[], None]], forwarded: List[int]) -> None:
+    buffer = bytearray(FORWARD_BUFFER_SIZE)
+    view = memoryview(buffer)
+    while True:
+        count = source.recv_into(buffer)
+        if count == 0:
+            return
+        if on_first_data is not None:
+            on_first_data()
+            on_first_data = None
+
+        if log:
+            logger.info("Received %d bytes from %s", count, source.getpeername()[0])
+            logger.debug("%s", buffer[:count].decode("utf-8", errors="ignore"))
+
+        destination.sendall(view[:count])
+        forwarded[0] += count
+
+
+def _forward_splice(source: socket.socket, destination: socket.socket, on_first_data: Optional[Callable[[], None]], forwarded: List[int]) -> bool:
+    """
+    Move bytes from socket to pipe to socket without copying them into Python.
+
+    :return: False if splice() is not supported for these sockets and nothing was forwarded.
+    """
+    pipe_read, pipe_write = os.pipe()
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.fcntl(pipe_write, F_SETPIPE_SZ, FORWARD_BUFFER_SIZE)
+            except OSError:
+                pass  # keep the default pipe size
+
+        source_fd = source.fileno()
+        destination_fd = destination.fileno()
+        started = False
+        while True:
+            try:
+                count = os.splice(source_fd, pipe_write, FORWARD_BUFFER_SIZE, flags=os.SPLICE_F_MOVE)
+            except OSError as e:
+                if e.errno == errno.EINVAL and not started:
+                    return False
+                raise
+            if count == 0:
+                return True
+            if not started and on_first_data is not None:
+                on_first_data()
+            started = True
+
+            # Drain the pipe before reading more, so it never holds bytes when the loop ends
+            pending = count
+            while pending:
+                pending -= os.splice(pipe_read, destination_fd, pending, flags=os.SPLICE_F_MOVE)
+            forwarded[0] += count
+    finally:
+        os.close(pipe_read)
+        os.close(pipe_write)
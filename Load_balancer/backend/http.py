@@ -0,0 +1,243 @@
+import re
+import socket
+from typing import Dict, Optional
+
+# Largest request or response head accepted, in bytes
+MAX_HEAD_SIZE = 64 * 1024
+BUFFER_SIZE = 64 * 1024
+
+# Body framings
+NO_BODY = "none"
+CONTENT_LENGTH = "content-length"
+CHUNKED = "chunked"
+UNTIL_CLOSE = "until-close"
+
+# Content-Length values and chunk sizes are plain digits; int() would also accept signs, underscores and spaces
+DECIMAL_DIGITS = re.compile(r"[0-9]+")
+HEX_DIGITS = re.compile(rb"[0-9A-Fa-f]+")
+
+
+class HttpError(Exception):
+    """Raised when a peer sends a malformed HTTP/1.x message."""
+
+
+class HttpMessage:
+    """
+    The head of an HTTP/1.x request or response.
+
+    Only the parts needed to frame the message and decide on keep-alive are parsed; the
+    head is forwarded exactly as it was received.
+    """
+    def __init__(self, head: bytes) -> None:
+        """
+        Parse a message head.
+
+        :param head: The raw head, including the final blank line.
+        """
+        self.head = head
+        self.version = ""
+        lines = head.decode("latin-1").split("\r\n")
+        self.start_line = lines[0]
+        self.headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, separator, value = line.partition(":")
+            if not separator:
+                raise HttpError(f"Malformed header line: {line!r}")
+            name = name.strip().lower()
+            value = value.strip()
+            self.headers[name] = f"{self.headers[name]}, {value}" if name in self.headers else value
+        self.content_length = self._parse_content_length()
+
+    @property
+    def keep_alive(self) -> bool:
+        """Whether the sender expects the connection to stay open after this message."""
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.1":
+            return "close" not in connection
+        return "keep-alive" in connection
+
+    def body_framing(self) -> str:
+        """How the end of the body is found: NO_BODY, CONTENT_LENGTH, CHUNKED or UNTIL_CLOSE."""
+        if "chunked" in self.headers.get("transfer-encoding", "").lower():
+            return CHUNKED
+        if "content-length" in self.headers:
+            return CONTENT_LENGTH
+        return NO_BODY
+
+    def _parse_content_length(self) -> Optional[int]:
+        """
+        Parse the Content-Length header as soon as the head arrives, so a message with an ambiguous length is never forwarded.
+
+        :return: The body length, or None if the header is missing.
+        :raises HttpError: If the value is not a number or repeated headers disagree.
+        """
+        if "content-length" not in self.headers:
+            return None
+        # Repeated headers were joined with ", "; they are only accepted if they all agree
+        values = {value.strip() for value in self.headers["content-length"].split(",")}
+        if len(values) != 1:
+            raise HttpError(f"Conflicting Content-Length values: {self.headers['content-length']!r}")
+        value = values.pop()
+        if not DECIMAL_DIGITS.fullmatch(value):
+            raise HttpError(f"Invalid Content-Length: {value!r}")
+        return int(value)
+
+
+class HttpRequest(HttpMessage):
+    """The head of a request, with its method, target and version."""
+    def __init__(self, head: bytes) -> None:
+        super().__init__(head)
+        parts = self.start_line.split(" ")
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise HttpError(f"Malformed request line: {self.start_line!r}")
+        self.method, self.target, self.version = parts
+
+    def get_cookie(self, name: str) -> Optional[str]:
+        """
+        Get the value of a cookie sent with the request.
+
+        :param name: The cookie name.
+        :return: The value, or None if the cookie was not sent.
+        """
+        for cookie in self.headers.get("cookie", "").replace(",", ";").split(";"):
+            cookie_name, separator, value = cookie.strip().partition("=")
+            if separator and cookie_name == name:
+                return value
+        return None
+
+
+class HttpResponse(HttpMessage):
+    """The head of a response; how its body is framed depends on the request method."""
+    def __init__(self, head: bytes, request_method: str = "GET") -> None:
+        super().__init__(head)
+        parts = self.start_line.split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise HttpError(f"Malformed status line: {self.start_line!r}")
+        self.version = parts[0]
+        self.status = int(parts[1])
+        self.request_method = request_method
+
+    def body_framing(self) -> str:
+        if self.request_method == "HEAD" or 100 <= self.status < 200 or self.status in (204, 304):
+            return NO_BODY
+        framing = super().body_framing()
+        # Without a length, a response body ends when the backend closes the connection
+        return UNTIL_CLOSE if framing == NO_BODY else framing
+
+
+def read_head(sock: socket.socket, buffer: bytearray) -> Optional[bytes]:
+    """
+    Read the next message head from a socket.
+
+    :param sock: The socket to read from.
+    :param buffer: Bytes already received from the socket; on return it holds the bytes after the head.
+    :return: The head, or None if the peer closed the connection before sending anything.
+    """
+    searched = 0
+    while True:
+        end = buffer.find(b"\r\n\r\n", max(searched - 3, 0))
+        if end >= 0:
+            head = bytes(buffer[:end + 4])
+            del buffer[:end + 4]
+            return head
+        if len(buffer) > MAX_HEAD_SIZE:
+            raise HttpError("Message head is too large.")
+
+        searched = len(buffer)
+        data = sock.recv(BUFFER_SIZE)
+        if not data:
+            if buffer:
+                raise HttpError("Connection closed in the middle of a message head.")
+            return None
+        buffer += data
+
+
+def relay_body(source: socket.socket, destination: socket.socket, buffer: bytearray, message: HttpMessage) -> int:
+    """
+    Forward a message body without buffering it whole.
+
+    :param source: The socket the body is read from.
+    :param destination: The socket the body is written to.
+    :param buffer: Bytes already received from `source`; on return it holds any bytes after the body.
+    :param message: The head of the message whose body is relayed.
+    :return: The number of bytes forwarded, including chunk framing.
+    """
+    framing = message.body_framing()
+    if framing == CONTENT_LENGTH:
+        return _relay_exactly(source, destination, buffer, message.content_length)
+    if framing == CHUNKED:
+        return _relay_chunked(source, destination, buffer)
+    forwarded = 0
+    if framing == UNTIL_CLOSE:
+        if buffer:
+            destination.sendall(buffer)
+            forwarded += len(buffer)
+            del buffer[:]
+        while True:
+            data = source.recv(BUFFER_SIZE)
+            if not data:
+                break
+            destination.sendall(data)
+            forwarded += len(data)
+    return forwarded
+
+
+def _relay_exactly(source: socket.socket, destination: socket.socket, buffer: bytearray, length: int) -> int:
+    """Forward exactly `length` bytes, starting with the buffered ones."""
+    total = length
+    if buffer:
+        count = min(length, len(buffer))
+        destination.sendall(buffer[:count])
+        del buffer[:count]
+        length -= count
+
+    while length > 0:
+        data = source.recv(min(length, BUFFER_SIZE))
+        if not data:
+            raise HttpError("Connection closed in the middle of a message body.")
+        destination.sendall(data)
+        length -= len(data)
+    return total
+
+
+def _read_line(source: socket.socket, buffer: bytearray) -> bytes:
+    """Remove and return one CRLF-terminated line from the buffer, reading more as needed."""
+    while True:
+        end = buffer.find(b"\r\n")
+        if end >= 0:
+            line = bytes(buffer[:end + 2])
+            del buffer[:end + 2]
+            return line
+        if len(buffer) > MAX_HEAD_SIZE:
+            raise HttpError("Chunk header is too large.")
+        data = source.recv(BUFFER_SIZE)
+        if not data:
+            raise HttpError("Connection closed in the middle of a chunked body.")
+        buffer += data
+
+
+def _relay_chunked(source: socket.socket, destination: socket.socket, buffer: bytearray) -> int:
+    """Forward a chunked body, chunk by chunk, including its trailers."""
+    forwarded = 0
+    while True:
+        size_line = _read_line(source, buffer)
+        destination.sendall(size_line)
+        forwarded += len(size_line)
+        size = size_line.split(b";", 1)[0].strip()
+        if not HEX_DIGITS.fullmatch(size):
+            raise HttpError(f"Invalid chunk size line: {size_line!r}")
+        size = int(size, 16)
+
+        if size == 0:
+            # Trailers end with an empty line
+            while True:
+                line = _read_line(source, buffer)
+                destination.sendall(line)
+                forwarded += len(line)
+                if line == b"\r\n":
+                    return forwarded
+
+        # Chunk data and its trailing CRLF
+        forwarded += _relay_exactly(source, destination, buffer, size + 2)
@@ -0,0 +1,55 @@
+import math
+import time
+from typing import Callable, Optional
+from core.config import LATENCY_DECAY_TIME
+
+
+class PeakEwma:
+    """
+    A moving average of latency samples that jumps up to any slower sample at once.
+
+    The weight of the old average decays with the time since the last sample rather than with
+    the number of samples, and the value read decays towards zero while no samples arrive, so
+    a backend that stopped being used is eventually tried again. Updates replace one tuple, so
+    readers never see a torn state and no lock is needed; under contention an update may be lost,
+    which only drops a sample.
+    """
+    def __init__(self, decay_time: float = LATENCY_DECAY_TIME, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the PeakEwma.
+
+        :param decay_time: Seconds over which the weight of old samples falls by a factor of e.
+        :param clock: Returns the current time in seconds, e.g. a fake clock in tests.
+        """
+        self.decay_time = decay_time
+        self._clock = clock
+        self._state = (0.0, clock())
+        self.samples = 0
+
+    def observe(self, sample: float) -> None:
+        """
+        Add a latency sample.
+
+        :param sample: The latency in seconds.
+        """
+        now = self._clock()
+        value, stamp = self._state
+        if sample > value:
+            value = sample
+        else:
+            weight = math.exp(-(now - stamp) / self.decay_time)
+            value = value * weight + sample * (1 - weight)
+        self._state = (value, now)
+        self.samples += 1
+
+    def get(self, now: Optional[float] = None) -> float:
+        """
+        Get the current average, decayed for the time since the last sample.
+
+        :param now: The current time.monotonic(), if the caller already has it.
+        :return: The latency in seconds.
+        """
+        value, stamp = self._state
+        if now is None:
+            now = self._clock()
+        return value * math.exp(-max(now - stamp, 0.0) / self.decay_time)
@@ -0,0 +1,358 @@
+"""
+Load test the balancer against a fleet of stub backends and write the results as JSON.
+
+Usage:
+    python -m benchmarks.loadtest [--engine E ...] [--algorithm A ...] [--mode tcp|http] [--workers N]
+                                  [--backends N] [--latency SPEC ...] [--size SPEC ...] [--failure-rate F ...]
+                                  [--concurrency C] [--duration S] [--warmup S] [--new-connections]
+                                  [--output results.json] [--baseline old.json]
+
+Every combination of --engine and --algorithm runs in turn against the same stub backends, each
+with a fresh load balancer process started from lb.py. Clients keep --concurrency requests in
+flight (a closed loop) for --warmup seconds, which are not counted, and then for --duration
+seconds. Each run reports requests/s, latency percentiles, the share of requests each backend
+served and the CPU time of the load balancer's processes (on Linux). Comparing against a
+previous JSON file with --baseline prints the change of throughput and p99 latency of each run.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from algorithms import ALGORITHMS
+from . import stub_backends
+
+LB_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENGINES = ("threaded", "asyncio")
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999))
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Optional[str], bool]:
+    """Read one response; return its status, the backend that sent it, and whether the connection stays open."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    length = 0
+    backend = None
+    keep_alive = True
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"x-backend":
+            backend = value.strip().decode()
+        elif name == b"connection":
+            keep_alive = value.strip().lower() != b"close"
+    if length:
+        await reader.readexactly(length)
+    return status, backend, keep_alive
+
+
+async def _client(host: str, port: int, stats: dict, measure_from: float, measure_until: float, new_connections: bool, timeout: float) -> None:
+    """Send requests one after the other until the end of the run, recording those that end within the measured window."""
+    request = b"GET / HTTP/1.1\r\nHost: loadtest\r\n" + (b"Connection: close\r\n" if new_connections else b"") + b"\r\n"
+    writer = None
+    while time.time() < measure_until:
+        started = time.perf_counter()
+        error = None
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            writer.write(request)
+            status, backend, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            error = "bad_response"
+        except OSError:
+            error = "connection"
+        latency = time.perf_counter() - started
+
+        if error is not None or not keep_alive:
+            if writer is not None:
+                writer.close()
+            writer = None
+        finished = time.time()
+        if error is not None:
+            if measure_from <= finished < measure_until:
+                stats["errors"][error] += 1
+            # Do not spin on a balancer that refuses connections
+            await asyncio.sleep(0.01)
+            continue
+        if not measure_from <= finished < measure_until:
+            continue
+        stats["latencies"].append(latency)
+        stats["statuses"][status] += 1
+        if 200 <= status < 300:
+            stats["backends"][backend or "unknown"] += 1
+    if writer is not None:
+        writer.close()
+
+
+def _generate_load(host: str, port: int, connections: int, measure_from: float, measure_until: float, new_connections: bool, timeout: float) -> dict:
+    """Run the clients of one load generator process and return what they recorded."""
+    stats = {"latencies": [], "statuses": Counter(), "backends": Counter(), "errors": Counter()}
+
+    async def run_clients():
+        await asyncio.gather(*(_client(host, port, stats, measure_from, measure_until, new_connections, timeout) for _ in range(connections)))
+
+    asyncio.run(run_clients())
+    return stats
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """The nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(math.ceil(fraction * len(sorted_values)) - 1, 0))]
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """
+    CPU time used so far by a process and all of its descendants, e.g. worker processes.
+
+    :param pid: The process.
+    :return: User and system seconds, or None where /proc is not available.
+    """
+    if not os.path.exists(f"/proc/{pid}/stat"):
+        return None
+    ticks = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/stat") as file:
+                # Fields after the command name, which is in parentheses and may contain spaces
+                fields = file.read().rsplit(")", 1)[1].split()
+            ticks += int(fields[11]) + int(fields[12])
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as file:
+                    pending.extend(int(child) for child in file.read().split())
+        except (OSError, IndexError, ValueError):
+            continue  # the process exited in the meantime
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BalancerProcess:
+    """The load balancer under test, started from lb.py in a process of its own."""
+    def __init__(self, config_file: str, port: int, engine: str, algorithm: str, mode: str, workers: int, health_interval: int, extra_args: List[str]) -> None:
+        self.port = port
+        self.command = [
+            sys.executable, os.path.join(LB_DIRECTORY, "lb.py"),
+            "--config", config_file, "--host", "127.0.0.1", "--port", str(port),
+            "--engine", engine, "--algorithm", algorithm, "--mode", mode, "--workers", str(workers),
+            "--interval", str(health_interval), "--reload-interval", "0", "--log-level", "warning",
+        ] + extra_args
+        self.log = tempfile.TemporaryFile("w+")
+        self.process = None
+
+    def __enter__(self) -> "BalancerProcess":
+        self.process = subprocess.Popen(self.command, cwd=LB_DIRECTORY, stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        self.__exit__()
+        raise RuntimeError(f"The load balancer did not start:\n{self.output()}")
+
+    def __exit__(self, *exc_info) -> None:
+        if self.process.poll() is None:
+            # Lets --workers stop its worker processes too
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def output(self) -> str:
+        self.log.seek(0)
+        return self.log.read()
+
+
+def run_load_test(fleet: stub_backends.StubFleet, engine: str, algorithm: str, mode: str = "tcp", workers: int = 1, concurrency: int = 64, duration: float = 10, warmup: float = 2,
+                  new_connections: bool = False, timeout: float = 10, client_processes: int = 1, health_interval: int = 5, extra_args: Optional[List[str]] = None) -> dict:
+    """
+    Start a load balancer in front of the stub backends and measure it under load.
+
+    :param fleet: The running stub backends.
+    :param engine: The load balancer's --engine.
+    :param algorithm: The load balancer's --algorithm.
+    :param mode: The load balancer's --mode.
+    :param workers: The load balancer's --workers.
+    :param concurrency: Requests kept in flight, one per client connection.
+    :param duration: Seconds measured.
+    :param warmup: Seconds of load before the measurement starts.
+    :param new_connections: Whether each request opens a new connection instead of reusing one.
+    :param timeout: Seconds a request may take before it counts as timed out.
+    :param client_processes: Load generator processes the clients are spread over.
+    :param health_interval: The load balancer's --interval.
+    :param extra_args: More lb.py options.
+    :return: The run's settings and results.
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as config:
+        json.dump(fleet.server_configs(), config)
+    try:
+        with BalancerProcess(config.name, free_port(), engine, algorithm, mode, workers, health_interval, extra_args or []) as balancer:
+            measure_from = time.time() + 0.5 + warmup
+            measure_until = measure_from + duration
+            shares = [concurrency // client_processes + (index < concurrency % client_processes) for index in range(client_processes)]
+            with ProcessPoolExecutor(client_processes) as executor:
+                futures = [executor.submit(_generate_load, "127.0.0.1", balancer.port, connections, measure_from, measure_until, new_connections, timeout) for connections in shares if connections]
+                time.sleep(max(measure_from - time.time(), 0))
+                cpu_before = process_cpu_seconds(balancer.process.pid)
+                time.sleep(max(measure_until - time.time(), 0))
+                cpu_after = process_cpu_seconds(balancer.process.pid)
+                parts = [future.result() for future in futures]
+    finally:
+        os.unlink(config.name)
+
+    latencies = sorted(latency for part in parts for latency in part["latencies"])
+    statuses = sum((part["statuses"] for part in parts), Counter())
+    backends = sum((part["backends"] for part in parts), Counter())
+    errors = sum((part["errors"] for part in parts), Counter())
+    served = sum(backends.values())
+    cpu_seconds = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    latency_ms = {name: percentile(latencies, fraction) * 1000 if latencies else None for name, fraction in PERCENTILES}
+    latency_ms["mean"] = sum(latencies) / len(latencies) * 1000 if latencies else None
+    latency_ms["max"] = latencies[-1] * 1000 if latencies else None
+
+    return {
+        "engine": engine,
+        "algorithm": algorithm,
+        "mode": mode,
+        "workers": workers,
+        "concurrency": concurrency,
+        "new_connections": new_connections,
+        "duration_s": duration,
+        "requests": len(latencies),
+        "requests_per_s": len(latencies) / duration,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "errors": dict(errors),
+        "latency_ms": latency_ms,
+        "backends": {f"{fleet.host}:{backend}": {"requests": count, "share": count / served} for backend, count in sorted(backends.items())},
+        "lb_cpu_seconds": cpu_seconds,
+        "lb_cpu_percent": cpu_seconds / duration * 100 if cpu_seconds is not None else None,
+    }
+
+
+def _run_key(result: dict) -> tuple:
+    return result["engine"], result["algorithm"], result["mode"], result["workers"]
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    """Format the results, with the change of throughput and p99 latency against a baseline when given."""
+    previous = {}
+    if baseline is not None:
+        previous = {_run_key(result): result for result in baseline["results"]}
+
+    lines = []
+    for result in report["results"]:
+        latency = result["latency_ms"]
+        line = f"{result['engine']}/{result['algorithm']} ({result['mode']}, {result['workers']} worker{'s' if result['workers'] > 1 else ''}): {result['requests_per_s']:10.1f} req/s"
+        if result["requests"]:
+            line += "".join(f"  {name} {latency[name]:.2f} ms" for name, _ in PERCENTILES)
+        failed = sum(result["errors"].values()) + sum(count for status, count in result["statuses"].items() if not status.startswith("2"))
+        line += f"  failed {failed}"
+        if result["lb_cpu_percent"] is not None:
+            line += f"  LB CPU {result['lb_cpu_percent']:.0f}%"
+        lines.append(line)
+
+        old = previous.get(_run_key(result))
+        if old and old["requests_per_s"] and old["latency_ms"]["p99"] and latency["p99"]:
+            lines.append(f"  vs baseline: {(result['requests_per_s'] / old['requests_per_s'] - 1) * 100:+.1f}% req/s, {(latency['p99'] / old['latency_ms']['p99'] - 1) * 100:+.1f}% p99")
+        for backend, served in result["backends"].items():
+            lines.append(f"  {backend:<21}{served['requests']:10d}  {served['share'] * 100:5.1f}%")
+
+    return "\n".join(lines)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the load test options to a parser."""
+    stub_backends.add_arguments(parser)
+    parser.add_argument("--engine", choices=ENGINES, action="append", help="Load balancer engine (may be repeated; default: threaded).")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), action="append", help="Load balancing algorithm (may be repeated; default: round_robin).")
+    parser.add_argument("--mode", choices=["tcp", "http"], default="tcp", help="Load balancer mode (default: %(default)s).")
+    parser.add_argument("--workers", type=int, default=1, help="Load balancer worker processes (default: %(default)s).")
+    parser.add_argument("--health-interval", type=int, default=5, help="Load balancer health check interval in seconds (default: %(default)s).")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests kept in flight (default: %(default)s).")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds measured per run (default: %(default)s).")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds of load before each measurement (default: %(default)s).")
+    parser.add_argument("--timeout", type=float, default=10, help="Seconds before a request counts as timed out (default: %(default)s).")
+    parser.add_argument("--new-connections", action="store_true", help="Open a new connection for every request instead of keeping connections alive.")
+    parser.add_argument("--client-processes", type=int, default=1, help="Load generator processes (default: %(default)s).")
+    parser.add_argument("--lb-arg", action="append", default=[], help="Extra lb.py option, e.g. --lb-arg=--max-handlers=512 (may be repeated).")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="A JSON file from a previous run to compare against.")
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run every engine and algorithm with parsed arguments, print the report and write the JSON output."""
+    profiles = stub_backends.profiles_from_args(args)
+    runs = [(engine, algorithm) for engine in args.engine or ["threaded"] for algorithm in args.algorithm or ["round_robin"]]
+    if args.mode == "http" and any(engine == "asyncio" for engine, _ in runs):
+        print("Skipping the asyncio engine, which does not support --mode http.")
+        runs = [(engine, algorithm) for engine, algorithm in runs if engine != "asyncio"]
+
+    results = []
+    with stub_backends.StubFleet(profiles, seed=args.seed) as fleet:
+        for engine, algorithm in runs:
+            print(f"Running {engine}/{algorithm} for {args.warmup + args.duration:g} s...")
+            results.append(run_load_test(fleet, engine, algorithm, args.mode, args.workers, args.concurrency, args.duration, args.warmup,
+                                         args.new_connections, args.timeout, args.client_processes, args.health_interval, args.lb_arg))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "backends": [profile.describe() for profile in profiles],
+            "client_processes": args.client_processes,
+            "lb_args": args.lb_arg,
+        },
+        "results": results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    print(format_report(report, baseline))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the balancer against stub backends.")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
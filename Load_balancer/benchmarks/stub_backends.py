@@ -0,0 +1,223 @@
+"""
+Run a fleet of stub HTTP backends with configurable latency, response size and failures.
+
+Usage:
+    python -m benchmarks.stub_backends [--backends N] [--base-port PORT] [--latency SPEC ...] [--size SPEC ...] [--failure-rate F ...] [--failure-mode status|reset]
+
+Every backend answers with its port in an X-Backend header, so clients can tell which one served
+them. Latencies (in milliseconds) and sizes (in bytes) are drawn from distributions written as:
+    fixed:V          always V
+    uniform:LO:HI    uniformly between LO and HI
+    exp:MEAN         exponentially distributed with the given mean
+Options that take a SPEC or rate may be repeated; backend i uses the i-th value, cycling through them.
+All backends run on one asyncio event loop, so a fleet costs one process however many backends it has.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import socket
+import struct
+from typing import Callable, List, Optional, Sequence
+
+BODY = b"x" * (1024 * 1024)
+# Failure modes: answer 500, or reset the connection without answering
+FAILURE_MODES = ("status", "reset")
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a distribution such as "fixed:5", "uniform:1:10" or "exp:5".
+
+    :param spec: The distribution.
+    :return: A function drawing one value from it with a random generator.
+    """
+    kind, _, parameters = spec.partition(":")
+    try:
+        values = [float(value) for value in parameters.split(":")] if parameters else []
+    except ValueError:
+        raise ValueError(f"Invalid distribution: {spec}")
+    if kind == "fixed" and len(values) == 1:
+        return lambda generator: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda generator: generator.uniform(values[0], values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda generator: generator.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    raise ValueError(f"Invalid distribution: {spec} (use fixed:V, uniform:LO:HI or exp:MEAN)")
+
+
+class StubProfile:
+    """How one stub backend behaves."""
+    def __init__(self, latency: str = "fixed:0", size: str = "fixed:64", failure_rate: float = 0.0, failure_mode: str = "status") -> None:
+        """
+        Initialize the StubProfile.
+
+        :param latency: Distribution of the time to answer, in milliseconds.
+        :param size: Distribution of the response body size, in bytes.
+        :param failure_rate: Fraction of requests that fail.
+        :param failure_mode: "status" to answer failed requests with 500, or "reset" to reset their connection.
+        """
+        if not 0 <= failure_rate <= 1:
+            raise ValueError(f"Failure rate must be between 0 and 1, got {failure_rate}")
+        if failure_mode not in FAILURE_MODES:
+            raise ValueError(f"Unsupported failure mode: {failure_mode}")
+        self.latency_spec = latency
+        self.size_spec = size
+        self.latency = parse_distribution(latency)
+        self.size = parse_distribution(size)
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+
+    def describe(self) -> dict:
+        return {"latency_ms": self.latency_spec, "size_bytes": self.size_spec, "failure_rate": self.failure_rate, "failure_mode": self.failure_mode}
+
+
+def build_profiles(count: int, latencies: Sequence[str], sizes: Sequence[str], failure_rates: Sequence[float], failure_mode: str) -> List[StubProfile]:
+    """Give each of `count` backends the i-th latency, size and failure rate, cycling through each list."""
+    return [
+        StubProfile(latencies[index % len(latencies)], sizes[index % len(sizes)], failure_rates[index % len(failure_rates)], failure_mode)
+        for index in range(count)
+    ]
+
+
+async def _serve_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, port: int, profile: StubProfile, generator: random.Random) -> None:
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            lowered = head.lower()
+            length = _content_length(lowered)
+            if length:
+                await reader.readexactly(length)
+
+            delay = profile.latency(generator)
+            if delay > 0:
+                await asyncio.sleep(delay / 1000)
+
+            status = b"200 OK"
+            if profile.failure_rate and generator.random() < profile.failure_rate:
+                if profile.failure_mode == "reset":
+                    # Closing with a zero linger time sends RST instead of FIN
+                    writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                    writer.transport.abort()
+                    return
+                status = b"500 Internal Server Error"
+
+            size = max(int(profile.size(generator)), 0)
+            body = BODY[:size] if size <= len(BODY) else b"x" * size
+            keep_alive = b"\r\nconnection: close" not in lowered and not lowered.split(b"\r\n", 1)[0].endswith(b"http/1.0")
+            head = b"HTTP/1.1 %s\r\nContent-Length: %d\r\nX-Backend: %d\r\n%s\r\n" % (status, size, port, b"" if keep_alive else b"Connection: close\r\n")
+            writer.writelines((head, body))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def _content_length(lowered_head: bytes) -> int:
+    start = lowered_head.find(b"\r\ncontent-length:")
+    if start < 0:
+        return 0
+    end = lowered_head.find(b"\r\n", start + 2)
+    return int(lowered_head[start + 17:end])
+
+
+async def _serve_fleet(profiles: Sequence[StubProfile], host: str, base_port: int, ready: Optional[Callable[[List[int]], None]], seed: int) -> None:
+    servers = []
+    ports = []
+    for index, profile in enumerate(profiles):
+        generator = random.Random(seed + index)
+        server = await asyncio.start_server(
+            lambda reader, writer, profile=profile, generator=generator, index=index: _serve_client(reader, writer, ports[index], profile, generator),
+            host, base_port + index if base_port else 0, backlog=4096)
+        servers.append(server)
+        ports.append(server.sockets[0].getsockname()[1])
+
+    if ready is not None:
+        ready(ports)
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def run_fleet(profiles: Sequence[StubProfile], host: str = "127.0.0.1", base_port: int = 0, ready: Optional[Callable[[List[int]], None]] = None, seed: int = 0) -> None:
+    """
+    Serve stub backends until interrupted.
+
+    :param profiles: One profile per backend.
+    :param host: Address to listen on.
+    :param base_port: Port of the first backend, the others following it; 0 picks free ports.
+    :param ready: Called with the ports once every backend is listening.
+    :param seed: Random seed for the latencies, sizes and failures.
+    """
+    try:
+        asyncio.run(_serve_fleet(profiles, host, base_port, ready, seed))
+    except KeyboardInterrupt:
+        pass
+
+
+def _run_fleet_process(profiles: Sequence[StubProfile], host: str, base_port: int, seed: int, queue: "multiprocessing.Queue") -> None:
+    run_fleet(profiles, host, base_port, queue.put, seed)
+
+
+class StubFleet:
+    """
+    Stub backends in a process of their own, so they do not compete with the load generator.
+
+    Use it as a context manager; the backends are listening when the `with` block starts.
+    """
+    def __init__(self, profiles: Sequence[StubProfile], host: str = "127.0.0.1", seed: int = 0) -> None:
+        self.profiles = list(profiles)
+        self.host = host
+        self.seed = seed
+        self.ports: List[int] = []
+        self._process = None
+
+    def __enter__(self) -> "StubFleet":
+        # Profiles hold lambdas, which only a forked process can inherit
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        self._process = context.Process(target=_run_fleet_process, args=(self.profiles, self.host, 0, self.seed, queue), daemon=True)
+        self._process.start()
+        self.ports = queue.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._process.terminate()
+        self._process.join()
+
+    def server_configs(self) -> List[dict]:
+        """The backends as entries of a servers.json file."""
+        return [{"id": index + 1, "host": self.host, "port": port} for index, port in enumerate(self.ports)]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the backend options to a parser (shared with benchmarks.loadtest)."""
+    parser.add_argument("--backends", type=int, default=3, help="Number of stub backends (default: %(default)s).")
+    parser.add_argument("--latency", action="append", help="Response latency distribution in ms, per backend (default: fixed:1).")
+    parser.add_argument("--size", action="append", help="Response body size distribution in bytes, per backend (default: fixed:64).")
+    parser.add_argument("--failure-rate", type=float, action="append", help="Fraction of requests that fail, per backend (default: 0).")
+    parser.add_argument("--failure-mode", choices=FAILURE_MODES, default="status", help="Answer failed requests with 500, or reset their connection (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the backends (default: %(default)s).")
+
+
+def profiles_from_args(args: argparse.Namespace) -> List[StubProfile]:
+    return build_profiles(args.backends, args.latency or ["fixed:1"], args.size or ["fixed:64"], args.failure_rate or [0.0], args.failure_mode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run stub HTTP backends for load testing.")
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: %(default)s).")
+    parser.add_argument("--base-port", type=int, default=9001, help="Port of the first backend; the others follow it, 0 picks free ports (default: %(default)s).")
+    args = parser.parse_args()
+
+    profiles = profiles_from_args(args)
+    run_fleet(profiles, args.host, args.base_port, lambda ports: print(f"Stub backends listening on {args.host} ports {', '.join(map(str, ports))}"), args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from backend.backend_server import BackendServer
+from .balancer import BAD_GATEWAY, SERVICE_UNAVAILABLE, LoadBalancer
+from .config import CONNECT_RETRIES, CONNECT_TIMEOUT, LISTEN_BACKLOG
+from .health_checker import HealthChecker
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional and only makes the event loop faster
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+
+class _ClientProtocol(asyncio.Protocol):
+    """
+    The client side of a proxied connection.
+
+    Bytes are passed straight between the two transports without coroutines or intermediate
+    buffers; when one side cannot keep up, reading from the other side is paused.
+    """
+    def __init__(self, load_balancer: "AsyncLoadBalancer") -> None:
+        self.load_balancer = load_balancer
+        self.transport: Optional[asyncio.Transport] = None
+        self.backend: Optional["_BackendProtocol"] = None
+        self.server: Optional[BackendServer] = None
+        self.key: Optional[str] = None
+        self.pending = bytearray()
+        self.eof = False
+        self.connect_task: Optional[asyncio.Task] = None
+        # When the first client bytes were sent on, to time the backend's first reply
+        self.request_sent_at: Optional[float] = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        # Raw streams can only be routed on the client address
+        if self.load_balancer.uses_key:
+            self.key = transport.get_extra_info("peername")[0]
+        self.server = self.load_balancer.get_next_server(self.key)
+        if not self.server:
+            transport.write(SERVICE_UNAVAILABLE)
+            transport.close()
+            return
+
+        # Counted from selection on, so connections still being opened are not all sent to the same server
+        self.server.connection_opened()
+        self.server.metrics.requests.inc()
+        # Hold the client until the backend connection is open
+        transport.pause_reading()
+        loop = asyncio.get_running_loop()
+        self.connect_task = loop.create_task(self._connect_backend(loop))
+
+    async def _connect_backend(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Servers that could not be connected to; nothing was sent yet, so another one can take over
+        failed = []
+        while True:
+            server = self.server
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(loop.create_connection(lambda: _BackendProtocol(self), server.host, server.port), CONNECT_TIMEOUT)
+                break
+            except asyncio.TimeoutError:
+                # Caught first, since it is an OSError from Python 3.11 on
+                logger.warning("Timed out connecting to %s:%d after %ss", server.host, server.port, CONNECT_TIMEOUT)
+                server.metrics.timeout_failures.inc()
+                server.breaker.record_failure()
+            except OSError as e:
+                logger.warning("Error connecting to %s:%d - %s", server.host, server.port, e)
+                server.metrics.connect_failures.inc()
+                server.breaker.record_failure()
+            if self.server is None:
+                # The client went away meanwhile, and the server was released when it did
+                return
+            failed.append(server)
+            server.connection_closed()
+            self.server = None
+            if self.transport.is_closing():
+                return
+
+            server = self.load_balancer.get_next_server(self.key, exclude=failed) if len(failed) <= CONNECT_RETRIES else None
+            if not server:
+                self.transport.write(BAD_GATEWAY)
+                self.transport.close()
+                return
+            self.server = server
+            server.connection_opened()
+            server.metrics.requests.inc()
+        server.breaker.record_success()
+        server.metrics.connect_seconds.observe(time.monotonic() - started)
+
+    def backend_connected(self, backend: "_BackendProtocol") -> None:
+        if self.transport.is_closing():
+            backend.transport.close()
+            return
+
+        self.backend = backend
+        if self.pending:
+            backend.transport.write(self.pending)
+            self.server.metrics.sent_bytes.inc(len(self.pending))
+            self.pending = bytearray()
+            self.request_sent_at = time.monotonic()
+        if self.eof:
+            backend.write_eof()
+        else:
+            self.transport.resume_reading()
+
+    def data_received(self, data: bytes) -> None:
+        if self.backend is None:
+            self.pending += data
+        else:
+            self.backend.transport.write(data)
+            self.server.metrics.sent_bytes.inc(len(data))
+            if self.request_sent_at is None:
+                self.request_sent_at = time.monotonic()
+
+    def eof_received(self) -> bool:
+        self.eof = True
+        if self.backend is not None:
+            self.backend.write_eof()
+            self.close_if_done()
+        # Keep the transport open so the response can still be sent
+        return True
+
+    def close_if_done(self) -> None:
+        """Close both sides once each one has finished sending."""
+        if self.eof and self.backend.eof:
+            self.backend.transport.close()
+            self.transport.close()
+
+    def write_eof(self) -> None:
+        if self.transport.can_write_eof():
+            self.transport.write_eof()
+        else:
+            self.transport.close()
+
+    def pause_writing(self) -> None:
+        if self.backend is not None:
+            self.backend.transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        if self.backend is not None:
+            self.backend.transport.resume_reading()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self.backend is not None:
+            self.backend.transport.close()
+            self.backend = None
+        if self.server is not None:
+            self.server.connection_closed()
+            self.server = None
+
+
+class _BackendProtocol(asyncio.Protocol):
+    """The backend side of a proxied connection."""
+    def __init__(self, client: _ClientProtocol) -> None:
+        self.client = client
+        self.transport: Optional[asyncio.Transport] = None
+        self.eof = False
+        self.replied = False
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.client.backend_connected(self)
+
+    def data_received(self, data: bytes) -> None:
+        self.client.transport.write(data)
+        server = self.client.server
+        if server is not None:
+            server.metrics.received_bytes.inc(len(data))
+        if not self.replied:
+            self.replied = True
+            sent_at = self.client.request_sent_at
+            if server is not None and sent_at is not None:
+                server.record_latency(time.monotonic() - sent_at)
+
+    def eof_received(self) -> bool:
+        self.eof = True
+        self.client.write_eof()
+        self.client.close_if_done()
+        return True
+
+    def write_eof(self) -> None:
+        if self.transport.can_write_eof():
+            self.transport.write_eof()
+
+    def pause_writing(self) -> None:
+        self.client.transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        if not self.client.eof:
+            self.client.transport.resume_reading()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.client.transport.close()
+
+
+class AsyncLoadBalancer(LoadBalancer):
+    """
+    A load balancer whose data plane runs on a single asyncio event loop.
+
+    Each proxied connection costs two protocol objects instead of three OS threads, so one
+    process can hold tens of thousands of idle or keep-alive connections. Server selection
+    and health checking are shared with the threaded LoadBalancer.
+    """
+    def __init__(self, health_checker: HealthChecker, host: str = "localhost", port: int = 80, algorithm: str = "round_robin", backlog: int = LISTEN_BACKLOG, reuse_port: bool = False) -> None:
+        super().__init__(health_checker, host, port, algorithm, reuse_port=reuse_port, backlog=backlog)
+
+    def start(self) -> None:
+        self.start_health_check()
+        if uvloop is not None:
+            uvloop.install()
+
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            print("\nShutting down Load Balancer...")
+        finally:
+            self.running = False
+            self.stop_health_check()
+            print("Load balancer stopped.")
+
+    async def _serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(self._create_protocol, self.host, self.port, backlog=self.backlog, reuse_port=self.reuse_port or None)
+        print(f"Load balancer running on port {self.port} (asyncio)")
+
+        self.running = True
+        async with server:
+            await server.serve_forever()
+
+    def _create_protocol(self) -> _ClientProtocol:
+        return _ClientProtocol(self)
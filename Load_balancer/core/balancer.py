@@ -1,54 +1,285 @@
+import logging
+import random
 import socket
-from threading import Thread
-from algorithms.round_robbin import RoundRobinAlgorithm
+import time
+from typing import Collection, Dict, List, Optional, Sequence
+from algorithms import ALGORITHMS
 from .health_checker import HealthChecker
-from backend.backend_server import BackendServer
-from .config import HEALTH_CHECK_INTERVAL
+from backend.backend_server import BackendServer, UpstreamConnectError, UpstreamError, UpstreamTimeoutError
+from backend.connection_pool import PoolExhaustedError
+from backend.forwarding import should_log
+from backend.http import HttpError, HttpRequest, read_head
+from .config import (
+    CLIENT_IDLE_TIMEOUT,
+    CONNECT_RETRIES,
+    HANDLER_QUEUE_SIZE,
+    HANDLER_QUEUE_TIMEOUT,
+    HEALTH_CHECK_INTERVAL,
+    LISTEN_BACKLOG,
+    LOG_SAMPLE_RATE,
+    MAX_HANDLERS,
+    SATURATED_RETRIES,
+)
+from .handler_pool import HandlerPool
+from .metrics import REJECTED_CONNECTIONS, SELECTION_SECONDS
+from .router import Route, Router
+
+NOT_FOUND = b"HTTP/1.1 404 Not Found\r\nContent-Length: 16\r\nConnection: close\r\n\r\nNo route found!\n"
+SERVICE_UNAVAILABLE = b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 19\r\nConnection: close\r\n\r\nNo server available"
+BAD_GATEWAY = b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 18\r\nConnection: close\r\n\r\nNo server answered"
+GATEWAY_TIMEOUT = b"HTTP/1.1 504 Gateway Timeout\r\nContent-Length: 24\r\nConnection: close\r\n\r\nServer did not respond!\n"
+
+logger = logging.getLogger(__name__)
 
 class LoadBalancer:
-    def __init__(self, health_checker: HealthChecker, host: str ="localhost", port: int =80, algorithm: str ="round_robin"):
+    def __init__(self, health_checker: HealthChecker, host: str ="localhost", port: int =80, algorithm: str ="round_robin", mode: str ="tcp", log_sample_rate: float =LOG_SAMPLE_RATE, hash_key: str ="ip", reuse_port: bool =False, routes: Optional[List[Dict]] =None,
+                 backlog: int =LISTEN_BACKLOG, max_handlers: int =MAX_HANDLERS, queue_size: int =HANDLER_QUEUE_SIZE, queue_timeout: float =HANDLER_QUEUE_TIMEOUT):
         self.servers = []
+        self.algorithm = algorithm
         self._algorithm = self._select_algorithm(algorithm)
+        # Host and path routes to server pools, each with its own algorithm (HTTP mode)
+        self.router = Router.from_config(routes, algorithm) if routes else None
+        self.uses_key = self._algorithm.uses_key or (self.router is not None and self.router.uses_key)
         self.host = host
         self.port = port
         self.health_checker = health_checker
         self.health_check_interval = HEALTH_CHECK_INTERVAL
         self.running = False
+        if mode not in ("tcp", "http"):
+            raise ValueError(f"Unsupported mode: {mode}")
+        self.mode = mode
+        self.log_sample_rate = log_sample_rate
+        self.hash_key = self._parse_hash_key(hash_key)
+        if self.router is not None and mode != "http":
+            raise ValueError("Routes need HTTP mode")
+        # Lets several worker processes bind the same port
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+        self.max_handlers = max_handlers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._selection_seconds = SELECTION_SECONDS.labels()
+        self._backends_saturated = REJECTED_CONNECTIONS.labels("backend_saturated")
+        self._pool_exhausted = REJECTED_CONNECTIONS.labels("pool_exhausted")
     
     def _select_algorithm(self, algorithm: str) -> object:
-        if algorithm == "round_robin":
-            return RoundRobinAlgorithm()
-        else:
+        if algorithm not in ALGORITHMS:
             raise ValueError(f"Unsupported algorithm: {algorithm}")
+        return ALGORITHMS[algorithm]()
+
+    def _parse_hash_key(self, hash_key: str) -> tuple:
+        """
+        Parse where requests take their routing key from, for algorithms that use one.
+
+        :param hash_key: "ip", "header:<name>" or "cookie:<name>".
+        :return: A tuple (source, name).
+        """
+        source, _, name = hash_key.partition(":")
+        if source not in ("ip", "header", "cookie") or (source == "ip") == bool(name):
+            raise ValueError(f"Unsupported hash key: {hash_key}")
+        if source != "ip" and self.mode != "http":
+            raise ValueError("Header and cookie hash keys need HTTP mode")
+        return source, name
+
+    def update_servers(self, servers: List[BackendServer], routes: Optional[List[Dict]] = None) -> None:
+        """
+        Apply a reloaded configuration. Requests in progress keep the router they started with.
+
+        The health checker must publish a new snapshot afterwards, so the algorithms rebuild their
+        state for the new servers.
+
+        :param servers: The new list of servers; servers that stay must be the same instances.
+        :param routes: The new routes, whose servers are among `servers`.
+        """
+        if routes and self.mode != "http":
+            raise ValueError("Routes need HTTP mode")
+        if not routes:
+            router = None
+        elif self.router is None:
+            router = Router.from_config(routes, self.algorithm)
+        else:
+            router = self.router.reconfigure(routes, self.algorithm)
+        self.uses_key = self._algorithm.uses_key or (router is not None and router.uses_key)
+        self.router = router
+        self.servers = servers
+
+    def forget_servers(self, servers: Collection[BackendServer], previous_pools: Dict[Route, List[BackendServer]]) -> None:
+        """
+        Drop the algorithms' state for servers that left the configuration or a route's pool.
+
+        Call it after the health checker published a snapshot without the removed servers, or the
+        next request would bring them back.
+
+        :param servers: The servers removed from the configuration.
+        :param previous_pools: The pool of each route before `update_servers`.
+        """
+        self._algorithm.forget_servers(servers)
+        routes = set(self.router.routes) if self.router is not None else set()
+        for route, pool in previous_pools.items():
+            # A dropped route forgets its whole pool, a kept one the servers that left it
+            route.algorithm.forget_servers(set(pool).difference(route.servers) if route in routes else pool)
+
+    def get_next_server(self, key: Optional[str] = None, route: Optional[Route] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
+        """
+        Choose a server for a connection or request.
+
+        A server at its in-flight limit, already tried for this request, or whose half-open
+        circuit breaker is busy with a trial request is passed over for another pick of the
+        algorithm. After `SATURATED_RETRIES` more picks, the healthy servers are scanned for one
+        that can take the request, since some algorithms keep picking the same server (e.g. the
+        owner of a key); the request is refused rather than queued if there is none.
 
-    def get_next_server(self) -> BackendServer:
+        :param key: The routing key, for algorithms that use one.
+        :param route: The route whose pool the server is chosen from; all servers if None.
+        :param exclude: Servers that already failed this request.
+        :return: The chosen server, or None if there is no healthy server that is not saturated.
+        """
+        started = time.perf_counter()
         active_servers = self.health_checker.get_active_servers()
-        return self._algorithm.get_next_server(active_servers)
+        algorithm = self._algorithm if route is None else route
+        server = algorithm.get_next_server(active_servers, key, exclude)
+        retries = SATURATED_RETRIES
+        while server is not None and not self._can_take(server, exclude):
+            if retries == 0:
+                pool = active_servers if route is None else route.active_servers(active_servers)
+                saturated = server.is_saturated
+                server = self._scan(pool, exclude)
+                if server is None and saturated:
+                    self._backends_saturated.inc()
+                break
+            server = algorithm.get_next_server(active_servers, key, exclude)
+            retries -= 1
+        self._selection_seconds.observe(time.perf_counter() - started)
+        return server
+
+    @staticmethod
+    def _can_take(server: BackendServer, exclude: Collection[BackendServer]) -> bool:
+        # The breaker is asked last, as letting a trial request through claims it
+        return not server.is_saturated and server not in exclude and server.breaker.allow_request()
+
+    def _scan(self, active_servers: Sequence[BackendServer], exclude: Collection[BackendServer]) -> Optional[BackendServer]:
+        """Find any server that can take the request, starting at a random one so the fallback load is spread."""
+        count = len(active_servers)
+        start = random.randrange(count) if count else 0
+        for offset in range(count):
+            server = active_servers[(start + offset) % count]
+            if self._can_take(server, exclude):
+                return server
+        return None
 
     def _handle_request(self, client_conn: socket.socket) -> None:
-        server = self.get_next_server()
-        print(f"Selected server: {server.host}:{server.port}")
-        if not server:
-            response = "HTTP/1.1 503 Service Unavailable\r\n\r\nNo active servers!"
-            client_conn.sendall(response.encode())
-            client_conn.close()
+        if self.mode == "http":
+            self._handle_http(client_conn)
             return
-        
+
+        key = client_conn.getpeername()[0] if self.uses_key else None
+        log = should_log(self.log_sample_rate)
+        # Servers that could not be connected to; the client has sent nothing yet, so another one can take over
+        failed = []
         try:
-            server.handle_connections(client_conn)
+            while True:
+                server = self.get_next_server(key, exclude=failed) if len(failed) <= CONNECT_RETRIES else None
+                if not server:
+                    client_conn.sendall(BAD_GATEWAY if failed else SERVICE_UNAVAILABLE)
+                    return
+                if log:
+                    logger.info("Selected server: %s:%d", server.host, server.port)
+                try:
+                    server.handle_connections(client_conn, log=log)
+                    return
+                except UpstreamConnectError as e:
+                    logger.warning("%s", e)
+                    failed.append(server)
         except Exception as e:
-            print(f"Error handling request: {e}")
+            logger.warning("Error handling request: %s", e)
         finally:
             client_conn.close()
+
+    def _handle_http(self, client_conn: socket.socket) -> None:
+        """
+        Serve the HTTP/1.x requests of a keep-alive client connection, choosing a server for each request.
+
+        Only request heads are parsed; bodies are streamed to the chosen server as they arrive.
+        """
+        buffer = bytearray()
+        log = should_log(self.log_sample_rate)
+        try:
+            while True:
+                # An idle client must not hold a handler thread forever
+                client_conn.settimeout(CLIENT_IDLE_TIMEOUT)
+                head = read_head(client_conn, buffer)
+                if head is None:
+                    break
+                client_conn.settimeout(None)
+                request = HttpRequest(head)
+
+                route = None
+                if self.router is not None:
+                    route = self.router.match(request)
+                    if route is None:
+                        client_conn.sendall(NOT_FOUND)
+                        break
+
+                if not self._forward_request(client_conn, request, buffer, route, log):
+                    break
+        except socket.timeout:
+            pass
+        except (HttpError, OSError) as e:
+            logger.warning("Connection error: %s", e)
+        except Exception as e:
+            logger.warning("Error handling request: %s", e)
+        finally:
+            client_conn.close()
+
+    def _forward_request(self, client_conn: socket.socket, request: HttpRequest, buffer: bytearray, route: Optional[Route], log: bool) -> bool:
+        """
+        Send a request to a server, trying others while no connection to the chosen one can be opened.
+
+        :return: True if the client connection can carry another request.
+        """
+        key = self._request_key(client_conn, request)
+        failed = []
+        while True:
+            server = self.get_next_server(key, route, failed) if len(failed) <= CONNECT_RETRIES else None
+            if not server:
+                client_conn.sendall(BAD_GATEWAY if failed else SERVICE_UNAVAILABLE)
+                return False
+            if log:
+                logger.info("Selected server: %s:%d for %s %s", server.host, server.port, request.method, request.target)
+            try:
+                return server.handle_request(client_conn, request, buffer)
+            except UpstreamConnectError as e:
+                logger.warning("%s", e)
+                failed.append(server)
+            except UpstreamError as e:
+                logger.warning("%s", e)
+                client_conn.sendall(GATEWAY_TIMEOUT if isinstance(e, UpstreamTimeoutError) else BAD_GATEWAY)
+                return False
+            except PoolExhaustedError as e:
+                logger.warning("%s", e)
+                self._pool_exhausted.inc()
+                client_conn.sendall(SERVICE_UNAVAILABLE)
+                return False
+
+    def _request_key(self, client_conn: socket.socket, request: HttpRequest) -> Optional[str]:
+        if not self.uses_key:
+            return None
+        source, name = self.hash_key
+        if source == "ip":
+            return client_conn.getpeername()[0]
+        if source == "header":
+            return request.headers.get(name.lower())
+        return request.get_cookie(name)
     
     def start(self) -> None:
-        def handle_client(client_conn, client_addr):
-            self._handle_request(client_conn)
-        
+        handlers = HandlerPool(self._handle_request, self.max_handlers, self.queue_size, self.queue_timeout)
         self.start_health_check()
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as lb_socket:
+            lb_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                lb_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             lb_socket.bind((self.host, self.port))
-            lb_socket.listen(5)
+            lb_socket.listen(self.backlog)
             lb_socket.settimeout(1.0)
             print(f"Load balancer running on port {self.port}")
 
@@ -57,7 +288,9 @@ class LoadBalancer:
                 while self.running:
                     try:
                         client_conn, client_addr = lb_socket.accept()
-                        Thread(target=handle_client, args=(client_conn, client_addr)).start()
+                        # Replies relayed in several writes must not wait for the client's delayed ACK
+                        client_conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                        handlers.submit(client_conn)
                     except socket.timeout:
                         pass
             except KeyboardInterrupt:
@@ -65,6 +298,7 @@ class LoadBalancer:
             finally:
                 self.running = False
                 lb_socket.close()
+                handlers.shutdown()
                 self.stop_health_check()  
                 print("Load balancer stopped.")
     
@@ -1,3 +1,61 @@
 HEALTH_CHECK_INTERVAL = 10
 HEALTH_CHECK_PATH = "/"
 BALANCER_PORT = 80
+
+# Pending connections the listener lets the kernel queue (capped by net.core.somaxconn)
+LISTEN_BACKLOG = 4096
+
+# Threaded engine admission control: most threads handling client connections, most accepted
+# connections waiting for one, and seconds a connection may wait before it is answered with 503
+MAX_HANDLERS = 256
+HANDLER_QUEUE_SIZE = 1024
+HANDLER_QUEUE_TIMEOUT = 2.0
+# Seconds an HTTP client may take to send the next request head before its connection is closed
+CLIENT_IDLE_TIMEOUT = 15
+# Extra picks tried when the chosen server is at its in-flight limit, before answering with 503
+SATURATED_RETRIES = 3
+
+# Pooled backend connections (HTTP mode)
+POOL_MAX_IDLE = 32
+POOL_MAX_CONNECTIONS = 256
+POOL_IDLE_TIMEOUT = 30
+# Seconds a request waits for a connection when the pool is at its limit, before it gets 503
+POOL_ACQUIRE_TIMEOUT = 5
+CONNECT_TIMEOUT = 3
+# Seconds a backend may take to take a request and send the head of its response (HTTP mode)
+UPSTREAM_RESPONSE_TIMEOUT = 30
+# Other backends tried when no connection to the chosen one can be opened
+CONNECT_RETRIES = 2
+
+# Circuit breaking on live traffic: consecutive failed requests (refused connections, resets and
+# timeouts) that take a backend out of selection, seconds it stays out before one trial request
+# is let through, and the most seconds it stays out after failed trials
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_OPEN_TIME = 5
+CIRCUIT_MAX_OPEN_TIME = 60
+
+# Bytes moved per read when relaying raw streams
+FORWARD_BUFFER_SIZE = 256 * 1024
+# Fraction of client connections whose traffic is printed (0 disables logging)
+LOG_SAMPLE_RATE = 0.0
+
+# Seconds over which old latency samples lose most of their weight
+LATENCY_DECAY_TIME = 10.0
+
+# Consistent hashing: ring points per unit of server weight, and how far above its
+# fair share of connections a server may go before requests spill over to the next one
+HASH_VIRTUAL_NODES = 100
+HASH_LOAD_FACTOR = 1.25
+
+# Health checks: consecutive results needed to mark a server healthy (rise) or unhealthy (fall),
+# seconds between checks while a server is down or changing status, per-probe timeout,
+# random spread of each server's schedule, and the most probes run at once
+HEALTH_CHECK_RISE = 2
+HEALTH_CHECK_FALL = 3
+HEALTH_CHECK_FAST_INTERVAL = 1
+HEALTH_CHECK_TIMEOUT = 2
+HEALTH_CHECK_JITTER = 0.1
+HEALTH_CHECK_MAX_WORKERS = 32
+
+# Seconds between checks of the configuration file for changes
+CONFIG_POLL_INTERVAL = 2
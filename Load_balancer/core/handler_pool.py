@@ -0,0 +1,135 @@
+import logging
+import queue
+import socket
+import threading
+import time
+from typing import Callable, Optional, Tuple
+from .config import HANDLER_QUEUE_SIZE, HANDLER_QUEUE_TIMEOUT, MAX_HANDLERS
+from .metrics import REJECTED_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+SERVER_BUSY = b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 15\r\nConnection: close\r\nRetry-After: 1\r\n\r\nServer is busy!"
+
+
+def reject(client_conn: socket.socket, reason: str) -> None:
+    """
+    Answer a client with 503 and close its connection, without ever blocking the caller.
+
+    :param client_conn: The client connection.
+    :param reason: Why it was rejected, as counted in the metrics.
+    """
+    REJECTED_CONNECTIONS.labels(reason).inc()
+    try:
+        client_conn.setblocking(False)
+        client_conn.send(SERVER_BUSY)
+    except OSError:
+        pass
+    finally:
+        client_conn.close()
+
+
+class HandlerPool:
+    """
+    A bounded pool of threads that handle accepted client connections.
+
+    Connections wait in a bounded queue until a thread is free. When the queue is full, or a
+    connection has waited longer than the queue timeout, the client gets a 503 at once instead of
+    waiting behind everyone else, so an overload slows nobody down beyond the queue timeout.
+    Threads are started only as they are needed, up to the limit.
+    """
+    def __init__(self, handler: Callable[[socket.socket], None], max_handlers: int = MAX_HANDLERS, queue_size: int = HANDLER_QUEUE_SIZE, queue_timeout: float = HANDLER_QUEUE_TIMEOUT) -> None:
+        """
+        Initialize the HandlerPool.
+
+        :param handler: Serves one client connection; it must close the connection.
+        :param max_handlers: Most threads handling connections at once.
+        :param queue_size: Most connections waiting for a free thread.
+        :param queue_timeout: Seconds a connection may wait for a free thread.
+        """
+        if max_handlers < 1 or queue_size < 1:
+            raise ValueError("The handler pool needs at least one thread and one queue slot")
+
+        self.handler = handler
+        self.max_handlers = max_handlers
+        self.queue_timeout = queue_timeout
+        self._queue: "queue.Queue[Optional[Tuple[socket.socket, float]]]" = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._threads = 0
+        self._idle = 0
+        # Queued connections no thread has taken yet, counted down together with the idle threads:
+        # the queue's own size drops as soon as get() returns, before the thread counts itself busy
+        self._pending = 0
+
+    def submit(self, client_conn: socket.socket) -> bool:
+        """
+        Queue a client connection for a handler thread.
+
+        :param client_conn: The accepted client connection.
+        :return: False if the queue was full and the client was rejected.
+        """
+        with self._lock:
+            try:
+                self._queue.put_nowait((client_conn, time.monotonic()))
+            except queue.Full:
+                full = True
+            else:
+                full = False
+                self._pending += 1
+            # Start a thread only if the queued connections outnumber the threads free to take them
+            start_thread = not full and self._pending > self._idle and self._threads < self.max_handlers
+            if start_thread:
+                self._threads += 1
+                # Counted as idle until it takes a connection
+                self._idle += 1
+        if full:
+            reject(client_conn, "queue_full")
+            return False
+        if start_thread:
+            threading.Thread(target=self._run, name=f"handler-{self._threads}", daemon=True).start()
+        return True
+
+    def shutdown(self) -> None:
+        """Let the threads exit once they finish their current connection; queued clients are rejected."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                with self._lock:
+                    self._pending -= 1
+                reject(item[0], "shutdown")
+        with self._lock:
+            threads = self._threads
+        for _ in range(threads):
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            with self._lock:
+                self._pending -= 1
+                self._idle -= 1
+
+            client_conn, queued_at = item
+            if time.monotonic() - queued_at > self.queue_timeout:
+                reject(client_conn, "queue_timeout")
+            else:
+                try:
+                    self.handler(client_conn)
+                except Exception as e:
+                    logger.warning("Error handling request: %s", e)
+                    client_conn.close()
+
+            with self._lock:
+                self._idle += 1
+
+        with self._lock:
+            self._idle -= 1
+            self._threads -= 1
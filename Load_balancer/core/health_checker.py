@@ -1,76 +1,222 @@
+import heapq
+import itertools
+import logging
+import random
 import threading
 import time
 import requests
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 from backend.backend_server import BackendServer
+from backend.circuit_breaker import next_reopening
+from .config import (
+    HEALTH_CHECK_FALL,
+    HEALTH_CHECK_FAST_INTERVAL,
+    HEALTH_CHECK_JITTER,
+    HEALTH_CHECK_MAX_WORKERS,
+    HEALTH_CHECK_RISE,
+    HEALTH_CHECK_TIMEOUT,
+)
+from .metrics import HEALTH_CHANGES
+
+logger = logging.getLogger(__name__)
+
+class ServerSnapshot(tuple):
+    """
+    An immutable tuple of the servers that were healthy at one point in time.
+
+    A new snapshot with a higher version is published only when a server's health changes, so
+    algorithms can precompute state once per version instead of once per request.
+    """
+    def __new__(cls, servers: Iterable[BackendServer], version: int) -> "ServerSnapshot":
+        snapshot = super().__new__(cls, servers)
+        snapshot.version = version
+        return snapshot
+
 
 class HealthChecker:
-    def __init__(self, servers: List[BackendServer], health_check_path: str ="/") -> None:
+    def __init__(self, servers: List[BackendServer], health_check_path: str ="/", rise: int =HEALTH_CHECK_RISE, fall: int =HEALTH_CHECK_FALL) -> None:
         """
         Initialize the HealthChecker.
-        
+
+        Every server is probed on its own schedule by a pool of worker threads, so a slow or dead
+        server never delays the checks of the others. Servers whose circuit breaker is open are
+        left out of the snapshot as soon as it opens, without waiting for a probe.
+
         :param servers: List of server URLs to monitor.
         :param health_check_path: Endpoint path for health checks.
+        :param rise: Consecutive successful checks before an unhealthy server is marked healthy.
+        :param fall: Consecutive failed checks before a healthy server is marked unhealthy.
         """
         self.servers = servers
+        self._members = set(servers)
         self.health_check_path = health_check_path
+        self.rise = rise
+        self.fall = fall
         self.running = False
         self.thread = None
-    
+        self._active_servers = ServerSnapshot((server for server in servers if server.is_alive and not server.breaker.is_open), version=0)
+        # When the next open circuit breaker lets a trial request through, and its server must be back in the snapshot
+        self._reopen_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._interval = 0.0
+        # Probes that are due, as (due time, tie breaker, server)
+        self._schedule: List[Tuple[float, int, BackendServer]] = []
+        self._sequence = itertools.count()
+        # Consecutive results that disagree with each server's current status
+        self._streaks: Dict[BackendServer, int] = {}
+        self._sessions = threading.local()
+        self._executor = None
+        for server in servers:
+            server.breaker.add_listener(self._breaker_changed)
+
     def start(self, interval: int) -> None:
         """
         Start periodic health checks in a background thread.
-        
-        :param interval: Time in seconds between health checks.
+
+        :param interval: Time in seconds between health checks of a server whose status is settled.
         """
         if self.running:
             print("Health checker is already running.")
             return
-        
+
         self.running = True
-        self.thread = threading.Thread(target=self._run_health_checks, args=(interval,))
+        self._interval = interval
+        self._wakeup.clear()
+        # Threads are only started as probes need them, so servers added by update_servers get them too
+        self._executor = ThreadPoolExecutor(max_workers=HEALTH_CHECK_MAX_WORKERS, thread_name_prefix="health-check")
+        now = time.monotonic()
+        with self._lock:
+            # Spread the first checks over a fraction of the interval so they do not all line up
+            self._schedule = [(now + random.uniform(0, HEALTH_CHECK_JITTER * interval), next(self._sequence), server) for server in self.servers]
+            heapq.heapify(self._schedule)
+
+        self.thread = threading.Thread(target=self._run_health_checks)
         self.thread.daemon = True
         self.thread.start()
-    
+
     def stop(self) -> None:
         """Stop the health checks."""
         self.running = False
+        self._wakeup.set()
         if self.thread and self.thread.is_alive():
             self.thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
         print("Health check stopped.")
-    
-    def _run_health_checks(self, interval: int) -> None:
-        """"Perform periodic health checks."""
+
+    def _run_health_checks(self) -> None:
+        """Hand each server's probe to the worker pool when it is due."""
         while self.running:
-            self._perform_health_checks()
-            time.sleep(interval)
-    
-    def _perform_health_checks(self) -> None:
-        """Check the health of all servers and update their status."""
-        for server in self.servers:
-            is_healty = self._check_server_health(server)
-            server.update_health_status(is_healty)
-    
+            # Cleared before the schedule is read, so a probe finishing after this still wakes the loop
+            self._wakeup.clear()
+            now = time.monotonic()
+            with self._lock:
+                while self._schedule and self._schedule[0][0] <= now:
+                    _, _, server = heapq.heappop(self._schedule)
+                    # Servers removed from the configuration are no longer checked
+                    if server in self._members:
+                        self._executor.submit(self._probe, server)
+                timeout = self._schedule[0][0] - now if self._schedule else None
+
+            # Woken early when a finished probe schedules a check sooner, or on stop
+            self._wakeup.wait(timeout)
+
+    def _probe(self, server: BackendServer) -> None:
+        """Check one server, apply the rise/fall thresholds and schedule its next check."""
+        is_healthy = self._check_server_health(server)
+        with self._lock:
+            if server not in self._members:
+                return
+            streak = self._streaks.get(server, 0) + 1 if is_healthy != server.is_alive else 0
+            if streak >= (self.rise if is_healthy else self.fall):
+                server.update_health_status(is_healthy)
+                state = "healthy" if is_healthy else "unhealthy"
+                logger.info("Server %s:%d is now %s.", server.host, server.port, state)
+                HEALTH_CHANGES.labels(f"{server.host}:{server.port}", state).inc()
+                self._publish_active_servers()
+                streak = 0
+            self._streaks[server] = streak
+
+            # Re-check soon while a status change is pending or the server is down
+            interval = self._interval if streak == 0 and server.is_alive else min(HEALTH_CHECK_FAST_INTERVAL, self._interval)
+            interval *= random.uniform(1 - HEALTH_CHECK_JITTER, 1 + HEALTH_CHECK_JITTER)
+            heapq.heappush(self._schedule, (time.monotonic() + interval, next(self._sequence), server))
+        self._wakeup.set()
+
+    def update_servers(self, servers: List[BackendServer]) -> None:
+        """
+        Replace the monitored servers, e.g. after the configuration was reloaded.
+
+        Servers that stay keep their health and schedule. New servers get no traffic until they
+        pass `rise` checks, and removed servers are left out of the next snapshot at once.
+
+        :param servers: The new list of servers; servers that stay must be the same instances.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for server in servers:
+                if server not in self._members:
+                    server.update_health_status(False)
+                    server.breaker.add_listener(self._breaker_changed)
+                    self._streaks[server] = 0
+                    if self.running:
+                        heapq.heappush(self._schedule, (now, next(self._sequence), server))
+            for server in self._members.difference(servers):
+                self._streaks.pop(server, None)
+
+            self.servers = list(servers)
+            self._members = set(servers)
+            self._publish_active_servers()
+        self._wakeup.set()
+
     def _check_server_health(self, server: BackendServer) -> bool:
         """
         Check the health of a single server.
-        
+
         :param server: Server URL to check.
         :return: True if the server is healthy, False otherwise.
         """
 
         try:
             url = f"http://{server.host}:{server.port}{self.health_check_path}"
-            response = requests.get(url, timeout=2)
+            response = self._session().get(url, timeout=HEALTH_CHECK_TIMEOUT)
             return response.status_code == 200
         except requests.RequestException as e:
-            print(f"Health check failed for {server.host}:{server.port} - {e}")
+            logger.warning("Health check failed for %s:%d - %s", server.host, server.port, e)
             return False
-    
-    def get_active_servers(self) -> List[BackendServer]:
+
+    def _session(self) -> requests.Session:
+        """A session per worker thread, so probes reuse keep-alive connections."""
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = self._sessions.session = requests.Session()
+        return session
+
+    def _breaker_changed(self, state: str) -> None:
+        with self._lock:
+            self._publish_active_servers()
+
+    def _publish_active_servers(self) -> None:
+        """Replace the snapshot of healthy servers; requests already holding the old one keep using it."""
+        servers = (server for server in self.servers if server.is_alive and not server.breaker.is_open)
+        self._active_servers = ServerSnapshot(servers, version=self._active_servers.version + 1)
+        self._reopen_at = next_reopening(server.breaker for server in self.servers)
+
+    def get_active_servers(self) -> ServerSnapshot:
         """
-        Retrieve the list of servers that are currently healthy.
-        
-        :return: List of healthy servers.
+        Retrieve the servers that are currently healthy.
+
+        This returns the current snapshot without copying it, so it costs the same however many
+        servers there are. Servers whose circuit breaker is due for a trial request are put back
+        by the first call after it is due.
+
+        :return: Snapshot of healthy servers.
         """
-        return [server for server in self.servers if server.is_alive]
\ No newline at end of file
+        if self._reopen_at is not None and time.monotonic() >= self._reopen_at:
+            with self._lock:
+                if self._reopen_at is not None and time.monotonic() >= self._reopen_at:
+                    self._publish_active_servers()
+        return self._active_servers
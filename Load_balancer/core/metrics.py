@@ -0,0 +1,244 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds of the histogram buckets, in seconds
+SELECTION_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.001)
+CONNECT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Counter:
+    """A value that only goes up."""
+    def __init__(self) -> None:
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: str) -> Iterable[str]:
+        yield f"{name}{labels} {self.value}"
+
+
+class Histogram:
+    """Counts of observed values in fixed buckets, with their sum."""
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        # One count per bucket, and one for values above the last bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name: str, labels: str) -> Iterable[str]:
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        separator = "," if labels else ""
+        inner = labels[1:-1] if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f'{name}_bucket{{{inner}{separator}le="{le}"}} {cumulative}'
+        yield f"{name}_sum{labels} {total}"
+        yield f"{name}_count{labels} {cumulative}"
+
+
+class MetricFamily:
+    """
+    A metric and its children, one per combination of label values.
+
+    Children are created on first use and cached, so callers that look them up once and keep
+    them only pay for the increment on the hot path.
+    """
+    def __init__(self, name: str, help: str, type: str, label_names: Sequence[str] = (), factory: Callable[[], object] = Counter) -> None:
+        self.name = name
+        self.help = help
+        self.type = type
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> object:
+        """
+        Get the child for some label values, creating it if needed.
+
+        :param values: One value per label name, in order.
+        :return: The Counter or Histogram for those values.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def collect(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield from child.samples(self.name, format_labels(self.label_names, values))
+
+
+class GaugeFunction:
+    """A gauge whose values are read from a callback when metrics are collected."""
+    def __init__(self, name: str, help: str, label_names: Sequence[str], callback: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]) -> None:
+        self.name = name
+        self.help = help
+        self.type = "gauge"
+        self.label_names = tuple(label_names)
+        self._callback = callback
+
+    def collect(self) -> Iterable[str]:
+        for values, value in self._callback():
+            yield f"{self.name}{format_labels(self.label_names, values)} {value}"
+
+
+class MetricsRegistry:
+    """The metrics of this process, rendered in the Prometheus text format."""
+    def __init__(self) -> None:
+        self._metrics: List[object] = []
+        self._collect_hooks: List[Callable[[], object]] = []
+
+    def register(self, metric: object) -> object:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collect_hook(self, hook: Callable[[], object]) -> None:
+        """Run a callback before every collection, e.g. to bring state read by gauges up to date."""
+        self._collect_hooks.append(hook)
+
+    def render(self) -> str:
+        for hook in self._collect_hooks:
+            hook()
+        lines = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = MetricsRegistry()
+
+BACKEND_REQUESTS = REGISTRY.register(MetricFamily(
+    "lb_backend_requests_total", "Requests sent to each backend (client connections in TCP mode).", "counter", ["backend"]))
+BACKEND_SENT_BYTES = REGISTRY.register(MetricFamily(
+    "lb_backend_sent_bytes_total", "Bytes forwarded from clients to each backend.", "counter", ["backend"]))
+BACKEND_RECEIVED_BYTES = REGISTRY.register(MetricFamily(
+    "lb_backend_received_bytes_total", "Bytes forwarded from each backend to clients.", "counter", ["backend"]))
+UPSTREAM_CONNECT_SECONDS = REGISTRY.register(MetricFamily(
+    "lb_upstream_connect_seconds", "Time to open a new connection to each backend.", "histogram", ["backend"], lambda: Histogram(CONNECT_BUCKETS)))
+SELECTION_SECONDS = REGISTRY.register(MetricFamily(
+    "lb_selection_seconds", "Time to choose a backend for a request.", "histogram", [], lambda: Histogram(SELECTION_BUCKETS)))
+REJECTED_CONNECTIONS = REGISTRY.register(MetricFamily(
+    "lb_rejected_total", "Connections or requests answered with 503 because the load balancer or every backend was busy.", "counter", ["reason"]))
+HEALTH_CHANGES = REGISTRY.register(MetricFamily(
+    "lb_health_changes_total", "Times each backend was marked healthy or unhealthy.", "counter", ["backend", "state"]))
+BREAKER_CHANGES = REGISTRY.register(MetricFamily(
+    "lb_circuit_breaker_changes_total", "Times the circuit breaker of each backend opened or closed on failures of live requests.", "counter", ["backend", "state"]))
+UPSTREAM_FAILURES = REGISTRY.register(MetricFamily(
+    "lb_upstream_failures_total", "Requests that failed because of each backend, by kind (connect, reset or timeout).", "counter", ["backend", "kind"]))
+
+
+class BackendMetrics:
+    """The metrics of one backend, looked up once so that recording them costs no label lookups."""
+    def __init__(self, backend: str) -> None:
+        """
+        Initialize the BackendMetrics.
+
+        :param backend: The backend's label value, as "host:port".
+        """
+        self.requests = BACKEND_REQUESTS.labels(backend)
+        self.sent_bytes = BACKEND_SENT_BYTES.labels(backend)
+        self.received_bytes = BACKEND_RECEIVED_BYTES.labels(backend)
+        self.connect_seconds = UPSTREAM_CONNECT_SECONDS.labels(backend)
+        self.connect_failures = UPSTREAM_FAILURES.labels(backend, "connect")
+        self.reset_failures = UPSTREAM_FAILURES.labels(backend, "reset")
+        self.timeout_failures = UPSTREAM_FAILURES.labels(backend, "timeout")
+        self.breaker_opened = BREAKER_CHANGES.labels(backend, "open")
+        self.breaker_closed = BREAKER_CHANGES.labels(backend, "closed")
+
+
+# The backend servers whose connections and health are exported, and how their connections are counted
+_watched_servers: Sequence[object] = ()
+_count_connections: Callable[[object], int] = lambda server: server.num_connections
+
+
+def watch_servers(servers: Sequence[object], count_connections: Optional[Callable[[object], int]] = None) -> None:
+    """
+    Export the open connections and health of the backend servers, read when metrics are collected.
+
+    :param servers: The backend servers; they replace any servers watched before.
+    :param count_connections: Returns the open connections of a server, e.g. summed over worker
+        processes; by default the server's own count.
+    """
+    global _watched_servers, _count_connections
+    _watched_servers = list(servers)
+    _count_connections = count_connections or (lambda server: server.num_connections)
+
+
+def _active_connections() -> List[Tuple[Tuple[str, ...], float]]:
+    return [((f"{server.host}:{server.port}",), _count_connections(server)) for server in _watched_servers]
+
+
+def _healthy() -> List[Tuple[Tuple[str, ...], float]]:
+    return [((f"{server.host}:{server.port}",), int(server.is_alive)) for server in _watched_servers]
+
+
+REGISTRY.register(GaugeFunction("lb_backend_active_connections", "Client connections open to each backend (requests in flight in HTTP mode).", ["backend"], _active_connections))
+REGISTRY.register(GaugeFunction("lb_backend_healthy", "Whether each backend is healthy (1) or not (0).", ["backend"], _healthy))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # scrapes are not worth a line each
+
+
+def start_admin_server(host: str, port: int) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve the metrics at http://host:port/metrics from a background thread.
+
+    :param host: Address to listen on; keep it local unless the port is firewalled.
+    :param port: Port to listen on.
+    :return: The server, or None if the port could not be bound.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Could not start the admin server on {host}:{port} - {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="admin-server", daemon=True).start()
+    print(f"Metrics available at http://{host}:{port}/metrics")
+    return server
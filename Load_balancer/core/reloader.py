@@ -0,0 +1,138 @@
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+from backend.backend_server import BackendServer
+from servers.server import load_config
+from .balancer import LoadBalancer
+from .config import CONFIG_POLL_INTERVAL
+from .health_checker import HealthChecker
+from .metrics import watch_servers
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigReloader:
+    """
+    Watches the configuration file and applies its changes to a running load balancer.
+
+    The file is polled for a new modification time or size, which works on every platform and
+    costs one stat() per interval. Servers whose id, host, port and weight are unchanged keep
+    their instance, and with it their health, connection pool and algorithm state. New servers
+    join once they pass their health checks. Removed servers get no new requests but finish the
+    ones in flight, and their pooled connections are closed once they are idle.
+    """
+    def __init__(self, config_file: str, load_balancer: LoadBalancer, health_checker: HealthChecker, servers: List[BackendServer], interval: float = CONFIG_POLL_INTERVAL, default_max_in_flight: Optional[int] = None) -> None:
+        """
+        Initialize the ConfigReloader.
+
+        :param config_file: Path to the JSON configuration file.
+        :param load_balancer: The running load balancer.
+        :param health_checker: Its health checker.
+        :param servers: The servers currently configured.
+        :param interval: Seconds between checks of the file.
+        :param default_max_in_flight: In-flight limit of new servers that do not set their own.
+        """
+        self.config_file = config_file
+        self.load_balancer = load_balancer
+        self.health_checker = health_checker
+        self.servers = list(servers)
+        self.interval = interval
+        self.default_max_in_flight = default_max_in_flight
+        # Removed servers that still have requests in flight
+        self.draining: List[BackendServer] = []
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start watching the file in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the file."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            signature = self._stat()
+            if signature is not None and signature != self._signature:
+                self._signature = signature
+                self.reload()
+            self._finish_draining()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        """
+        Load the configuration file and apply it.
+
+        :return: False if the file was invalid and the current configuration was kept.
+        """
+        loaded, routes = load_config(self.config_file)
+        if not loaded:
+            logger.warning("Keeping the current configuration; %s has no servers or could not be loaded.", self.config_file)
+            return False
+
+        current = {self._identity(server): server for server in self.servers}
+        servers = []
+        limits = []
+        kept = {}
+        for server in loaded:
+            max_in_flight = server.max_in_flight if server.max_in_flight is not None else self.default_max_in_flight
+            existing = current.get(self._identity(server))
+            if existing is not None:
+                kept[server] = existing
+                server = existing
+            servers.append(server)
+            limits.append((server, max_in_flight))
+        # The loaded routes refer to the freshly loaded instances of the servers that stay
+        routes = [dict(route, servers=[kept.get(server, server) for server in route["servers"]]) for route in routes]
+
+        router = self.load_balancer.router
+        previous_pools = {route: route.servers for route in router.routes} if router is not None else {}
+        try:
+            self.load_balancer.update_servers(servers, routes)
+        except ValueError as e:
+            logger.warning("Keeping the current configuration; %s is invalid: %s", self.config_file, e)
+            return False
+
+        for server, max_in_flight in limits:
+            server.max_in_flight = max_in_flight
+        previous = set(self.servers)
+        members = set(servers)
+        removed = [server for server in self.servers if server not in members]
+        added = [server for server in servers if server not in previous]
+        # Publishing the new snapshot is what takes removed servers out of selection
+        self.health_checker.update_servers(servers)
+        self.load_balancer.forget_servers(removed, previous_pools)
+        watch_servers(servers)
+        self.servers = servers
+
+        self.draining = [server for server in self.draining if server not in members] + removed
+        for server in added:
+            logger.info("Added server %s:%d; it gets traffic once it passes its health checks.", server.host, server.port)
+        for server in removed:
+            logger.info("Removed server %s:%d; draining %d connections.", server.host, server.port, server.num_connections)
+        self._finish_draining()
+        return True
+
+    def _finish_draining(self) -> None:
+        for server in [server for server in self.draining if server.num_connections == 0]:
+            server.pool.close()
+            self.draining.remove(server)
+            logger.info("Server %s:%d is drained.", server.host, server.port)
+
+    @staticmethod
+    def _identity(server: BackendServer) -> tuple:
+        return server.id, server.host, server.port, server.weight
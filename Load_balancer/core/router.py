@@ -0,0 +1,160 @@
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+from algorithms import ALGORITHMS
+from backend.backend_server import BackendServer
+from backend.http import HttpRequest
+from .health_checker import ServerSnapshot
+
+
+class Route:
+    """
+    Requests whose host and path match are sent to a pool of servers, chosen by the pool's own algorithm.
+
+    Each route keeps a snapshot of the pool's healthy servers, rebuilt only when the balancer's
+    snapshot version changes, so the algorithm's per-version state works per pool as well.
+    """
+    def __init__(self, servers: Sequence[BackendServer], host: Optional[str] = None, path: str = "/", algorithm: str = "round_robin") -> None:
+        """
+        Initialize the Route.
+
+        :param servers: The pool of servers.
+        :param host: The Host header to match, without the port; any host matches if None.
+        :param path: The path prefix to match.
+        :param algorithm: Name of the load balancing algorithm used within the pool.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported algorithm: {algorithm}")
+        if not path.startswith("/"):
+            raise ValueError(f"Route path must start with '/', got {path!r}")
+
+        self.host = host.lower() if host else None
+        self.path = path
+        self.algorithm_name = algorithm
+        self.algorithm = ALGORITHMS[algorithm]()
+        self.uses_key = self.algorithm.uses_key
+        self.set_servers(servers)
+
+    def set_servers(self, servers: Sequence[BackendServer]) -> None:
+        """
+        Replace the pool, keeping the algorithm and its state.
+
+        The algorithm picks up the new pool with the next snapshot version, so the health checker
+        should publish one after the pools have been replaced.
+        """
+        self.servers = list(servers)
+        self._members = frozenset(self.servers)
+        self._active_servers: Tuple[Optional[int], ServerSnapshot] = (None, ServerSnapshot((), version=0))
+
+    def matches(self, host: Optional[str], path: str) -> bool:
+        """
+        Check whether a request belongs to this route.
+
+        The path matches on whole segments: "/api" matches "/api" and "/api/users" but not
+        "/apiary", while "/static/" matches only paths below it.
+        """
+        if self.host is not None and host != self.host:
+            return False
+        if self.path.endswith("/"):
+            return path.startswith(self.path)
+        return path == self.path or path.startswith(self.path + "/")
+
+    def active_servers(self, active_servers: ServerSnapshot) -> ServerSnapshot:
+        """
+        Get the healthy servers of this pool.
+
+        :param active_servers: Snapshot of all healthy servers.
+        :return: A snapshot of the pool's healthy servers, with the same version.
+        """
+        version, pool = self._active_servers
+        if version != active_servers.version:
+            pool = ServerSnapshot((server for server in active_servers if server in self._members), version=active_servers.version)
+            self._active_servers = (active_servers.version, pool)
+        return pool
+
+    def get_next_server(self, active_servers: ServerSnapshot, key: Optional[str] = None, exclude: Collection[BackendServer] = ()) -> BackendServer:
+        """
+        Choose a server of this pool for a request.
+
+        :param active_servers: Snapshot of all healthy servers.
+        :param key: The routing key, for algorithms that use one.
+        :param exclude: Servers the algorithm should pass over.
+        :return: The chosen server, or None if no server of the pool is healthy.
+        """
+        return self.algorithm.get_next_server(self.active_servers(active_servers), key, exclude)
+
+
+class Router:
+    """Picks the route of each HTTP request; routes are tried in order and the first match wins."""
+    def __init__(self, routes: List[Route]) -> None:
+        self.routes = routes
+        self.uses_key = any(route.uses_key for route in routes)
+
+    @classmethod
+    def from_config(cls, routes: List[Dict], default_algorithm: str) -> "Router":
+        """
+        Build a router from route configurations.
+
+        :param routes: Dicts with "servers" (BackendServer instances) and optional "host", "path" and "algorithm".
+        :param default_algorithm: Algorithm for routes that do not name one.
+        """
+        return cls([Route(route["servers"], route.get("host"), route.get("path", "/"), route.get("algorithm", default_algorithm)) for route in routes])
+
+    def reconfigure(self, routes: List[Dict], default_algorithm: str) -> "Router":
+        """
+        Build a router for new route configurations, e.g. after the configuration was reloaded.
+
+        A route with the same host, path and algorithm as one of this router keeps its Route, so
+        its algorithm state carries over; only its pool is replaced, in place.
+
+        :param routes: Route configurations, as for `from_config`.
+        :param default_algorithm: Algorithm for routes that do not name one.
+        :return: The new router.
+        """
+        existing = {(route.host, route.path, route.algorithm_name): route for route in self.routes}
+        new_routes = []
+        kept = []
+        for config in routes:
+            host = config.get("host")
+            key = (host.lower() if host else None, config.get("path", "/"), config.get("algorithm", default_algorithm))
+            route = existing.pop(key, None)
+            if route is None:
+                route = Route(config["servers"], host, key[1], key[2])
+            else:
+                kept.append((route, config["servers"]))
+            new_routes.append(route)
+
+        # Only once every new route is valid, so a bad configuration leaves the current routes untouched
+        for route, servers in kept:
+            route.set_servers(servers)
+        return Router(new_routes)
+
+    def match(self, request: HttpRequest) -> Optional[Route]:
+        """
+        Find the route of a request.
+
+        :param request: The request head.
+        :return: The first matching route, or None if no route matches.
+        """
+        host, path = request_host_and_path(request)
+        for route in self.routes:
+            if route.matches(host, path):
+                return route
+        return None
+
+
+def request_host_and_path(request: HttpRequest) -> Tuple[Optional[str], str]:
+    """
+    Get the lowercase host, without its port, and the path of a request.
+
+    Absolute targets ("http://host/path", as sent to proxies) take precedence over the Host header.
+    """
+    target = request.target
+    host = request.headers.get("host")
+    if "://" in target:
+        authority, _, rest = target.partition("://")[2].partition("/")
+        host, target = authority, "/" + rest
+    path = target.split("?", 1)[0]
+    if host:
+        # Keep IPv6 literals such as [::1]:8080 whole
+        host = host.rsplit(":", 1)[0] if host.count(":") == 1 or "]:" in host else host
+        host = host.lower()
+    return host or None, path
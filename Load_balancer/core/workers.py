@@ -0,0 +1,241 @@
+import ctypes
+import multiprocessing
+import signal
+import threading
+import time
+from typing import Callable, List, Optional
+from backend.backend_server import BackendServer
+from backend.circuit_breaker import next_reopening
+from .balancer import LoadBalancer
+from .health_checker import HealthChecker, ServerSnapshot
+from .metrics import REGISTRY, start_admin_server, watch_servers
+
+
+class SharedState:
+    """
+    Backend health and connection counts in memory shared by the health-checking process and its workers.
+
+    Health is published under a sequence lock: the writer makes the sequence odd, updates the flags
+    and makes it even again, and readers retry if the sequence changed while they were reading.
+    Each worker writes its connection counts to its own slots, so no lock is needed there either.
+    """
+    def __init__(self, num_servers: int, num_workers: int) -> None:
+        """
+        Allocate the shared memory; it must be created before the workers are forked.
+
+        :param num_servers: Number of backend servers.
+        :param num_workers: Number of worker processes.
+        """
+        self.num_servers = num_servers
+        self.num_workers = num_workers
+        self.sequence = multiprocessing.RawValue(ctypes.c_uint64, 0)
+        self.alive = multiprocessing.RawArray(ctypes.c_uint8, [1] * num_servers)
+        self.connections = multiprocessing.RawArray(ctypes.c_int64, num_servers * num_workers)
+
+    def publish_health(self, servers: List[BackendServer]) -> None:
+        """Write the health of every server (health-checking process only)."""
+        self.sequence.value += 1
+        for index, server in enumerate(servers):
+            self.alive[index] = server.is_alive
+        self.sequence.value += 1
+
+    def read_health(self) -> tuple:
+        """
+        Read a consistent copy of the health flags.
+
+        :return: A tuple (version, flags), where version grows by one with each publish.
+        """
+        while True:
+            sequence = self.sequence.value
+            if sequence % 2 == 0:
+                flags = bytes(self.alive)
+                if self.sequence.value == sequence:
+                    return sequence // 2, flags
+            time.sleep(0)
+
+    def total_connections(self, server_index: int) -> int:
+        """Connections to one server summed over all workers."""
+        return sum(self.connections[worker * self.num_servers + server_index] for worker in range(self.num_workers))
+
+
+class SharedHealthChecker(HealthChecker):
+    """A HealthChecker that also publishes every health change to the workers."""
+    def __init__(self, servers: List[BackendServer], state: SharedState) -> None:
+        # A restarted process is forked with every server alive; start from the health the workers last saw,
+        # so a server that is still marked down is published again once it recovers
+        for server, alive in zip(servers, state.alive):
+            server.update_health_status(bool(alive))
+        super().__init__(servers)
+        self.state = state
+
+    def _publish_active_servers(self) -> None:
+        super()._publish_active_servers()
+        self.state.publish_health(self.servers)
+
+
+class SharedHealthView:
+    """
+    Stands in for the HealthChecker inside a worker process.
+
+    The worker does not probe servers itself; it follows the health published by the
+    health-checking process and builds a new snapshot only when the published version changes,
+    or when one of its own circuit breakers opens or is due for a trial request.
+    """
+    def __init__(self, servers: List[BackendServer], state: SharedState, worker_index: int) -> None:
+        """
+        Initialize the SharedHealthView.
+
+        :param servers: The worker's copies of the backend servers, in configuration order.
+        :param state: The shared state.
+        :param worker_index: The slot this worker writes its connection counts to.
+        """
+        self.servers = servers
+        self.state = state
+        # The published health version the snapshot was built from
+        self._version = -1
+        self._active_servers = ServerSnapshot(servers, version=0)
+        self._reopen_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._positions = {server: index for index, server in enumerate(servers)}
+        self._connection_offset = worker_index * state.num_servers
+        for server in servers:
+            server.add_connection_listener(self._on_connections_changed)
+            server.breaker.add_listener(self._breaker_changed)
+
+    def start(self, interval: int) -> None:
+        """Nothing to start; health is checked by the health-checking process."""
+
+    def stop(self) -> None:
+        """Nothing to stop; health is checked by the health-checking process."""
+
+    def get_active_servers(self) -> ServerSnapshot:
+        """
+        Retrieve the servers that are currently healthy.
+
+        :return: Snapshot of healthy servers.
+        """
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._refresh()
+        return self._active_servers
+
+    def _is_stale(self) -> bool:
+        return self.state.sequence.value // 2 != self._version or (self._reopen_at is not None and time.monotonic() >= self._reopen_at)
+
+    def _refresh(self) -> None:
+        version, flags = self.state.read_health()
+        for server, alive in zip(self.servers, flags):
+            if server.is_alive != bool(alive):
+                server.update_health_status(bool(alive))
+        # Numbered locally, since breakers change the snapshot without a new published version
+        servers = (server for server in self.servers if server.is_alive and not server.breaker.is_open)
+        self._active_servers = ServerSnapshot(servers, version=self._active_servers.version + 1)
+        self._version = version
+        self._reopen_at = next_reopening(server.breaker for server in self.servers)
+
+    def _breaker_changed(self, state: str) -> None:
+        with self._lock:
+            # The next request rebuilds the snapshot
+            self._reopen_at = 0.0
+
+    def _on_connections_changed(self, server: BackendServer) -> None:
+        self.state.connections[self._connection_offset + self._positions[server]] = server.num_connections
+
+
+def run_workers(servers: List[BackendServer], num_workers: int, create_balancer: Callable[[object, bool], LoadBalancer], interval: int, admin_host: str = "127.0.0.1", admin_port: Optional[int] = None) -> None:
+    """
+    Run the load balancer in several worker processes that all accept on the same port.
+
+    Each worker binds its own listener with SO_REUSEPORT, so the kernel spreads new connections
+    across them and every worker proxies on its own core. Health is checked in a process of its
+    own, which publishes it to the workers; each worker publishes its connection counts to shared
+    memory, while selection in a worker uses its own counts. This process only restarts the
+    others when they exit unexpectedly. It runs no threads, so a process forked from it never
+    inherits a lock that another thread was holding.
+
+    :param servers: The backend servers.
+    :param num_workers: Number of worker processes.
+    :param create_balancer: Builds a worker's balancer from a health checker and whether to use SO_REUSEPORT.
+    :param interval: Health check interval in seconds.
+    :param admin_host: Address the metrics are served on.
+    :param admin_port: If set, the health-checking process serves its metrics on this port and worker i on admin_port + 1 + i.
+    """
+    # Stop the workers on SIGTERM as on Ctrl+C, instead of leaving them bound to the port
+    signal.signal(signal.SIGTERM, _interrupt)
+    context = multiprocessing.get_context("fork")
+    state = SharedState(len(servers), num_workers)
+
+    def start_worker(index: int) -> multiprocessing.Process:
+        # A restarted worker starts with no connections
+        for server_index in range(len(servers)):
+            state.connections[index * len(servers) + server_index] = 0
+        worker_admin_port = None if admin_port is None else admin_port + 1 + index
+        process = context.Process(target=_run_worker, args=(servers, state, index, create_balancer, admin_host, worker_admin_port), name=f"lb-worker-{index}", daemon=True)
+        process.start()
+        return process
+
+    def start_health_checker() -> multiprocessing.Process:
+        process = context.Process(target=_run_health_checker, args=(servers, state, interval, admin_host, admin_port), name="lb-health-checker", daemon=True)
+        process.start()
+        return process
+
+    workers = [start_worker(index) for index in range(num_workers)]
+    health_process = start_health_checker()
+    print(f"Started {num_workers} workers; health checks run in process {health_process.pid}")
+
+    try:
+        while True:
+            for index, process in enumerate(workers):
+                if not process.is_alive():
+                    print(f"Worker {index} exited with code {process.exitcode}, restarting it.")
+                    workers[index] = start_worker(index)
+            if not health_process.is_alive():
+                print(f"The health-checking process exited with code {health_process.exitcode}, restarting it.")
+                health_process = start_health_checker()
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping workers...")
+    finally:
+        processes = workers + [health_process]
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+def _interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def _run_health_checker(servers: List[BackendServer], state: SharedState, interval: int, admin_host: str, admin_port: Optional[int]) -> None:
+    health_checker = SharedHealthChecker(servers, state)
+    if admin_port is not None:
+        # Connections are counted by the workers, so the gauges read their totals from shared memory
+        positions = {server: index for index, server in enumerate(servers)}
+        watch_servers(servers, lambda server: state.total_connections(positions[server]))
+        start_admin_server(admin_host, admin_port)
+    health_checker.start(interval)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        health_checker.stop()
+
+
+def _run_worker(servers: List[BackendServer], state: SharedState, index: int, create_balancer: Callable[[object, bool], LoadBalancer], admin_host: str, admin_port: Optional[int]) -> None:
+    # The worker counts only its own connections
+    for server in servers:
+        server.num_connections = 0
+    health_view = SharedHealthView(servers, state, index)
+    if admin_port is not None:
+        # Health is otherwise only refreshed when a server is selected
+        REGISTRY.add_collect_hook(health_view.get_active_servers)
+        start_admin_server(admin_host, admin_port)
+    load_balancer = create_balancer(health_view, True)
+    try:
+        load_balancer.start()
+    except KeyboardInterrupt:
+        pass
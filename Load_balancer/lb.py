@@ -1,8 +1,16 @@
 #!/usr/bin/env python
 import argparse
+import logging
+import socket
+from algorithms import ALGORITHMS
 from core.balancer import LoadBalancer
+from core.config import CONFIG_POLL_INTERVAL, HANDLER_QUEUE_SIZE, HANDLER_QUEUE_TIMEOUT, LISTEN_BACKLOG, MAX_HANDLERS
+from core.async_balancer import AsyncLoadBalancer
 from core.health_checker import HealthChecker
-from servers.server import load_servers
+from core.metrics import start_admin_server, watch_servers
+from core.reloader import ConfigReloader
+from core.workers import run_workers
+from servers.server import load_config
 
 
 def main():
@@ -12,23 +20,95 @@ def main():
     parser.add_argument("--port", type=int, default=80, help="Port for the load balancer (default: 8000)")
     parser.add_argument("--interval", type=int, default=5, help="Health check interval in seconds (default: 5)")
     parser.add_argument("--config", type=str, default="servers/servers.json", help="Path to the server configuration file")
+    parser.add_argument("--engine", choices=["threaded", "asyncio"], default="threaded", help="Connection handling engine: a thread per connection, or one asyncio event loop (default: threaded)")
+    parser.add_argument("--mode", choices=["tcp", "http"], default="tcp", help="Proxy raw TCP streams, or parse HTTP/1.x and reuse pooled backend connections (threaded engine only, default: tcp)")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), default="round_robin", help="Load balancing algorithm (default: round_robin)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes accepting on the port, with health checked once in a separate process; each worker balances only its own connections (default: 1)")
+    parser.add_argument("--backlog", type=int, default=LISTEN_BACKLOG, help=f"Pending connections the kernel queues for the listener (default: {LISTEN_BACKLOG})")
+    parser.add_argument("--max-handlers", type=int, default=MAX_HANDLERS, help=f"Most client connections handled at once by the threaded engine (default: {MAX_HANDLERS})")
+    parser.add_argument("--queue-size", type=int, default=HANDLER_QUEUE_SIZE, help=f"Most accepted connections waiting for a handler before new ones get 503 (default: {HANDLER_QUEUE_SIZE})")
+    parser.add_argument("--queue-timeout", type=float, default=HANDLER_QUEUE_TIMEOUT, help=f"Seconds a connection may wait for a handler before it gets 503 (default: {HANDLER_QUEUE_TIMEOUT})")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Most connections (requests in HTTP mode) per backend, for servers without their own max_in_flight (default: unlimited)")
+    parser.add_argument("--reload-interval", type=float, default=CONFIG_POLL_INTERVAL, help=f"Seconds between checks of the configuration file for changes, which are applied without a restart; 0 disables (default: {CONFIG_POLL_INTERVAL})")
+    parser.add_argument("--hash-key", type=str, default="ip", help="Routing key for consistent_hash: ip, header:<name> or cookie:<name> (header and cookie need --mode http, default: ip)")
+    parser.add_argument("--log-sample-rate", type=float, default=0.0, help="Fraction of client connections that are logged at INFO level, with their traffic at DEBUG level in TCP mode (default: 0, no logging)")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error"], default="info", help="Least severe log messages shown (default: info)")
+    parser.add_argument("--admin-host", type=str, default="127.0.0.1", help="Host address for the admin port (default: 127.0.0.1)")
+    parser.add_argument("--admin-port", type=int, default=None, help="Serve Prometheus metrics at http://<admin-host>:<admin-port>/metrics; with --workers, worker i uses the next ports (default: off)")
     
     args = parser.parse_args()
+    if args.mode == "http" and args.engine == "asyncio":
+        parser.error("--mode http is only supported by the threaded engine")
+    if args.hash_key != "ip" and args.mode != "http":
+        parser.error("--hash-key header:<name> and cookie:<name> need --mode http")
+    if min(args.backlog, args.max_handlers, args.queue_size) < 1 or (args.max_in_flight is not None and args.max_in_flight < 1):
+        parser.error("--backlog, --max-handlers, --queue-size and --max-in-flight must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("--workers needs SO_REUSEPORT, which this platform does not support")
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+    # Health check requests would otherwise drown out the sampled traffic at DEBUG level
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
 
     # Load server configurations
-    backend_servers = load_servers(args.config)
+    backend_servers, routes = load_config(args.config)
     if not backend_servers:
         print(f"No servers found in the configuration file: {args.config}")
         return
+    if routes and args.mode != "http":
+        parser.error(f"{args.config} has routes, which need --mode http")
+    for server in backend_servers:
+        if server.max_in_flight is None:
+            server.max_in_flight = args.max_in_flight
+    watch_servers(backend_servers)
+
+    def create_balancer(health_checker, reuse_port=False):
+        if args.engine == "asyncio":
+            load_balancer = AsyncLoadBalancer(
+                health_checker=health_checker,
+                host=args.host,
+                port=args.port,
+                algorithm=args.algorithm,
+                backlog=args.backlog,
+                reuse_port=reuse_port,
+            )
+        else:
+            load_balancer = LoadBalancer(
+                health_checker=health_checker,
+                host=args.host,
+                port=args.port,
+                algorithm=args.algorithm,
+                mode=args.mode,
+                log_sample_rate=args.log_sample_rate,
+                hash_key=args.hash_key,
+                reuse_port=reuse_port,
+                routes=routes,
+                backlog=args.backlog,
+                max_handlers=args.max_handlers,
+                queue_size=args.queue_size,
+                queue_timeout=args.queue_timeout,
+            )
+        load_balancer.servers = backend_servers
+        load_balancer.health_check_interval = args.interval
+        return load_balancer
+
+    if args.workers > 1:
+        if args.reload_interval > 0:
+            print("Configuration changes are not reloaded with --workers; restart to apply them.")
+        print(f"Starting Load Balancer on {args.host}:{args.port} with {args.workers} workers and health check interval {args.interval}s...")
+        run_workers(backend_servers, args.workers, create_balancer, args.interval, args.admin_host, args.admin_port)
+        return
 
     health_checker = HealthChecker(backend_servers)
-    load_balancer = LoadBalancer(
-        health_checker=health_checker,
-        port=args.port,
-        algorithm="round_robin",
-    )
-    load_balancer.servers = backend_servers
-    health_checker.health_check_interval = args.interval 
+    load_balancer = create_balancer(health_checker)
+    if args.admin_port is not None:
+        start_admin_server(args.admin_host, args.admin_port)
+    reloader = None
+    if args.reload_interval > 0:
+        reloader = ConfigReloader(args.config, load_balancer, health_checker, backend_servers, args.reload_interval, args.max_in_flight)
+        reloader.start()
 
     try:
         print(f"Starting Load Balancer on {args.host}:{args.port} with health check interval {args.interval}s...")
@@ -36,6 +116,8 @@ def main():
     except KeyboardInterrupt:
         print("\nStopping Load Balancer...")
     finally:
+        if reloader is not None:
+            reloader.stop()
         print("Stopping Health Checker...")
         health_checker.stop()
 
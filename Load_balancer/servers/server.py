@@ -1,6 +1,6 @@
 import json
 from backend.backend_server import BackendServer
-from typing import List
+from typing import Dict, List, Tuple
 
 def load_servers(config_file: str) -> List[BackendServer]:
     """
@@ -9,19 +9,48 @@ def load_servers(config_file: str) -> List[BackendServer]:
     :param config_file: Path to the JSON configuration file.
     :return: List of BackendServer instances.
     """
+    return load_config(config_file)[0]
+
+def load_config(config_file: str) -> Tuple[List[BackendServer], List[Dict]]:
+    """
+    Load servers and HTTP routes from a JSON configuration file.
+
+    The file is either a list of servers, or an object with a "servers" list and an optional
+    "routes" list. Each route names the ids of the servers in its pool.
+
+    :param config_file: Path to the JSON configuration file.
+    :return: The BackendServer instances, and the routes with their server ids replaced by the servers.
+    """
     try:
         with open(config_file, "r") as file:
-            server_configs = json.load(file)
-        
+            config = json.load(file)
+
+        server_configs = config if isinstance(config, list) else config.get("servers", [])
         servers = []
-        for config in server_configs:
-            server = BackendServer(id=config["id"], host=config["host"], port=config["port"])
+        for server_config in server_configs:
+            server = BackendServer(id=server_config["id"], host=server_config["host"], port=server_config["port"], weight=server_config.get("weight", 1), max_in_flight=server_config.get("max_in_flight"))
             servers.append(server)
-        
-        return servers
+
+        route_configs = [] if isinstance(config, list) else config.get("routes", [])
+        return servers, _resolve_routes(route_configs, servers)
     except FileNotFoundError:
         print(f"Error: Configuration file '{config_file}' not found.")
-        return []
+        return [], []
     except json.JSONDecodeError:
         print(f"Error: Configuration file '{config_file}' is not a valid JSON file.")
-        return []
\ No newline at end of file
+        return [], []
+    except (KeyError, ValueError) as e:
+        print(f"Error: Invalid server or route in configuration file '{config_file}': {e}")
+        return [], []
+
+def _resolve_routes(route_configs: List[Dict], servers: List[BackendServer]) -> List[Dict]:
+    servers_by_id = {server.id: server for server in servers}
+    routes = []
+    for route_config in route_configs:
+        unknown = [server_id for server_id in route_config["servers"] if server_id not in servers_by_id]
+        if unknown:
+            raise ValueError(f"route {route_config.get('host', '*')}{route_config.get('path', '/')} names unknown servers {unknown}")
+        if not route_config["servers"]:
+            raise ValueError(f"route {route_config.get('host', '*')}{route_config.get('path', '/')} has no servers")
+        routes.append(dict(route_config, servers=[servers_by_id[server_id] for server_id in route_config["servers"]]))
+    return routes
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tests import the load balancer's packages the way lb.py does, from the Load_balancer directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
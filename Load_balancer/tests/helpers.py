@@ -0,0 +1,10 @@
+class FakeClock:
+    """A clock that only moves when the test advances it."""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
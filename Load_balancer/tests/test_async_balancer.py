@@ -0,0 +1,90 @@
+import asyncio
+import socket
+import unittest
+from unittest import mock
+from backend.backend_server import BackendServer
+from core.async_balancer import AsyncLoadBalancer
+from core.balancer import BAD_GATEWAY
+from core.health_checker import HealthChecker
+
+
+def refused_port():
+    """A local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestAsyncLoadBalancer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.backend = await asyncio.start_server(self.echo, "127.0.0.1", 0)
+        self.backend_port = self.backend.sockets[0].getsockname()[1]
+        self.listeners = [self.backend]
+
+    async def asyncTearDown(self):
+        for listener in self.listeners:
+            listener.close()
+            await listener.wait_closed()
+
+    @staticmethod
+    async def echo(reader, writer):
+        data = await reader.read()
+        writer.write(b"echo:" + data)
+        await writer.drain()
+        writer.close()
+
+    async def start_balancer(self, servers):
+        load_balancer = AsyncLoadBalancer(HealthChecker(servers), "127.0.0.1", 0)
+        listener = await asyncio.get_running_loop().create_server(load_balancer._create_protocol, "127.0.0.1", 0)
+        self.listeners.append(listener)
+        return listener.sockets[0].getsockname()[1]
+
+    async def exchange(self, port, data):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(data)
+        writer.write_eof()
+        reply = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        await writer.wait_closed()
+        return reply
+
+    async def test_forwards_both_directions(self):
+        server = BackendServer(1, "127.0.0.1", self.backend_port)
+        port = await self.start_balancer([server])
+
+        self.assertEqual(await self.exchange(port, b"hello"), b"echo:hello")
+        self.assertGreaterEqual(server.metrics.sent_bytes.value, 5)
+        await asyncio.sleep(0.05)
+        self.assertEqual(server.num_connections, 0)
+
+    async def test_fails_over_when_a_connect_is_refused(self):
+        refusing = BackendServer(1, "127.0.0.1", refused_port())
+        working = BackendServer(2, "127.0.0.1", self.backend_port)
+        failures = refusing.metrics.connect_failures.value
+        port = await self.start_balancer([refusing, working])
+
+        self.assertEqual(await self.exchange(port, b"retried"), b"echo:retried")
+        self.assertEqual(refusing.metrics.connect_failures.value, failures + 1)
+        self.assertEqual(refusing.num_connections, 0)
+
+    async def test_times_out_a_backend_connect(self):
+        server = BackendServer(1, "127.0.0.1", refused_port())
+        failures = server.metrics.timeout_failures.value
+        loop = asyncio.get_running_loop()
+        create_connection = loop.create_connection
+
+        async def hang_for_backend(protocol_factory, host=None, port=None, **kwargs):
+            if port == server.port:
+                await asyncio.sleep(3600)
+            return await create_connection(protocol_factory, host, port, **kwargs)
+
+        port = await self.start_balancer([server])
+        with mock.patch("core.async_balancer.CONNECT_TIMEOUT", 0.05), mock.patch.object(loop, "create_connection", hang_for_backend):
+            # Nothing is sent, since closing a connection with unread data resets it
+            self.assertEqual(await self.exchange(port, b""), BAD_GATEWAY)
+        self.assertEqual(server.metrics.timeout_failures.value, failures + 1)
+        self.assertEqual(server.num_connections, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+from backend.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, next_reopening
+from tests.helpers import FakeClock
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, open_time=5, max_open_time=12, clock=self.clock)
+        self.changes = []
+        self.breaker.add_listener(self.changes.append)
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.reopen_at, 1005.0)
+        self.assertEqual(self.changes, [OPEN])
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.changes, [])
+
+    def test_half_open_after_open_time_lets_one_trial_through(self):
+        self.open_breaker()
+        self.clock.advance(4.9)
+        self.assertFalse(self.breaker.allow_request())
+
+        self.clock.advance(0.1)
+
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_successful_trial_closes(self):
+        self.open_breaker()
+        self.clock.advance(5)
+        self.breaker.allow_request()
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.changes, [OPEN, CLOSED])
+
+    def test_failed_trial_backs_off(self):
+        self.open_breaker()
+        for open_time in (10, 12, 12):
+            self.clock.advance(self.breaker.current_open_time)
+            self.assertTrue(self.breaker.allow_request())
+
+            self.breaker.record_failure()
+
+            self.assertEqual(self.breaker.state, OPEN)
+            self.assertEqual(self.breaker.current_open_time, open_time)
+            self.assertEqual(self.breaker.reopen_at, self.clock.now + open_time)
+
+    def test_back_off_resets_once_closed(self):
+        self.open_breaker()
+        self.clock.advance(5)
+        self.breaker.allow_request()
+        self.breaker.record_failure()
+        self.clock.advance(10)
+        self.breaker.allow_request()
+        self.breaker.record_success()
+
+        self.open_breaker()
+
+        self.assertEqual(self.breaker.current_open_time, 5)
+
+    def test_stale_trial_expires(self):
+        self.open_breaker()
+        self.clock.advance(5)
+        self.assertTrue(self.breaker.allow_request())
+
+        # The trial never reports back, e.g. because its client went away
+        self.clock.advance(5)
+
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_requests_sent_before_opening_do_not_close(self):
+        self.open_breaker()
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open)
+
+    def test_failures_while_open_are_ignored(self):
+        self.open_breaker()
+        reopen_at = self.breaker.reopen_at
+        self.clock.advance(1)
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.reopen_at, reopen_at)
+        self.assertEqual(self.changes, [OPEN])
+
+    def test_reset_closes_without_notifying(self):
+        self.open_breaker()
+
+        self.breaker.reset()
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.current_open_time, 5)
+        self.assertEqual(self.changes, [OPEN])
+
+
+class TestNextReopening(unittest.TestCase):
+    def test_earliest_open_breaker(self):
+        clock = FakeClock()
+        breakers = [CircuitBreaker(failure_threshold=1, open_time=open_time, clock=clock) for open_time in (8, 3, 5)]
+        self.assertIsNone(next_reopening(breakers))
+
+        for breaker in breakers:
+            breaker.record_failure()
+        self.assertEqual(next_reopening(breakers), 1003.0)
+
+        clock.advance(3)
+        self.assertEqual(next_reopening(breakers), 1005.0)
+
+        clock.advance(5)
+        self.assertIsNone(next_reopening(breakers))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import socket
+import time
+import unittest
+from backend.connection_pool import ConnectionPool, PoolExhaustedError
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.accepted = []
+
+    def tearDown(self):
+        for conn in self.accepted:
+            conn.close()
+        self.listener.close()
+
+    def make_pool(self, **kwargs):
+        pool = ConnectionPool("127.0.0.1", self.port, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def accept(self):
+        conn, _ = self.listener.accept()
+        self.accepted.append(conn)
+        return conn
+
+    def test_reuses_released_connections(self):
+        pool = self.make_pool()
+        conn, reused = pool.acquire()
+        self.assertFalse(reused)
+        pool.release(conn)
+
+        again, reused = pool.acquire()
+
+        self.assertTrue(reused)
+        self.assertIs(again, conn)
+        pool.release(again)
+
+    def test_most_recently_used_first(self):
+        pool = self.make_pool()
+        first, _ = pool.acquire()
+        second, _ = pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        self.assertIs(pool.acquire()[0], second)
+
+    def test_unreusable_connections_are_closed(self):
+        pool = self.make_pool()
+        conn, _ = pool.acquire()
+        pool.release(conn, reusable=False)
+
+        self.assertEqual(pool.idle_count, 0)
+        self.assertEqual(conn.fileno(), -1)
+        self.assertFalse(pool.acquire()[1])
+
+    def test_connection_closed_by_the_backend_is_not_reused(self):
+        pool = self.make_pool()
+        conn, _ = pool.acquire()
+        self.accept().close()
+        pool.release(conn)
+        time.sleep(0.05)
+
+        self.assertFalse(pool.acquire()[1])
+
+    def test_idle_connections_expire(self):
+        pool = self.make_pool(idle_timeout=0.05)
+        conn, _ = pool.acquire()
+        pool.release(conn)
+        time.sleep(0.1)
+
+        pool.evict_expired()
+
+        self.assertEqual(pool.idle_count, 0)
+
+    def test_max_idle(self):
+        pool = self.make_pool(max_idle=1)
+        first, _ = pool.acquire()
+        second, _ = pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        self.assertEqual(pool.idle_count, 1)
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.make_pool(max_connections=1)
+        conn, _ = pool.acquire()
+
+        with self.assertRaises(PoolExhaustedError):
+            pool.acquire(timeout=0.05)
+
+        pool.release(conn)
+        self.assertIs(pool.acquire(timeout=0.05)[0], conn)
+
+    def test_failed_connect_frees_its_slot(self):
+        port = self.port
+        self.listener.close()
+        pool = ConnectionPool("127.0.0.1", port, max_connections=1)
+
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                pool.acquire(timeout=0.05)
+
+    def test_closed_pool_keeps_no_connections(self):
+        pool = self.make_pool()
+        conn, _ = pool.acquire()
+        pool.close()
+
+        pool.release(conn)
+
+        self.assertEqual(pool.idle_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from collections import Counter
+from algorithms.consistent_hash import ConsistentHashAlgorithm
+from backend.backend_server import BackendServer
+from core.health_checker import ServerSnapshot
+
+
+class TestConsistentHash(unittest.TestCase):
+    def setUp(self):
+        self.servers = [BackendServer(index, "127.0.0.1", 8000 + index) for index in range(1, 5)]
+        self.snapshot = ServerSnapshot(self.servers, version=1)
+        self.keys = [f"10.0.{index // 256}.{index % 256}" for index in range(1000)]
+
+    def test_same_key_same_server(self):
+        algorithm = ConsistentHashAlgorithm()
+
+        for key in self.keys[:50]:
+            self.assertIs(algorithm.get_next_server(self.snapshot, key), algorithm.get_next_server(self.snapshot, key))
+
+    def test_keys_are_spread(self):
+        algorithm = ConsistentHashAlgorithm()
+
+        counts = Counter(algorithm.get_next_server(self.snapshot, key) for key in self.keys)
+
+        self.assertEqual(set(counts), set(self.servers))
+        self.assertGreater(min(counts.values()), 150)
+
+    def test_removing_a_server_moves_only_its_keys(self):
+        algorithm = ConsistentHashAlgorithm()
+        before = {key: algorithm.get_next_server(self.snapshot, key) for key in self.keys}
+
+        removed = self.servers[0]
+        snapshot = ServerSnapshot(self.servers[1:], version=2)
+        after = {key: algorithm.get_next_server(snapshot, key) for key in self.keys}
+
+        moved = [key for key in self.keys if before[key] is not after[key]]
+        self.assertTrue(moved)
+        self.assertTrue(all(before[key] is removed for key in moved))
+
+    def test_bounded_load(self):
+        algorithm = ConsistentHashAlgorithm(load_factor=1.25)
+        algorithm.get_next_server(self.snapshot, "warm up")
+
+        for key in self.keys[:400]:
+            algorithm.get_next_server(self.snapshot, key).connection_opened()
+
+        # No server ends up with more than its share times the load factor, rounded up
+        self.assertLessEqual(max(server.num_connections for server in self.servers), 125)
+
+    def test_overloaded_owner_is_skipped(self):
+        algorithm = ConsistentHashAlgorithm(load_factor=1.0)
+        owner = algorithm.get_next_server(self.snapshot, "client")
+        for _ in range(3):
+            owner.connection_opened()
+
+        self.assertIsNot(algorithm.get_next_server(self.snapshot, "client"), owner)
+
+    def test_excluded_owner_fails_over_to_the_same_server(self):
+        algorithm = ConsistentHashAlgorithm()
+        owner = algorithm.get_next_server(self.snapshot, "1.2.3.4")
+
+        fallback = algorithm.get_next_server(self.snapshot, "1.2.3.4", exclude=[owner])
+
+        self.assertIsNot(fallback, owner)
+        self.assertIs(algorithm.get_next_server(self.snapshot, "1.2.3.4", exclude=[owner]), fallback)
+
+    def test_saturated_owner_is_skipped(self):
+        algorithm = ConsistentHashAlgorithm()
+        owner = algorithm.get_next_server(self.snapshot, "1.2.3.4")
+        owner.max_in_flight = 1
+        owner.connection_opened()
+
+        self.assertIsNot(algorithm.get_next_server(self.snapshot, "1.2.3.4"), owner)
+
+    def test_forgotten_server_drops_its_points_and_listener(self):
+        algorithm = ConsistentHashAlgorithm()
+        algorithm.get_next_server(self.snapshot, "client")
+        removed = self.servers[0]
+
+        algorithm.forget_servers([removed])
+        # A request still holding the older snapshot does not bring it back
+        algorithm.get_next_server(self.snapshot, "client")
+        algorithm.get_next_server(ServerSnapshot(self.servers[1:], version=2), "client")
+
+        self.assertNotIn(removed, algorithm._points)
+        self.assertNotIn(removed, algorithm._counted)
+        self.assertNotIn(removed, algorithm._ring[1])
+        self.assertEqual(removed._connection_listeners, [])
+        self.assertEqual(algorithm._total_weight, 3)
+
+    def test_every_server_forgotten(self):
+        algorithm = ConsistentHashAlgorithm()
+        algorithm.get_next_server(self.snapshot, "client")
+
+        algorithm.forget_servers(self.servers)
+
+        self.assertIsNone(algorithm.get_next_server(self.snapshot, "client"))
+
+    def test_load_factor_below_one(self):
+        with self.assertRaises(ValueError):
+            ConsistentHashAlgorithm(load_factor=0.5)
+
+    def test_no_active_servers(self):
+        self.assertIsNone(ConsistentHashAlgorithm().get_next_server(ServerSnapshot([], version=1), "client"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import socket
+import threading
+import unittest
+from unittest import mock
+from backend import forwarding
+from backend.forwarding import forward
+
+
+class TestForward(unittest.TestCase):
+    def setUp(self):
+        self.client, self.source = socket.socketpair()
+        self.destination, self.peer = socket.socketpair()
+        # Larger than the forwarding buffer and the pipe, so both paths loop
+        self.payload = os.urandom(3 * forwarding.FORWARD_BUFFER_SIZE + 123)
+
+    def tearDown(self):
+        for sock in (self.client, self.source, self.destination, self.peer):
+            sock.close()
+
+    def relay(self, **kwargs):
+        """Send the payload through forward() and return (forwarded count, bytes received by the peer)."""
+        def send():
+            self.client.sendall(self.payload)
+            self.client.shutdown(socket.SHUT_WR)
+
+        received = []
+
+        def receive():
+            while True:
+                data = self.peer.recv(65536)
+                if not data:
+                    break
+                received.append(data)
+
+        threads = [threading.Thread(target=send), threading.Thread(target=receive)]
+        for thread in threads:
+            thread.start()
+        forwarded = forward(self.source, self.destination, **kwargs)
+        for thread in threads:
+            thread.join(5)
+        return forwarded, b"".join(received)
+
+    @unittest.skipUnless(forwarding.HAS_SPLICE, "splice() is not available")
+    def test_splice(self):
+        first_data = mock.Mock()
+        with mock.patch.object(forwarding, "_forward_copy", side_effect=AssertionError("copied instead of spliced")):
+            forwarded, received = self.relay(on_first_data=first_data)
+
+        self.assertEqual(forwarded, len(self.payload))
+        self.assertEqual(received, self.payload)
+        first_data.assert_called_once_with()
+
+    def test_buffer_copy(self):
+        first_data = mock.Mock()
+        with mock.patch.object(forwarding, "HAS_SPLICE", False):
+            forwarded, received = self.relay(on_first_data=first_data)
+
+        self.assertEqual(forwarded, len(self.payload))
+        self.assertEqual(received, self.payload)
+        first_data.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+from core.handler_pool import SERVER_BUSY, HandlerPool
+from core.metrics import REJECTED_CONNECTIONS
+
+
+class TestHandlerPool(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.handled = []
+        self.pools = []
+
+    def tearDown(self):
+        self.release.set()
+        for pool in self.pools:
+            pool.shutdown()
+
+    def handler(self, client_conn):
+        self.handled.append(client_conn)
+        self.started.release()
+        self.release.wait(5)
+        client_conn.close()
+
+    def make_pool(self, **kwargs):
+        pool = HandlerPool(self.handler, **kwargs)
+        self.pools.append(pool)
+        return pool
+
+    def connect(self):
+        client, server = socket.socketpair()
+        self.addCleanup(client.close)
+        client.settimeout(5)
+        return client, server
+
+    def assert_rejected(self, client):
+        self.assertEqual(client.recv(len(SERVER_BUSY) + 1), SERVER_BUSY)
+        self.assertEqual(client.recv(1), b"")
+
+    def test_full_queue_rejects_at_once(self):
+        pool = self.make_pool(max_handlers=1, queue_size=1)
+        busy = REJECTED_CONNECTIONS.labels("queue_full").value
+        _, first = self.connect()
+        _, second = self.connect()
+        client, third = self.connect()
+
+        self.assertTrue(pool.submit(first))
+        self.assertTrue(self.started.acquire(timeout=5))
+        self.assertTrue(pool.submit(second))
+        self.assertFalse(pool.submit(third))
+
+        self.assert_rejected(client)
+        self.assertEqual(REJECTED_CONNECTIONS.labels("queue_full").value, busy + 1)
+
+    def test_connection_waiting_too_long_is_rejected(self):
+        pool = self.make_pool(max_handlers=1, queue_size=1, queue_timeout=0.05)
+        _, first = self.connect()
+        client, second = self.connect()
+
+        pool.submit(first)
+        self.assertTrue(self.started.acquire(timeout=5))
+        pool.submit(second)
+        time.sleep(0.1)
+        self.release.set()
+
+        self.assert_rejected(client)
+        self.assertEqual(self.handled, [first])
+
+    def test_threads_are_started_up_to_the_limit(self):
+        pool = self.make_pool(max_handlers=2, queue_size=4)
+        connections = [self.connect()[1] for _ in range(3)]
+
+        for connection in connections:
+            pool.submit(connection)
+        for _ in range(2):
+            self.assertTrue(self.started.acquire(timeout=5))
+
+        self.assertEqual(pool._threads, 2)
+        self.assertEqual(self.handled, connections[:2])
+        self.release.set()
+        self.assertTrue(self.started.acquire(timeout=5))
+        self.assertEqual(self.handled, connections)
+
+    def test_connection_taken_but_not_yet_counted_still_needs_a_new_thread(self):
+        pool = self.make_pool(max_handlers=2, queue_size=4)
+        with mock.patch("core.handler_pool.threading.Thread") as thread:
+            pool.submit(self.connect()[1])
+            # The new thread has taken the connection but not yet counted itself busy
+            taken, _ = pool._queue.get_nowait()
+            self.addCleanup(taken.close)
+
+            pool.submit(self.connect()[1])
+
+        self.assertEqual(thread.return_value.start.call_count, 2)
+        self.assertEqual(pool._threads, 2)
+
+    def test_needs_a_thread_and_a_queue_slot(self):
+        with self.assertRaises(ValueError):
+            HandlerPool(self.handler, max_handlers=0)
+        with self.assertRaises(ValueError):
+            HandlerPool(self.handler, queue_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
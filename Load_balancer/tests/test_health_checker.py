@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+from backend.backend_server import BackendServer
+from core.config import HEALTH_CHECK_FAST_INTERVAL
+from core.health_checker import HealthChecker, ServerSnapshot
+
+
+class TestServerSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.servers = [BackendServer(index, "127.0.0.1", 8000 + index) for index in range(1, 4)]
+        self.health_checker = HealthChecker(self.servers)
+
+    def test_snapshot_is_reused_until_health_changes(self):
+        snapshot = self.health_checker.get_active_servers()
+
+        self.assertIs(self.health_checker.get_active_servers(), snapshot)
+        self.assertEqual(list(snapshot), self.servers)
+
+    def test_health_change_publishes_a_new_version(self):
+        snapshot = self.health_checker.get_active_servers()
+
+        self.servers[1].update_health_status(False)
+        self.health_checker._publish_active_servers()
+
+        new_snapshot = self.health_checker.get_active_servers()
+        self.assertEqual(new_snapshot.version, snapshot.version + 1)
+        self.assertEqual(list(new_snapshot), [self.servers[0], self.servers[2]])
+        # Requests holding the old snapshot keep a consistent view
+        self.assertEqual(list(snapshot), self.servers)
+
+    def test_snapshot_is_a_tuple_with_a_version(self):
+        snapshot = ServerSnapshot(iter(self.servers), version=7)
+
+        self.assertEqual(snapshot.version, 7)
+        self.assertEqual(len(snapshot), 3)
+        self.assertIs(snapshot[0], self.servers[0])
+
+
+class TestRiseAndFall(unittest.TestCase):
+    def setUp(self):
+        self.server = BackendServer(1, "127.0.0.1", 8001)
+        self.other = BackendServer(2, "127.0.0.1", 8002)
+        self.health_checker = HealthChecker([self.server, self.other], rise=2, fall=3)
+        self.health_checker._interval = 10
+        self.results = []
+        patches = [
+            mock.patch.object(self.health_checker, "_check_server_health", side_effect=lambda server: self.results.pop(0)),
+            # No jitter, and a clock that stands still
+            mock.patch("core.health_checker.random.uniform", side_effect=lambda low, high: (low + high) / 2),
+            mock.patch("core.health_checker.time.monotonic", return_value=100.0),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def probe(self, *results):
+        self.results.extend(results)
+        for _ in results:
+            self.health_checker._probe(self.server)
+
+    def next_check_in(self):
+        due, _, server = max(self.health_checker._schedule)
+        self.assertIs(server, self.server)
+        return due - 100.0
+
+    def test_fall_needs_consecutive_failures(self):
+        self.probe(False, False)
+        self.assertTrue(self.server.is_alive)
+
+        self.probe(True, False, False)
+        self.assertTrue(self.server.is_alive)
+
+        self.probe(False)
+        self.assertFalse(self.server.is_alive)
+        self.assertEqual(list(self.health_checker.get_active_servers()), [self.other])
+
+    def test_rise_needs_consecutive_successes(self):
+        self.server.update_health_status(False)
+
+        self.probe(True, False, True)
+        self.assertFalse(self.server.is_alive)
+
+        self.probe(True)
+        self.assertTrue(self.server.is_alive)
+        self.assertEqual(list(self.health_checker.get_active_servers()), [self.server, self.other])
+
+    def test_settled_server_is_checked_at_the_interval(self):
+        self.probe(True)
+
+        self.assertEqual(self.next_check_in(), 10)
+
+    def test_pending_change_is_checked_again_soon(self):
+        self.probe(False)
+
+        self.assertEqual(self.next_check_in(), HEALTH_CHECK_FAST_INTERVAL)
+
+    def test_down_server_is_checked_again_soon(self):
+        self.probe(False, False, False)
+        self.health_checker._schedule.clear()
+
+        self.probe(False)
+
+        self.assertFalse(self.server.is_alive)
+        self.assertEqual(self.next_check_in(), HEALTH_CHECK_FAST_INTERVAL)
+
+    def test_removed_server_is_not_rescheduled(self):
+        self.health_checker.update_servers([self.other])
+
+        self.probe(True)
+
+        self.assertEqual(self.health_checker._schedule, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import socket
+import unittest
+from backend.http import (
+    CHUNKED,
+    CONTENT_LENGTH,
+    NO_BODY,
+    UNTIL_CLOSE,
+    HttpError,
+    HttpRequest,
+    HttpResponse,
+    read_head,
+    relay_body,
+)
+
+
+class TestHttpRequest(unittest.TestCase):
+    def test_parses_request_line_and_headers(self):
+        request = HttpRequest(b"POST /upload?x=1 HTTP/1.1\r\nHost: example.com\r\nContent-Length: 5\r\n\r\n")
+
+        self.assertEqual((request.method, request.target, request.version), ("POST", "/upload?x=1", "HTTP/1.1"))
+        self.assertEqual(request.headers["host"], "example.com")
+        self.assertEqual(request.body_framing(), CONTENT_LENGTH)
+        self.assertEqual(request.content_length, 5)
+
+    def test_repeated_headers_are_joined(self):
+        request = HttpRequest(b"GET / HTTP/1.1\r\nAccept: text/html\r\naccept: */*\r\n\r\n")
+
+        self.assertEqual(request.headers["accept"], "text/html, */*")
+
+    def test_keep_alive(self):
+        self.assertTrue(HttpRequest(b"GET / HTTP/1.1\r\n\r\n").keep_alive)
+        self.assertFalse(HttpRequest(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n").keep_alive)
+        self.assertFalse(HttpRequest(b"GET / HTTP/1.0\r\n\r\n").keep_alive)
+        self.assertTrue(HttpRequest(b"GET / HTTP/1.0\r\nConnection: keep-alive\r\n\r\n").keep_alive)
+
+    def test_chunked_takes_precedence_over_content_length(self):
+        request = HttpRequest(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\nContent-Length: 3\r\n\r\n")
+
+        self.assertEqual(request.body_framing(), CHUNKED)
+
+    def test_no_body(self):
+        self.assertEqual(HttpRequest(b"GET / HTTP/1.1\r\n\r\n").body_framing(), NO_BODY)
+
+    def test_cookies(self):
+        request = HttpRequest(b"GET / HTTP/1.1\r\nCookie: theme=dark; session=abc=1\r\n\r\n")
+
+        self.assertEqual(request.get_cookie("session"), "abc=1")
+        self.assertIsNone(request.get_cookie("missing"))
+
+    def test_malformed_requests(self):
+        with self.assertRaises(HttpError):
+            HttpRequest(b"GET /\r\n\r\n")
+        with self.assertRaises(HttpError):
+            HttpRequest(b"GET / HTTP/1.1\r\nNo colon here\r\n\r\n")
+        with self.assertRaises(HttpError):
+            HttpRequest(b"POST / HTTP/1.1\r\nContent-Length: five\r\n\r\n")
+
+    def test_content_length_must_be_digits(self):
+        for value in (b"-5", b"+7", b"1_0", b"1 2", b"0x5", b"\xb2", b""):
+            with self.subTest(value=value), self.assertRaises(HttpError):
+                HttpRequest(b"POST / HTTP/1.1\r\nContent-Length: " + value + b"\r\n\r\n")
+
+    def test_repeated_content_length(self):
+        request = HttpRequest(b"POST / HTTP/1.1\r\nContent-Length: 12\r\nContent-Length: 12\r\n\r\n")
+
+        self.assertEqual(request.content_length, 12)
+        with self.assertRaises(HttpError):
+            HttpRequest(b"POST / HTTP/1.1\r\nContent-Length: 12\r\nContent-Length: 13\r\n\r\n")
+        with self.assertRaises(HttpError):
+            HttpRequest(b"POST / HTTP/1.1\r\nContent-Length: 12, 13\r\n\r\n")
+
+
+class TestHttpResponse(unittest.TestCase):
+    def test_parses_status(self):
+        response = HttpResponse(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+
+        self.assertEqual(response.status, 404)
+        self.assertEqual(response.body_framing(), CONTENT_LENGTH)
+
+    def test_body_until_close_without_length(self):
+        self.assertEqual(HttpResponse(b"HTTP/1.1 200 OK\r\n\r\n").body_framing(), UNTIL_CLOSE)
+
+    def test_responses_without_body(self):
+        self.assertEqual(HttpResponse(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\n", "HEAD").body_framing(), NO_BODY)
+        self.assertEqual(HttpResponse(b"HTTP/1.1 204 No Content\r\n\r\n").body_framing(), NO_BODY)
+        self.assertEqual(HttpResponse(b"HTTP/1.1 304 Not Modified\r\n\r\n").body_framing(), NO_BODY)
+
+    def test_malformed_status_line(self):
+        with self.assertRaises(HttpError):
+            HttpResponse(b"HTTP/1.1 OK\r\n\r\n")
+
+    def test_malformed_content_length(self):
+        with self.assertRaises(HttpError):
+            HttpResponse(b"HTTP/1.1 200 OK\r\nContent-Length: -5\r\n\r\n")
+
+
+class TestReadHeadAndRelay(unittest.TestCase):
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.destination, self.sink = socket.socketpair()
+
+    def tearDown(self):
+        for sock in (self.client, self.server, self.destination, self.sink):
+            sock.close()
+
+    def received(self, count):
+        data = b""
+        while len(data) < count:
+            data += self.sink.recv(count - len(data))
+        return data
+
+    def test_read_head_keeps_the_rest_in_the_buffer(self):
+        self.client.sendall(b"GET / HTTP/1.1\r\nHost: a\r\n\r\nnext")
+        buffer = bytearray()
+
+        self.assertEqual(read_head(self.server, buffer), b"GET / HTTP/1.1\r\nHost: a\r\n\r\n")
+        self.assertEqual(buffer, b"next")
+
+    def test_read_head_across_reads(self):
+        buffer = bytearray(b"GET / HTTP/1.1\r\n")
+        self.client.sendall(b"\r\n")
+
+        self.assertEqual(read_head(self.server, buffer), b"GET / HTTP/1.1\r\n\r\n")
+
+    def test_read_head_on_closed_connection(self):
+        self.client.close()
+
+        self.assertIsNone(read_head(self.server, bytearray()))
+        self.assertRaises(HttpError, read_head, self.server, bytearray(b"GET / HTTP/1.1\r\n"))
+
+    def test_relay_content_length(self):
+        request = HttpRequest(b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\n")
+        buffer = bytearray(b"01234")
+        self.client.sendall(b"56789extra")
+
+        self.assertEqual(relay_body(self.server, self.destination, buffer, request), 10)
+        self.assertEqual(self.received(10), b"0123456789")
+
+    def test_relay_chunked_with_trailers(self):
+        body = b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nTrailer: x\r\n\r\n"
+        request = HttpRequest(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n")
+        self.client.sendall(body + b"GET")
+        buffer = bytearray()
+
+        self.assertEqual(relay_body(self.server, self.destination, buffer, request), len(body))
+        self.assertEqual(self.received(len(body)), body)
+        self.assertTrue(b"GET".startswith(bytes(buffer)))
+
+    def test_relay_until_close(self):
+        response = HttpResponse(b"HTTP/1.0 200 OK\r\n\r\n")
+        self.client.sendall(b"whole body")
+        self.client.close()
+
+        self.assertEqual(relay_body(self.server, self.destination, bytearray(), response), 10)
+        self.assertEqual(self.received(10), b"whole body")
+
+    def test_body_cut_short(self):
+        request = HttpRequest(b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\n")
+        self.client.sendall(b"short")
+        self.client.close()
+
+        with self.assertRaises(HttpError):
+            relay_body(self.server, self.destination, bytearray(), request)
+
+    def test_invalid_chunk_size(self):
+        request = HttpRequest(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n")
+        self.client.sendall(b"zz\r\n")
+
+        with self.assertRaises(HttpError):
+            relay_body(self.server, self.destination, bytearray(), request)
+
+    def test_signed_or_prefixed_chunk_sizes(self):
+        request = HttpRequest(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n")
+        for size_line in (b"-3\r\n", b"+3\r\n", b"0x5\r\n", b"1_0\r\n"):
+            with self.subTest(size_line=size_line), self.assertRaises(HttpError):
+                relay_body(self.server, self.destination, bytearray(size_line + b"abc\r\n"), request)
+
+
+if __name__ == '__main__':
+    unittest.main()
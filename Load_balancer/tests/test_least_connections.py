@@ -0,0 +1,112 @@
+import unittest
+from algorithms.least_connections import LeastConnectionsAlgorithm
+from backend.backend_server import BackendServer
+from core.health_checker import ServerSnapshot
+
+
+class TestLeastConnections(unittest.TestCase):
+    def setUp(self):
+        self.servers = [BackendServer(index, "127.0.0.1", 8000 + index) for index in range(1, 5)]
+        self.snapshot = ServerSnapshot(self.servers, version=1)
+        self.algorithm = LeastConnectionsAlgorithm()
+
+    def open(self, server, count=1):
+        for _ in range(count):
+            server.connection_opened()
+
+    def test_picks_the_least_loaded_server(self):
+        self.algorithm.get_next_server(self.snapshot)
+        self.open(self.servers[0], 3)
+        self.open(self.servers[1], 1)
+        self.open(self.servers[2], 2)
+        self.open(self.servers[3], 4)
+
+        self.assertIs(self.algorithm.get_next_server(self.snapshot), self.servers[1])
+
+    def test_heap_follows_connection_changes(self):
+        self.algorithm.get_next_server(self.snapshot)
+        for server in self.servers:
+            self.open(server, 2)
+        self.servers[2].connection_closed()
+        self.assertIs(self.algorithm.get_next_server(self.snapshot), self.servers[2])
+
+        self.open(self.servers[2], 2)
+        self.servers[3].connection_closed()
+        self.servers[3].connection_closed()
+        self.assertIs(self.algorithm.get_next_server(self.snapshot), self.servers[3])
+
+    def test_load_is_per_unit_of_weight(self):
+        heavy = BackendServer(10, "127.0.0.1", 8010, weight=4)
+        light = BackendServer(11, "127.0.0.1", 8011)
+        snapshot = ServerSnapshot([heavy, light], version=1)
+        self.algorithm.get_next_server(snapshot)
+        self.open(heavy, 3)
+        self.open(light, 1)
+
+        self.assertIs(self.algorithm.get_next_server(snapshot), heavy)
+
+    def test_ties_rotate(self):
+        picks = [self.algorithm.get_next_server(self.snapshot) for _ in range(len(self.servers))]
+
+        self.assertEqual(set(picks), set(self.servers))
+
+    def test_passes_over_excluded_servers(self):
+        self.algorithm.get_next_server(self.snapshot)
+        self.open(self.servers[1], 1)
+        self.open(self.servers[2], 2)
+        self.open(self.servers[3], 3)
+
+        server = self.algorithm.get_next_server(self.snapshot, exclude=[self.servers[0]])
+
+        self.assertIs(server, self.servers[1])
+
+    def test_passes_over_saturated_servers(self):
+        # A heavy server with a small in-flight limit stays the least loaded once it is full
+        heavy = BackendServer(10, "127.0.0.1", 8010, weight=10, max_in_flight=2)
+        light = BackendServer(11, "127.0.0.1", 8011)
+        snapshot = ServerSnapshot([heavy, light], version=1)
+        self.algorithm.get_next_server(snapshot)
+        self.open(heavy, 2)
+        self.open(light, 1)
+
+        self.assertIs(self.algorithm.get_next_server(snapshot), light)
+
+    def test_new_snapshot_drops_inactive_servers(self):
+        self.algorithm.get_next_server(self.snapshot)
+        snapshot = ServerSnapshot(self.servers[2:], version=2)
+
+        picks = {self.algorithm.get_next_server(snapshot) for _ in range(4)}
+
+        self.assertEqual(picks, set(self.servers[2:]))
+
+    def test_forgotten_server_is_no_longer_tracked(self):
+        self.algorithm.get_next_server(self.snapshot)
+        self.open(self.servers[0], 3)
+        self.open(self.servers[2], 1)
+        self.open(self.servers[3], 2)
+        removed = self.servers[1]
+
+        self.algorithm.forget_servers([removed])
+        # A request still holding the older snapshot does not bring it back
+        self.assertIs(self.algorithm.get_next_server(self.snapshot), self.servers[2])
+
+        self.assertEqual(removed._connection_listeners, [])
+        self.assertNotIn(removed, self.algorithm._listening)
+        self.assertNotIn(removed, self.algorithm._heap)
+        for _ in range(3):
+            self.servers[0].connection_closed()
+        self.assertIs(self.algorithm.get_next_server(self.snapshot), self.servers[0])
+
+    def test_every_server_forgotten(self):
+        self.algorithm.get_next_server(self.snapshot)
+
+        self.algorithm.forget_servers(self.servers)
+
+        self.assertIsNone(self.algorithm.get_next_server(self.snapshot))
+
+    def test_no_active_servers(self):
+        self.assertIsNone(self.algorithm.get_next_server(ServerSnapshot([], version=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from benchmarks import loadtest, stub_backends
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_percentile(self):
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+        self.assertEqual(loadtest.percentile(values, 0.5), 5)
+        self.assertEqual(loadtest.percentile(values, 0.99), 10)
+        self.assertIsNone(loadtest.percentile([], 0.5))
+
+    def test_invalid_distribution(self):
+        with self.assertRaises(ValueError):
+            stub_backends.parse_distribution("normal:5")
+
+    def test_short_run_writes_the_result_schema(self):
+        parser = argparse.ArgumentParser()
+        loadtest.add_arguments(parser)
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            args = parser.parse_args(["--backends", "2", "--concurrency", "4", "--duration", "0.5", "--warmup", "0.2", "--output", output])
+
+            loadtest.run(args)
+
+            with open(output, "r", encoding="utf-8") as file:
+                report = json.load(file)
+
+        self.assertEqual(set(report), {"meta", "results"})
+        self.assertEqual(len(report["meta"]["backends"]), 2)
+        result, = report["results"]
+        self.assertEqual(set(result), {
+            "engine", "algorithm", "mode", "workers", "concurrency", "new_connections", "duration_s", "requests",
+            "requests_per_s", "statuses", "errors", "latency_ms", "backends", "lb_cpu_seconds", "lb_cpu_percent",
+        })
+        self.assertEqual((result["engine"], result["algorithm"], result["mode"]), ("threaded", "round_robin", "tcp"))
+        self.assertGreater(result["requests"], 0)
+        self.assertEqual(set(result["latency_ms"]), {"p50", "p90", "p99", "p999", "mean", "max"})
+        self.assertEqual(sum(served["requests"] for served in result["backends"].values()), result["statuses"]["200"])
+        self.assertAlmostEqual(sum(served["share"] for served in result["backends"].values()), 1.0)
+        self.assertIn("req/s", loadtest.format_report(report, report))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import logging
+import random
+import unittest
+import urllib.request
+from unittest import mock
+from backend import forwarding
+from backend.forwarding import should_log
+from core.metrics import REGISTRY, GaugeFunction, Histogram, MetricFamily, MetricsRegistry, start_admin_server
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_lines(self):
+        requests = self.registry.register(MetricFamily("requests_total", "Requests.", "counter", ["backend"]))
+        requests.labels("a:1").inc()
+        requests.labels("a:1").inc(2)
+        requests.labels('b"\\').inc()
+
+        self.assertEqual(self.registry.render(), (
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{backend="a:1"} 3\n'
+            'requests_total{backend="b\\"\\\\"} 1\n'
+        ))
+
+    def test_gauge_lines(self):
+        values = {("a:1",): 4, ("b:2",): 0}
+        self.registry.register(GaugeFunction("connections", "Open connections.", ["backend"], lambda: values.items()))
+
+        self.assertEqual(self.registry.render().splitlines(), [
+            "# HELP connections Open connections.",
+            "# TYPE connections gauge",
+            'connections{backend="a:1"} 4',
+            'connections{backend="b:2"} 0',
+        ])
+
+    def test_histogram_lines(self):
+        latency = self.registry.register(MetricFamily("latency_seconds", "Latency.", "histogram", ["backend"], lambda: Histogram((0.1, 1.0))))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.labels("a:1").observe(value)
+        unlabelled = self.registry.register(MetricFamily("select_seconds", "Selection.", "histogram", [], lambda: Histogram((0.5,))))
+        unlabelled.labels().observe(0.25)
+
+        self.assertEqual(self.registry.render().splitlines(), [
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{backend="a:1",le="0.1"} 2',
+            'latency_seconds_bucket{backend="a:1",le="1.0"} 3',
+            'latency_seconds_bucket{backend="a:1",le="+Inf"} 4',
+            'latency_seconds_sum{backend="a:1"} 3.65',
+            'latency_seconds_count{backend="a:1"} 4',
+            "# HELP select_seconds Selection.",
+            "# TYPE select_seconds histogram",
+            'select_seconds_bucket{le="0.5"} 1',
+            'select_seconds_bucket{le="+Inf"} 1',
+            "select_seconds_sum 0.25",
+            "select_seconds_count 1",
+        ])
+
+    def test_wrong_label_count(self):
+        requests = MetricFamily("requests_total", "Requests.", "counter", ["backend"])
+
+        with self.assertRaises(ValueError):
+            requests.labels("a:1", "extra")
+
+    def test_collect_hooks_run_before_rendering(self):
+        values = {}
+        self.registry.register(GaugeFunction("up", "Up.", [], lambda: values.items()))
+        self.registry.add_collect_hook(lambda: values.update({(): 1}))
+
+        self.assertIn("up 1", self.registry.render().splitlines())
+
+    def test_admin_server(self):
+        server = start_admin_server("127.0.0.1", 0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            self.assertEqual(response.read().decode(), REGISTRY.render())
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+
+
+class TestSampledLogging(unittest.TestCase):
+    def setUp(self):
+        level = forwarding.logger.level
+        forwarding.logger.setLevel(logging.INFO)
+        self.addCleanup(forwarding.logger.setLevel, level)
+
+    def test_sampling_rate_is_followed(self):
+        random.seed(42)
+        sampled = sum(should_log(0.25) for _ in range(20000))
+
+        self.assertAlmostEqual(sampled / 20000, 0.25, delta=0.02)
+
+    def test_none_and_all(self):
+        with mock.patch("backend.forwarding.random.random", return_value=0.0):
+            self.assertFalse(should_log(0))
+        with mock.patch("backend.forwarding.random.random", return_value=0.999):
+            self.assertTrue(should_log(1))
+
+    def test_nothing_is_sampled_above_info_level(self):
+        forwarding.logger.setLevel(logging.WARNING)
+
+        self.assertFalse(any(should_log(1) for _ in range(100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
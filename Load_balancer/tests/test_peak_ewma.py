@@ -0,0 +1,88 @@
+import math
+import unittest
+from algorithms.peak_ewma import PeakEwmaAlgorithm
+from backend.backend_server import BackendServer
+from backend.latency import PeakEwma
+from core.health_checker import ServerSnapshot
+from tests.helpers import FakeClock
+
+
+class TestPeakEwma(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.latency = PeakEwma(decay_time=10.0, clock=self.clock)
+
+    def test_starts_at_zero(self):
+        self.assertEqual(self.latency.get(), 0.0)
+        self.assertEqual(self.latency.samples, 0)
+
+    def test_jumps_to_a_slower_sample(self):
+        self.latency.observe(0.1)
+        self.clock.advance(1)
+        self.latency.observe(2.0)
+
+        self.assertEqual(self.latency.get(), 2.0)
+        self.assertEqual(self.latency.samples, 2)
+
+    def test_faster_samples_are_averaged_by_elapsed_time(self):
+        self.latency.observe(1.0)
+        self.clock.advance(10)
+        self.latency.observe(0.0)
+
+        # Ten seconds is one decay time, so the old average keeps a weight of 1/e
+        self.assertAlmostEqual(self.latency.get(), math.exp(-1))
+
+    def test_back_to_back_samples_keep_the_peak(self):
+        self.latency.observe(1.0)
+        self.latency.observe(0.0)
+
+        self.assertEqual(self.latency.get(), 1.0)
+
+    def test_decays_while_idle(self):
+        self.latency.observe(1.0)
+
+        self.clock.advance(10)
+        self.assertAlmostEqual(self.latency.get(), math.exp(-1))
+        self.clock.advance(40)
+        self.assertAlmostEqual(self.latency.get(), math.exp(-5))
+        self.assertAlmostEqual(self.latency.get(self.clock.now + 10), math.exp(-6))
+
+    def test_time_before_the_last_sample_does_not_grow_the_value(self):
+        self.latency.observe(1.0)
+
+        self.assertEqual(self.latency.get(self.clock.now - 5), 1.0)
+
+
+class TestPeakEwmaAlgorithm(unittest.TestCase):
+    def setUp(self):
+        self.fast = BackendServer(1, "127.0.0.1", 8001)
+        self.slow = BackendServer(2, "127.0.0.1", 8002)
+        self.snapshot = ServerSnapshot([self.fast, self.slow], version=1)
+        self.algorithm = PeakEwmaAlgorithm()
+
+    def test_prefers_the_faster_server(self):
+        self.fast.first_byte_latency.observe(0.01)
+        self.slow.first_byte_latency.observe(0.5)
+
+        self.assertTrue(all(self.algorithm.get_next_server(self.snapshot) is self.fast for _ in range(20)))
+
+    def test_connections_outweigh_a_small_latency_gap(self):
+        self.fast.first_byte_latency.observe(0.01)
+        self.slow.first_byte_latency.observe(0.02)
+        for _ in range(3):
+            self.fast.connection_opened()
+
+        self.assertTrue(all(self.algorithm.get_next_server(self.snapshot) is self.slow for _ in range(20)))
+
+    def test_without_samples_compares_connections(self):
+        self.slow.connection_opened()
+
+        self.assertTrue(all(self.algorithm.get_next_server(self.snapshot) is self.fast for _ in range(20)))
+
+    def test_single_and_no_server(self):
+        self.assertIs(self.algorithm.get_next_server(ServerSnapshot([self.slow], version=2)), self.slow)
+        self.assertIsNone(self.algorithm.get_next_server(ServerSnapshot([], version=3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import random
+import unittest
+from algorithms.power_of_two import PowerOfTwoChoicesAlgorithm, sample_two
+from backend.backend_server import BackendServer
+from core.health_checker import ServerSnapshot
+
+
+class TestSampleTwo(unittest.TestCase):
+    def test_picks_two_different_servers(self):
+        random.seed(7)
+        servers = list(range(5))
+        for _ in range(200):
+            first, second = sample_two(servers)
+            self.assertNotEqual(first, second)
+
+    def test_every_pair_is_possible(self):
+        random.seed(7)
+        servers = list(range(4))
+
+        pairs = {frozenset(sample_two(servers)) for _ in range(500)}
+
+        self.assertEqual(len(pairs), 6)
+
+    def test_two_servers(self):
+        random.seed(7)
+        for _ in range(20):
+            self.assertEqual(set(sample_two(["a", "b"])), {"a", "b"})
+
+
+class TestPowerOfTwoChoices(unittest.TestCase):
+    def test_picks_the_less_loaded_of_two(self):
+        idle = BackendServer(1, "127.0.0.1", 8001)
+        busy = BackendServer(2, "127.0.0.1", 8002)
+        busy.connection_opened()
+        snapshot = ServerSnapshot([idle, busy], version=1)
+
+        algorithm = PowerOfTwoChoicesAlgorithm()
+
+        self.assertTrue(all(algorithm.get_next_server(snapshot) is idle for _ in range(20)))
+
+    def test_single_and_no_server(self):
+        server = BackendServer(1, "127.0.0.1", 8001)
+        algorithm = PowerOfTwoChoicesAlgorithm()
+
+        self.assertIs(algorithm.get_next_server(ServerSnapshot([server], version=1)), server)
+        self.assertIsNone(algorithm.get_next_server(ServerSnapshot([], version=2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
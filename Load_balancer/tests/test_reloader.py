@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import unittest
+from core.balancer import LoadBalancer
+from core.health_checker import HealthChecker
+from core.reloader import ConfigReloader
+from servers.server import load_config
+
+
+class TestConfigReloader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.directory.name, "servers.json")
+        self.write_config([
+            {"id": 1, "host": "127.0.0.1", "port": 8001},
+            {"id": 2, "host": "127.0.0.1", "port": 8002},
+            {"id": 3, "host": "127.0.0.1", "port": 8003, "weight": 2},
+        ])
+        self.servers, _ = load_config(self.config_file)
+        self.health_checker = HealthChecker(self.servers)
+        self.load_balancer = LoadBalancer(self.health_checker, mode="http")
+        self.load_balancer.servers = self.servers
+        self.reloader = ConfigReloader(self.config_file, self.load_balancer, self.health_checker, self.servers, default_max_in_flight=10)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_config(self, config):
+        with open(self.config_file, "w") as file:
+            json.dump(config, file)
+
+    def test_unchanged_servers_keep_their_instances(self):
+        first, second, _ = self.servers
+        self.write_config([
+            {"id": 1, "host": "127.0.0.1", "port": 8001},
+            {"id": 2, "host": "127.0.0.1", "port": 8002, "max_in_flight": 5},
+            {"id": 3, "host": "127.0.0.1", "port": 8003, "weight": 3},
+        ])
+
+        self.assertTrue(self.reloader.reload())
+
+        servers = self.load_balancer.servers
+        self.assertIs(servers[0], first)
+        self.assertIs(servers[1], second)
+        self.assertEqual((first.max_in_flight, second.max_in_flight), (10, 5))
+        # A new weight makes a new server, which waits for its health checks
+        self.assertEqual(servers[2].weight, 3)
+        self.assertFalse(servers[2].is_alive)
+        self.assertEqual(list(self.health_checker.get_active_servers()), [first, second])
+
+    def test_removed_server_drains_its_connections(self):
+        removed = self.servers[2]
+        removed.connection_opened()
+        self.write_config([
+            {"id": 1, "host": "127.0.0.1", "port": 8001},
+            {"id": 2, "host": "127.0.0.1", "port": 8002},
+        ])
+
+        self.assertTrue(self.reloader.reload())
+
+        self.assertEqual(self.reloader.draining, [removed])
+        self.assertNotIn(removed, self.health_checker.get_active_servers())
+        self.assertFalse(removed.pool._closed)
+
+        removed.connection_closed()
+        self.reloader._finish_draining()
+
+        self.assertEqual(self.reloader.draining, [])
+        self.assertTrue(removed.pool._closed)
+
+    def test_idle_removed_server_is_closed_at_once(self):
+        removed = self.servers[0]
+        self.write_config([{"id": 2, "host": "127.0.0.1", "port": 8002}])
+
+        self.assertTrue(self.reloader.reload())
+
+        self.assertEqual(self.reloader.draining, [])
+        self.assertTrue(removed.pool._closed)
+
+    def test_readded_server_is_a_new_instance(self):
+        removed = self.servers[1]
+        removed.connection_opened()
+        self.write_config([{"id": 1, "host": "127.0.0.1", "port": 8001}])
+        self.reloader.reload()
+        self.write_config([
+            {"id": 1, "host": "127.0.0.1", "port": 8001},
+            {"id": 2, "host": "127.0.0.1", "port": 8002},
+        ])
+
+        self.assertTrue(self.reloader.reload())
+
+        # The old instance still finishes its own connections
+        self.assertEqual(self.reloader.draining, [removed])
+        self.assertIsNot(self.load_balancer.servers[1], removed)
+
+    def test_routes_use_the_kept_instances(self):
+        self.write_config({
+            "servers": [
+                {"id": 1, "host": "127.0.0.1", "port": 8001},
+                {"id": 2, "host": "127.0.0.1", "port": 8002},
+            ],
+            "routes": [{"path": "/api", "servers": [2]}],
+        })
+
+        self.assertTrue(self.reloader.reload())
+
+        self.assertEqual(self.load_balancer.router.routes[0].servers, [self.servers[1]])
+
+    def test_algorithms_forget_removed_servers(self):
+        self.load_balancer = LoadBalancer(self.health_checker, algorithm="consistent_hash", mode="http")
+        self.load_balancer.update_servers(self.servers, [{"path": "/api", "servers": self.servers[1:]}])
+        self.reloader.load_balancer = self.load_balancer
+        route = self.load_balancer.router.routes[0]
+        self.load_balancer.get_next_server("client")
+        self.load_balancer.get_next_server("client", route)
+        self.write_config([
+            {"id": 1, "host": "127.0.0.1", "port": 8001},
+            {"id": 2, "host": "127.0.0.1", "port": 8002},
+        ])
+
+        self.assertTrue(self.reloader.reload())
+
+        self.assertEqual(route.algorithm._points, {})
+        # Server 2 is still configured, so only the balancer's own algorithm keeps listening to it
+        self.assertEqual([len(server._connection_listeners) for server in self.servers], [1, 1, 0])
+
+    def test_invalid_file_keeps_the_configuration(self):
+        with open(self.config_file, "w") as file:
+            file.write("{not json")
+
+        self.assertFalse(self.reloader.reload())
+
+        self.assertEqual(self.load_balancer.servers, self.servers)
+        self.assertEqual(self.reloader.servers, self.servers)
+
+
+if __name__ == '__main__':
+    unittest.main()
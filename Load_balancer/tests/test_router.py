@@ -0,0 +1,96 @@
+import unittest
+from backend.backend_server import BackendServer
+from backend.http import HttpRequest
+from core.health_checker import ServerSnapshot
+from core.router import Route, Router, request_host_and_path
+
+
+def make_request(target, host=None):
+    head = f"GET {target} HTTP/1.1\r\n" + (f"Host: {host}\r\n" if host else "") + "\r\n"
+    return HttpRequest(head.encode())
+
+
+class TestRequestHostAndPath(unittest.TestCase):
+    def test_host_header_without_port(self):
+        self.assertEqual(request_host_and_path(make_request("/api/users?page=2", "Example.com:8080")), ("example.com", "/api/users"))
+
+    def test_absolute_target_takes_precedence(self):
+        self.assertEqual(request_host_and_path(make_request("http://api.example.com/v1/items", "other.example.com")), ("api.example.com", "/v1/items"))
+
+    def test_absolute_target_without_path(self):
+        self.assertEqual(request_host_and_path(make_request("http://api.example.com")), ("api.example.com", "/"))
+
+    def test_ipv6_literal(self):
+        self.assertEqual(request_host_and_path(make_request("/", "[::1]:8080")), ("[::1]", "/"))
+        self.assertEqual(request_host_and_path(make_request("/", "[::1]")), ("[::1]", "/"))
+
+    def test_no_host(self):
+        self.assertEqual(request_host_and_path(make_request("/")), (None, "/"))
+
+
+class TestRouter(unittest.TestCase):
+    def setUp(self):
+        self.api = BackendServer(1, "127.0.0.1", 8001)
+        self.static = BackendServer(2, "127.0.0.1", 8002)
+        self.web = BackendServer(3, "127.0.0.1", 8003)
+        self.router = Router.from_config([
+            {"servers": [self.api], "host": "API.example.com"},
+            {"servers": [self.static], "path": "/static/"},
+            {"servers": [self.web]},
+        ], "round_robin")
+
+    def test_first_match_wins(self):
+        self.assertIs(self.router.match(make_request("/static/logo.png", "api.example.com")), self.router.routes[0])
+        self.assertIs(self.router.match(make_request("/static/logo.png", "www.example.com")), self.router.routes[1])
+        self.assertIs(self.router.match(make_request("/", "www.example.com")), self.router.routes[2])
+
+    def test_no_match(self):
+        router = Router.from_config([{"servers": [self.api], "path": "/api"}], "round_robin")
+
+        self.assertIsNone(router.match(make_request("/")))
+
+    def test_path_matches_whole_segments(self):
+        route = Route([self.api], path="/api")
+
+        self.assertTrue(route.matches(None, "/api"))
+        self.assertTrue(route.matches(None, "/api/users"))
+        self.assertFalse(route.matches(None, "/apiary"))
+        self.assertFalse(route.matches(None, "/ap"))
+
+    def test_path_ending_in_slash_matches_paths_below_it(self):
+        route = Route([self.static], path="/static/")
+
+        self.assertTrue(route.matches(None, "/static/logo.png"))
+        self.assertFalse(route.matches(None, "/static"))
+        self.assertTrue(Route([self.web]).matches(None, "/anything"))
+
+    def test_route_chooses_from_its_own_pool(self):
+        route = self.router.routes[1]
+        snapshot = ServerSnapshot([self.api, self.static, self.web], version=1)
+
+        self.assertEqual({route.get_next_server(snapshot) for _ in range(4)}, {self.static})
+
+    def test_route_without_healthy_servers(self):
+        route = self.router.routes[1]
+
+        self.assertIsNone(route.get_next_server(ServerSnapshot([self.api, self.web], version=1)))
+
+    def test_reconfigure_keeps_unchanged_routes(self):
+        router = self.router.reconfigure([
+            {"servers": [self.api, self.web], "host": "api.example.com"},
+            {"servers": [self.static], "path": "/assets/"},
+        ], "round_robin")
+
+        self.assertIs(router.routes[0], self.router.routes[0])
+        self.assertEqual(router.routes[0].servers, [self.api, self.web])
+        self.assertIsNot(router.routes[1], self.router.routes[1])
+
+    def test_invalid_routes(self):
+        with self.assertRaises(ValueError):
+            Route([self.api], path="api")
+        with self.assertRaises(ValueError):
+            Route([self.api], algorithm="fastest")
+
+
+if __name__ == '__main__':
+    unittest.main()
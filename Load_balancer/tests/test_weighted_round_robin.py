@@ -0,0 +1,49 @@
+import unittest
+from algorithms.weighted_round_robin import WeightedRoundRobinAlgorithm
+from backend.backend_server import BackendServer
+from core.health_checker import ServerSnapshot
+
+
+class TestWeightedRoundRobin(unittest.TestCase):
+    def setUp(self):
+        self.a = BackendServer(1, "127.0.0.1", 8001, weight=5)
+        self.b = BackendServer(2, "127.0.0.1", 8002, weight=1)
+        self.c = BackendServer(3, "127.0.0.1", 8003, weight=1)
+
+    def test_smooth_schedule(self):
+        schedule = WeightedRoundRobinAlgorithm.build_schedule([self.a, self.b, self.c])
+
+        # As in NGINX: the heavy server's picks are spread out instead of coming in a burst
+        self.assertEqual(schedule, [self.a, self.a, self.b, self.a, self.c, self.a, self.a])
+
+    def test_schedule_is_reduced_by_the_common_divisor(self):
+        a = BackendServer(1, "127.0.0.1", 8001, weight=4)
+        b = BackendServer(2, "127.0.0.1", 8002, weight=2)
+
+        self.assertEqual(WeightedRoundRobinAlgorithm.build_schedule([a, b]), [a, b, a])
+
+    def test_picks_follow_the_weights(self):
+        algorithm = WeightedRoundRobinAlgorithm()
+        snapshot = ServerSnapshot([self.a, self.b, self.c], version=1)
+
+        picks = [algorithm.get_next_server(snapshot) for _ in range(70)]
+
+        self.assertEqual(picks.count(self.a), 50)
+        self.assertEqual(picks.count(self.b), 10)
+        self.assertEqual(picks.count(self.c), 10)
+
+    def test_new_snapshot_rebuilds_the_schedule(self):
+        algorithm = WeightedRoundRobinAlgorithm()
+        algorithm.get_next_server(ServerSnapshot([self.a, self.b, self.c], version=1))
+
+        snapshot = ServerSnapshot([self.b, self.c], version=2)
+        picks = {algorithm.get_next_server(snapshot) for _ in range(4)}
+
+        self.assertEqual(picks, {self.b, self.c})
+
+    def test_no_active_servers(self):
+        self.assertIsNone(WeightedRoundRobinAlgorithm().get_next_server(ServerSnapshot([], version=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+from backend.backend_server import BackendServer
+from core.workers import SharedHealthChecker, SharedHealthView, SharedState
+
+
+def make_servers():
+    """The servers of one process; every forked process has its own copies."""
+    return [BackendServer(index, "127.0.0.1", 8000 + index) for index in range(1, 4)]
+
+
+class TestSharedState(unittest.TestCase):
+    def setUp(self):
+        self.state = SharedState(num_servers=3, num_workers=2)
+
+    def test_published_health_round_trips(self):
+        servers = make_servers()
+        servers[1].update_health_status(False)
+
+        self.state.publish_health(servers)
+
+        self.assertEqual(self.state.read_health(), (1, bytes([1, 0, 1])))
+
+    def test_workers_follow_the_published_health(self):
+        checked = make_servers()
+        health_checker = SharedHealthChecker(checked, self.state)
+        worker_servers = make_servers()
+        health_view = SharedHealthView(worker_servers, self.state, worker_index=0)
+        self.assertEqual(list(health_view.get_active_servers()), worker_servers)
+
+        checked[1].update_health_status(False)
+        health_checker._publish_active_servers()
+
+        snapshot = health_view.get_active_servers()
+        self.assertEqual(list(snapshot), [worker_servers[0], worker_servers[2]])
+        self.assertFalse(worker_servers[1].is_alive)
+        # Unchanged health keeps the snapshot
+        self.assertIs(health_view.get_active_servers(), snapshot)
+
+        checked[1].update_health_status(True)
+        health_checker._publish_active_servers()
+
+        self.assertEqual(list(health_view.get_active_servers()), worker_servers)
+
+    def test_restarted_health_process_reads_the_published_health(self):
+        servers = make_servers()
+        servers[1].update_health_status(False)
+        self.state.publish_health(servers)
+
+        # Forked again from the main process, where every server is alive
+        restarted = make_servers()
+        health_checker = SharedHealthChecker(restarted, self.state)
+
+        self.assertFalse(restarted[1].is_alive)
+        self.assertEqual(list(health_checker.get_active_servers()), [restarted[0], restarted[2]])
+
+        # Its recovery is published to the workers
+        with mock.patch.object(health_checker, "_check_server_health", return_value=True):
+            for _ in range(health_checker.rise):
+                health_checker._probe(restarted[1])
+        self.assertEqual(self.state.read_health()[1], bytes([1, 1, 1]))
+
+    def test_connection_counts_are_summed_over_workers(self):
+        first = make_servers()
+        second = make_servers()
+        SharedHealthView(first, self.state, worker_index=0)
+        SharedHealthView(second, self.state, worker_index=1)
+
+        first[0].connection_opened()
+        first[0].connection_opened()
+        second[0].connection_opened()
+        second[2].connection_opened()
+        first[0].connection_closed()
+
+        self.assertEqual([self.state.total_connections(index) for index in range(3)], [2, 0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()